@@ -0,0 +1,124 @@
+# Databricks CLI
+# Copyright 2018 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the client CPU time and the bytes sent on the wire by DbfsApi.put_file in the block
+and multipart upload modes.
+
+The uploads go to a stub DBFS server running in a child process on localhost, so the CPU time
+measured is the one spent by the client only.
+
+    python benchmarks/dbfs_upload.py --size-mb 64
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from six.moves import BaseHTTPServer
+
+from databricks_cli.dbfs.api import DbfsApi, UploadMode
+from databricks_cli.dbfs.dbfs_path import DbfsPath
+from databricks_cli.sdk import ApiClient
+
+
+class StubDbfsHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Accepts every DBFS upload request, discards the body and counts the bytes received.
+    """
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        remaining = length
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 2**16)))
+        if self.path.endswith('/stats'):
+            response = self.server.stats
+            self.server.stats = {'requests': 0, 'bytes': 0}
+        else:
+            self.server.stats['requests'] += 1
+            self.server.stats['bytes'] += length
+            response = {'handle': 1} if self.path.endswith('/dbfs/create') else {}
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # NOQA
+        pass
+
+
+def serve(port_queue):
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), StubDbfsHandler)
+    server.stats = {'requests': 0, 'bytes': 0}
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def run(api_client, src_path, upload_mode):
+    dbfs_api = DbfsApi(api_client, put_threshold=0, upload_mode=upload_mode)
+    start_times = os.times()
+    start = time.time()
+    dbfs_api.put_file(src_path, DbfsPath('dbfs:/benchmark'), True)
+    elapsed = time.time() - start
+    end_times = os.times()
+    cpu = (end_times[0] - start_times[0]) + (end_times[1] - start_times[1])
+    stats = api_client.perform_query('POST', '/stats')
+    return cpu, elapsed, stats['requests'], stats['bytes']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=int, default=64, help='Size of the uploaded file.')
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,))
+    server.daemon = True
+    server.start()
+    api_client = ApiClient(host='http://127.0.0.1:{}'.format(port_queue.get()), token='token')
+
+    src_file = tempfile.NamedTemporaryFile(delete=False)
+    try:
+        for _ in range(args.size_mb):
+            src_file.write(os.urandom(2**20))
+        src_file.close()
+
+        print('{:<10} {:>10} {:>10} {:>9} {:>14}'.format(
+            'mode', 'cpu (s)', 'wall (s)', 'requests', 'wire bytes'))
+        for upload_mode in [UploadMode.BLOCK, UploadMode.MULTIPART]:
+            cpu, elapsed, requests, wire_bytes = run(api_client, src_file.name, upload_mode)
+            print('{:<10} {:>10.3f} {:>10.3f} {:>9} {:>14}'.format(
+                upload_mode, cpu, elapsed, requests, wire_bytes))
+        print('file size: {} bytes'.format(os.path.getsize(src_file.name)))
+    finally:
+        os.remove(src_file.name)
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -46,6 +46,19 @@ class OutputClickType(ParamType):
         return value is not None and value.lower() == 'table'
 
 
+class StreamingOutputClickType(OutputClickType):
+    help = 'can be "JSON", "NDJSON" or "TABLE". Set to TABLE by default.'
+
+    def convert(self, value, param, ctx):
+        if value is not None and value.lower() == 'ndjson':
+            return value
+        return super(StreamingOutputClickType, self).convert(value, param, ctx)
+
+    @classmethod
+    def is_ndjson(cls, value):
+        return value is not None and value.lower() == 'ndjson'
+
+
 class JsonClickType(ParamType):
     name = 'JSON'
 
@@ -22,18 +22,32 @@
 # limitations under the License.
 
 from base64 import b64encode, b64decode
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
+import fnmatch
+import json
 import os
+import tempfile
+import threading
 import click
 
-from requests.exceptions import HTTPError
+from requests.exceptions import HTTPError, RequestException
 
 from databricks_cli.sdk import DbfsService
-from databricks_cli.utils import error_and_quit
+from databricks_cli.utils import error_and_quit, make_local_dir, sha256_file, \
+    walk_concurrently, TransferFailure
 from databricks_cli.dbfs.dbfs_path import DbfsPath
 from databricks_cli.dbfs.exceptions import LocalFileExistsException
 
 BUFFER_SIZE_BYTES = 2**20
+DEFAULT_PARALLELISM = 8
+# /dbfs/put accepts at most 1 MB of inline contents. The contents are base64 encoded so the
+# default threshold keeps the encoded payload under that limit.
+DEFAULT_PUT_THRESHOLD_BYTES = 3 * 2**18
+# Largest file /dbfs/put accepts as a multipart/form-data upload.
+MULTIPART_PUT_MAX_BYTES = 2 * 2**30
+# Name of the file kept at the root of a dbfs sync destination to record what was synced.
+SYNC_MANIFEST_NAME = '.dbfs_sync_manifest.json'
 
 
 class FileInfo(object):
@@ -42,8 +56,17 @@ class FileInfo(object):
         self.is_dir = is_dir
         self.file_size = file_size
 
-    def to_row(self, is_long_form, is_absolute):
-        path = self.dbfs_path.absolute_path if is_absolute else self.dbfs_path.basename
+    def to_row(self, is_long_form, is_absolute, relative_to=None):
+        """
+        :param relative_to: If set and is_absolute is not, display the path relative to this
+        DbfsPath instead of the basename.
+        """
+        if is_absolute:
+            path = self.dbfs_path.absolute_path
+        elif relative_to is not None:
+            path = _relpath(self.dbfs_path, relative_to)
+        else:
+            path = self.dbfs_path.basename
         stylized_path = click.style(path, 'cyan') if self.is_dir else path
         if is_long_form:
             filetype = 'dir' if self.is_dir else 'file'
@@ -68,9 +91,34 @@ class DbfsErrorCodes(object):
     RESOURCE_ALREADY_EXISTS = 'RESOURCE_ALREADY_EXISTS'
 
 
+def _get_error_code(http_error):
+    try:
+        return http_error.response.json().get('error_code')
+    except ValueError:
+        return None
+
+
+class UploadMode(object):
+    # create, add-block and close with base64 encoded blocks.
+    BLOCK = 'block'
+    # The raw file streamed as a multipart/form-data body to /dbfs/put.
+    MULTIPART = 'multipart'
+    ALL = [BLOCK, MULTIPART]
+
+
 class DbfsApi(object):
-    def __init__(self, api_client):
+    def __init__(self, api_client, put_threshold=DEFAULT_PUT_THRESHOLD_BYTES,
+                 upload_mode=UploadMode.BLOCK):
+        """
+        :param put_threshold: Files smaller than this many bytes are uploaded with a single
+        /dbfs/put request instead of create, add-block and close. Set to 0 to always use blocks.
+        :param upload_mode: One of UploadMode. In MULTIPART mode, files up to
+        MULTIPART_PUT_MAX_BYTES are streamed to /dbfs/put without base64 encoding. If the
+        multipart upload is rejected, the file is uploaded with blocks instead.
+        """
         self.client = DbfsService(api_client)
+        self.put_threshold = put_threshold
+        self.upload_mode = upload_mode
 
     def list_files(self, dbfs_path):
         list_response = self.client.list(dbfs_path.absolute_path)
@@ -79,6 +127,14 @@ class DbfsApi(object):
         else:
             return []
 
+    def walk(self, dbfs_path, parallelism=DEFAULT_PARALLELISM):
+        """
+        Lazily yields the FileInfo of every file and directory below dbfs_path, with up to
+        parallelism directories listed concurrently. See utils.walk_concurrently for the order.
+        """
+        return walk_concurrently(dbfs_path, self.list_files, lambda f: f.is_dir,
+                                 lambda f: f.dbfs_path, parallelism)
+
     def file_exists(self, dbfs_path):
         try:
             self.get_status(dbfs_path)
@@ -92,7 +148,46 @@ class DbfsApi(object):
         json = self.client.get_status(dbfs_path.absolute_path)
         return FileInfo.from_json(json)
 
-    def put_file(self, src_path, dbfs_path, overwrite):
+    def put_file(self, src_path, dbfs_path, overwrite, checkpoint=None):
+        """
+        Uploads the local file src_path to dbfs_path.
+
+        :param checkpoint: CheckpointJournal in which the upload is recorded once complete.
+        """
+        self._put_file(src_path, dbfs_path, overwrite)
+        if checkpoint is not None:
+            checkpoint.file_done(_checkpoint_key(src_path, dbfs_path))
+
+    def _put_file(self, src_path, dbfs_path, overwrite):
+        file_size = os.path.getsize(src_path)
+        if self.upload_mode == UploadMode.MULTIPART and file_size <= MULTIPART_PUT_MAX_BYTES:
+            try:
+                self._put_file_multipart(src_path, dbfs_path, overwrite, file_size)
+                return
+            except RequestException as e:
+                if isinstance(e, HTTPError) and \
+                        _get_error_code(e) == DbfsErrorCodes.RESOURCE_ALREADY_EXISTS:
+                    raise e
+                # Otherwise fall back to the block protocol below, which also covers the
+                # connection errors and timeouts that a single large request is prone to.
+        elif file_size < self.put_threshold:
+            with open(src_path, 'rb') as local_file:
+                # put should not take a bytes object.
+                self.client.put(dbfs_path.absolute_path, b64encode(local_file.read()).decode(),
+                                overwrite)
+            return
+        self._put_file_blocks(src_path, dbfs_path, overwrite)
+
+    def _put_file_multipart(self, src_path, dbfs_path, overwrite, file_size):
+        fields = {
+            'path': dbfs_path.absolute_path,
+            'overwrite': 'true' if overwrite else 'false'
+        }
+        with open(src_path, 'rb') as local_file:
+            self.client.client.perform_multipart_upload('/dbfs/put', fields, 'contents',
+                                                        local_file, file_size)
+
+    def _put_file_blocks(self, src_path, dbfs_path, overwrite):
         handle = self.client.create(dbfs_path.absolute_path, overwrite)['handle']
         with open(src_path, 'rb') as local_file:
             while True:
@@ -103,13 +198,32 @@ class DbfsApi(object):
                 self.client.add_block(handle, b64encode(contents).decode())
             self.client.close(handle)
 
-    def get_file(self, dbfs_path, dst_path, overwrite):
-        if os.path.exists(dst_path) and not overwrite:
+    def get_file(self, dbfs_path, dst_path, overwrite, parallelism=1, checkpoint=None):
+        """
+        Downloads a DBFS file to dst_path.
+
+        When parallelism is greater than one, files larger than a single read are downloaded
+        with up to parallelism concurrent ranged reads.
+
+        :param checkpoint: CheckpointJournal in which the downloaded ranges and the completed
+        file are recorded. If it holds ranges of a previous attempt at this download, only the
+        missing ranges are downloaded into the existing dst_path.
+        """
+        key = _checkpoint_key(dbfs_path, dst_path)
+        resumable = checkpoint is not None and checkpoint.has_ranges(key)
+        if os.path.exists(dst_path) and not overwrite and not resumable:
             raise LocalFileExistsException('{} exists already.'.format(dst_path))
         file_info = self.get_status(dbfs_path)
         if file_info.is_dir:
             error_and_quit(('The dbfs file {} is a directory.').format(repr(dbfs_path)))
         length = file_info.file_size
+        if checkpoint is not None:
+            self._get_file_ranges(dbfs_path, dst_path, length, parallelism, checkpoint)
+            checkpoint.file_done(key)
+            return
+        if parallelism > 1 and length > BUFFER_SIZE_BYTES:
+            self._get_file_ranges(dbfs_path, dst_path, length, parallelism)
+            return
         offset = 0
         with open(dst_path, 'wb') as local_file:
             while offset < length:
@@ -119,6 +233,64 @@ class DbfsApi(object):
                 offset += bytes_read
                 local_file.write(b64decode(data))
 
+    def _get_file_ranges(self, dbfs_path, dst_path, length, parallelism, checkpoint=None):
+        """
+        Downloads a file of known length by reading BUFFER_SIZE_BYTES ranges concurrently and
+        writing each one at its offset in a preallocated local file. At most 2 * parallelism
+        ranges are scheduled at a time, which bounds the memory held by in-flight reads.
+
+        Each range is flushed to dst_path before it is recorded in checkpoint, so that the ranges
+        recorded by an interrupted download can be skipped when it is resumed.
+        """
+        key = _checkpoint_key(dbfs_path, dst_path)
+        completed = set()
+        if checkpoint is not None and os.path.isfile(dst_path) and \
+                os.path.getsize(dst_path) == length:
+            completed = checkpoint.completed_ranges(key, length)
+        lock = threading.Lock()
+        with open(dst_path, 'r+b' if completed else 'wb') as local_file:
+            local_file.truncate(length)
+
+            def fetch(offset):
+                data = self._read_range(dbfs_path, offset,
+                                        min(BUFFER_SIZE_BYTES, length - offset))
+                with lock:
+                    local_file.seek(offset)
+                    local_file.write(data)
+                    local_file.flush()
+                if checkpoint is not None:
+                    checkpoint.range_done(key, offset, length)
+
+            with ThreadPoolExecutor(max_workers=parallelism) as executor:
+                pending = set()
+                for offset in range(0, length, BUFFER_SIZE_BYTES):
+                    if offset in completed:
+                        continue
+                    if len(pending) >= 2 * parallelism:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(executor.submit(fetch, offset))
+                for future in pending:
+                    future.result()
+
+    def _read_range(self, dbfs_path, offset, length):
+        """
+        Reads exactly length bytes starting at offset, issuing further reads if the server
+        returns fewer bytes than requested.
+        """
+        chunks = []
+        while length > 0:
+            response = self.client.read(dbfs_path.absolute_path, offset, length)
+            bytes_read = response['bytes_read']
+            if bytes_read == 0:
+                raise RuntimeError('Unexpected end of file {} at offset {}.'.format(
+                    dbfs_path.absolute_path, offset))
+            chunks.append(b64decode(response['data']))
+            offset += bytes_read
+            length -= bytes_read
+        return b''.join(chunks)
+
     def delete(self, dbfs_path, recursive):
         self.client.delete(dbfs_path.absolute_path, recursive=recursive)
 
@@ -128,7 +300,7 @@ class DbfsApi(object):
     def move(self, dbfs_src, dbfs_dst):
         self.client.move(dbfs_src.absolute_path, dbfs_dst.absolute_path)
 
-    def _copy_to_dbfs_non_recursive(self, src, dbfs_path_dst, overwrite):
+    def _copy_to_dbfs_non_recursive(self, src, dbfs_path_dst, overwrite, checkpoint=None):
         # Munge dst path in case dbfs_path_dst is a dir
         try:
             if self.get_status(dbfs_path_dst).is_dir:
@@ -138,15 +310,78 @@ class DbfsApi(object):
                 pass
             else:
                 raise e
-        self.put_file(src, dbfs_path_dst, overwrite)
+        if not _is_copied(checkpoint, src, dbfs_path_dst):
+            self.put_file(src, dbfs_path_dst, overwrite, checkpoint)
 
-    def _copy_from_dbfs_non_recursive(self, dbfs_path_src, dst, overwrite):
+    def _copy_from_dbfs_non_recursive(self, dbfs_path_src, dst, overwrite, parallelism=1,
+                                      checkpoint=None):
         # Munge dst path in case dst is a dir
         if os.path.isdir(dst):
             dst = os.path.join(dst, dbfs_path_src.basename)
-        self.get_file(dbfs_path_src, dst, overwrite)
+        if not _is_copied(checkpoint, dbfs_path_src, dst):
+            self.get_file(dbfs_path_src, dst, overwrite, parallelism, checkpoint)
+
+    def put_files(self, transfers, overwrite, parallelism=DEFAULT_PARALLELISM, checkpoint=None):
+        """
+        Uploads many local files to DBFS concurrently.
+
+        Each file is uploaded by a single worker so the blocks of a file are always added in
+        order. A failed file does not abort the other transfers.
+
+        :param transfers: list of (local_path, DbfsPath) tuples.
+        :param checkpoint: CheckpointJournal of the files already uploaded, which are skipped.
+        :return: list of TransferFailure for the files that could not be uploaded.
+        """
+        def put(src, dst):
+            if _is_copied(checkpoint, src, dst):
+                return
+            try:
+                self.put_file(src, dst, overwrite, checkpoint)
+                click.echo('{} -> {}'.format(src, dst))
+            except HTTPError as e:
+                if e.response.json()['error_code'] == DbfsErrorCodes.RESOURCE_ALREADY_EXISTS:
+                    click.echo('{} already exists. Skip.'.format(dst))
+                else:
+                    raise e
+        return self._run_transfers(put, transfers, parallelism)
+
+    def get_files(self, transfers, overwrite, parallelism=DEFAULT_PARALLELISM, checkpoint=None):
+        """
+        Downloads many DBFS files to the local filesystem concurrently.
 
-    def _copy_to_dbfs_recursive(self, src, dbfs_path_dst, overwrite):
+        :param transfers: list of (DbfsPath, local_path) tuples.
+        :param checkpoint: CheckpointJournal of the files and ranges already downloaded, which
+        are skipped.
+        :return: list of TransferFailure for the files that could not be downloaded.
+        """
+        def get(src, dst):
+            if _is_copied(checkpoint, src, dst):
+                return
+            try:
+                self.get_file(src, dst, overwrite, checkpoint=checkpoint)
+                click.echo('{} -> {}'.format(src, dst))
+            except LocalFileExistsException:
+                click.echo(('{} already exists locally as {}. Skip. To overwrite, you ' +
+                            'should provide the --overwrite flag.').format(src, dst))
+        return self._run_transfers(get, transfers, parallelism)
+
+    def _run_transfers(self, transfer_fn, transfers, parallelism):
+        failures = []
+        with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as executor:
+            futures = {executor.submit(transfer_fn, src, dst): (src, dst)
+                       for src, dst in transfers}
+            for future in as_completed(futures):
+                exception = future.exception()
+                if exception is not None:
+                    src, dst = futures[future]
+                    click.echo('Failed to copy {} -> {}: {}'.format(src, dst, exception))
+                    failures.append(TransferFailure(src, dst, exception))
+        return failures
+
+    def _plan_copy_to_dbfs_recursive(self, src, dbfs_path_dst, transfers):
+        """
+        Creates the directory structure of src on DBFS and collects the files to upload.
+        """
         try:
             self.mkdirs(dbfs_path_dst)
         except HTTPError as e:
@@ -157,40 +392,49 @@ class DbfsApi(object):
             cur_src = os.path.join(src, filename)
             cur_dbfs_dst = dbfs_path_dst.join(filename)
             if os.path.isdir(cur_src):
-                self._copy_to_dbfs_recursive(cur_src, cur_dbfs_dst, overwrite)
+                self._plan_copy_to_dbfs_recursive(cur_src, cur_dbfs_dst, transfers)
             elif os.path.isfile(cur_src):
-                try:
-                    self.put_file(cur_src, cur_dbfs_dst, overwrite)
-                    click.echo('{} -> {}'.format(cur_src, cur_dbfs_dst))
-                except HTTPError as e:
-                    if e.response.json()['error_code'] == DbfsErrorCodes.RESOURCE_ALREADY_EXISTS:
-                        click.echo('{} already exists. Skip.'.format(cur_dbfs_dst))
-                    else:
-                        raise e
-
-    def _copy_from_dbfs_recursive(self, dbfs_path_src, dst, overwrite):
-        if os.path.isfile(dst):
-            click.echo(
-                '{} exists as a file. Skipping this subtree {}'.format(dst, repr(dbfs_path_src)))
+                transfers.append((cur_src, cur_dbfs_dst))
+
+    def _plan_copy_from_dbfs_recursive(self, dbfs_path_src, dst, transfers,
+                                       parallelism=DEFAULT_PARALLELISM):
+        """
+        Creates the directory structure of dbfs_path_src locally and collects the files to
+        download.
+        """
+        if not make_local_dir(dst, dbfs_path_src):
             return
-        elif not os.path.isdir(dst):
-            os.makedirs(dst)
-
-        for dbfs_src_file_info in self.list_files(dbfs_path_src):
-            cur_dbfs_src = dbfs_src_file_info.dbfs_path
-            cur_dst = os.path.join(dst, cur_dbfs_src.basename)
-            if dbfs_src_file_info.is_dir:
-                self._copy_from_dbfs_recursive(cur_dbfs_src, cur_dst, overwrite)
+        skipped_dirs = []
+        for file_info in self.walk(dbfs_path_src, parallelism):
+            relpath = _relpath(file_info.dbfs_path, dbfs_path_src)
+            if any(_is_ancestor(d, relpath) for d in skipped_dirs):
+                continue
+            cur_dst = os.path.join(dst, *relpath.split('/'))
+            if file_info.is_dir:
+                if not make_local_dir(cur_dst, file_info.dbfs_path):
+                    skipped_dirs.append(relpath)
             else:
-                try:
-                    self.get_file(cur_dbfs_src, cur_dst, overwrite)
-                    click.echo('{} -> {}'.format(cur_dbfs_src, cur_dst))
-                except LocalFileExistsException:
-                    click.echo(('{} already exists locally as {}. Skip. To overwrite, you' +
-                                'should provide the --overwrite flag.').format(cur_dbfs_src,
-                                                                               cur_dst))
-
-    def cp(self, recursive, overwrite, src, dst):
+                transfers.append((file_info.dbfs_path, cur_dst))
+
+    def _copy_to_dbfs_recursive(self, src, dbfs_path_dst, overwrite,
+                                parallelism=DEFAULT_PARALLELISM, checkpoint=None):
+        transfers = []
+        self._plan_copy_to_dbfs_recursive(src, dbfs_path_dst, transfers)
+        return self.put_files(transfers, overwrite, parallelism, checkpoint)
+
+    def _copy_from_dbfs_recursive(self, dbfs_path_src, dst, overwrite,
+                                  parallelism=DEFAULT_PARALLELISM, checkpoint=None):
+        transfers = []
+        self._plan_copy_from_dbfs_recursive(dbfs_path_src, dst, transfers, parallelism)
+        return self.get_files(transfers, overwrite, parallelism, checkpoint)
+
+    def cp(self, recursive, overwrite, src, dst, parallelism=DEFAULT_PARALLELISM,
+           checkpoint=None):
+        """
+        :param checkpoint: CheckpointJournal used to record the progress of the copy and to
+        skip the work recorded by an earlier attempt at the same copy.
+        """
+        failures = []
         if not DbfsPath.is_valid(src) and DbfsPath.is_valid(dst):
             if not os.path.exists(src):
                 error_and_quit('The local file {} does not exist.'.format(src))
@@ -199,21 +443,26 @@ class DbfsApi(object):
                     error_and_quit(
                         ('The local file {} is a directory. You must provide --recursive')
                         .format(src))
-                self._copy_to_dbfs_non_recursive(src, DbfsPath(dst), overwrite)
+                self._copy_to_dbfs_non_recursive(src, DbfsPath(dst), overwrite, checkpoint)
             else:
                 if not os.path.isdir(src):
-                    self._copy_to_dbfs_non_recursive(src, DbfsPath(dst), overwrite)
+                    self._copy_to_dbfs_non_recursive(src, DbfsPath(dst), overwrite, checkpoint)
                     return
-                self._copy_to_dbfs_recursive(src, DbfsPath(dst), overwrite)
+                failures = self._copy_to_dbfs_recursive(src, DbfsPath(dst), overwrite,
+                                                        parallelism, checkpoint)
         # Copy from DBFS in this case
         elif DbfsPath.is_valid(src) and not DbfsPath.is_valid(dst):
             if not recursive:
-                self._copy_from_dbfs_non_recursive(DbfsPath(src), dst, overwrite)
+                self._copy_from_dbfs_non_recursive(DbfsPath(src), dst, overwrite, parallelism,
+                                                   checkpoint)
             else:
                 dbfs_path_src = DbfsPath(src)
                 if not self.get_status(dbfs_path_src).is_dir:
-                    self._copy_from_dbfs_non_recursive(dbfs_path_src, dst, overwrite)
-                self._copy_from_dbfs_recursive(dbfs_path_src, dst, overwrite)
+                    self._copy_from_dbfs_non_recursive(dbfs_path_src, dst, overwrite,
+                                                       parallelism, checkpoint)
+                    return
+                failures = self._copy_from_dbfs_recursive(dbfs_path_src, dst, overwrite,
+                                                          parallelism, checkpoint)
         elif not DbfsPath.is_valid(src) and not DbfsPath.is_valid(dst):
             error_and_quit('Both paths provided are from your local filesystem. '
                            'To use this utility, one of the src or dst must be prefixed '
@@ -224,3 +473,216 @@ class DbfsApi(object):
                            'file from DBFS to your local filesystem and then back.')
         else:
             assert False, 'not reached'
+        if failures:
+            error_and_quit('{} file(s) failed to copy.'.format(len(failures)))
+
+    def sync(self, src, dbfs_path_dst, delete=False, checksum=False,
+             parallelism=DEFAULT_PARALLELISM):
+        """
+        Makes dbfs_path_dst a copy of the local directory src, uploading only the files that
+        are new or changed.
+
+        A file is considered changed if its size differs from the DBFS file or if it has no entry
+        in the manifest written at the root of dbfs_path_dst by the previous sync. Other files
+        are skipped if their modification time is unchanged since that sync. Otherwise they are
+        uploaded, unless checksum is set and their SHA-256 matches the one in the manifest.
+
+        :param delete: Also delete the DBFS files and directories that do not exist in src.
+        :param checksum: Compare and record SHA-256 hashes of the file contents.
+        :return: list of TransferFailure for the files that could not be uploaded.
+        """
+        manifest_path = dbfs_path_dst.join(SYNC_MANIFEST_NAME)
+        remote_files, remote_dirs = self._list_tree(dbfs_path_dst, parallelism)
+        manifest = {}
+        if SYNC_MANIFEST_NAME in remote_files:
+            del remote_files[SYNC_MANIFEST_NAME]
+            manifest = self._read_sync_manifest(manifest_path)
+        local_files = _list_local_tree(src)
+        # '' is the root of the tree.
+        local_dirs = _list_local_dirs(src) | {''}
+
+        new_manifest = {}
+        transfers = []
+        local_path_to_relpath = {}
+        for relpath, (local_path, size, mtime) in sorted(local_files.items()):
+            remote = remote_files.get(relpath)
+            previous = manifest.get(relpath)
+            digest = None
+            if remote is None or remote.file_size != size or previous is None:
+                # Without a manifest entry, an equal size says nothing about the contents.
+                changed = True
+            elif previous.get('mtime') == mtime:
+                changed = False
+                digest = previous.get('sha256')
+            elif checksum:
+                digest = sha256_file(local_path).hexdigest()
+                changed = digest != previous.get('sha256')
+            else:
+                changed = True
+            entry = {'size': size, 'mtime': mtime}
+            if checksum:
+                entry['sha256'] = digest or sha256_file(local_path).hexdigest()
+            new_manifest[relpath] = entry
+            if changed:
+                transfers.append((local_path, _join_relpath(dbfs_path_dst, relpath)))
+                local_path_to_relpath[local_path] = relpath
+
+        # mkdirs creates the parent directories as well, so only the deepest missing directories
+        # need to be created.
+        missing_dirs = [d for d in local_dirs if d not in remote_dirs]
+        for relpath in sorted(missing_dirs):
+            if not any(_is_ancestor(relpath, other) for other in missing_dirs):
+                self.mkdirs(_join_relpath(dbfs_path_dst, relpath))
+
+        failures = self.put_files(transfers, True, parallelism)
+        for failure in failures:
+            del new_manifest[local_path_to_relpath[failure.src]]
+
+        deleted = 0
+        if delete:
+            removed = [f for f in remote_files if f not in local_files] + \
+                [d for d in remote_dirs if d not in local_dirs]
+            for relpath in sorted(removed):
+                parent = relpath.rsplit('/', 1)[0] if '/' in relpath else ''
+                if parent not in local_dirs:
+                    # Deleted together with its parent directory.
+                    continue
+                removed_path = _join_relpath(dbfs_path_dst, relpath)
+                self.delete(removed_path, recursive=True)
+                click.echo('Deleted {}'.format(removed_path))
+                deleted += 1
+
+        if new_manifest != manifest:
+            self._write_sync_manifest(manifest_path, new_manifest)
+        click.echo('{} uploaded, {} unchanged, {} deleted.'.format(
+            len(transfers) - len(failures), len(local_files) - len(transfers), deleted))
+        return failures
+
+    def _list_tree(self, dbfs_path, parallelism=DEFAULT_PARALLELISM):
+        """
+        Lists every file and directory below dbfs_path.
+
+        :return: tuple of (files, dirs). files maps the path of each file relative to dbfs_path
+        to its FileInfo and dirs is the set of the relative paths of the directories, including
+        '' for dbfs_path itself. Both are empty if dbfs_path does not exist.
+        """
+        files = {}
+        dirs = {''}
+        try:
+            for file_info in self.walk(dbfs_path, parallelism):
+                relpath = _relpath(file_info.dbfs_path, dbfs_path)
+                if file_info.is_dir:
+                    dirs.add(relpath)
+                else:
+                    files[relpath] = file_info
+        except HTTPError as e:
+            # Only a missing dbfs_path means that the tree is empty.
+            if _get_error_code(e) == DbfsErrorCodes.RESOURCE_DOES_NOT_EXIST and \
+                    not files and dirs == {''}:
+                return {}, set()
+            raise e
+        return files, dirs
+
+    def disk_usage(self, dbfs_path, parallelism=DEFAULT_PARALLELISM):
+        """
+        :return: dict that maps dbfs_path and the path of every directory below it, relative to
+        dbfs_path ('' for dbfs_path itself), to the total size in bytes of the files it contains.
+        """
+        usage = {'': 0}
+        for file_info in self.walk(dbfs_path, parallelism):
+            relpath = _relpath(file_info.dbfs_path, dbfs_path)
+            if file_info.is_dir:
+                usage.setdefault(relpath, 0)
+                continue
+            parts = relpath.split('/')
+            for i in range(len(parts)):
+                parent = '/'.join(parts[:i])
+                usage[parent] = usage.get(parent, 0) + file_info.file_size
+        return usage
+
+    def find(self, dbfs_path, name=None, min_size=None, parallelism=DEFAULT_PARALLELISM):
+        """
+        Lazily yields the FileInfo of the files and directories below dbfs_path whose basename
+        matches the glob name and, if min_size is set, the files of at least min_size bytes.
+        """
+        for file_info in self.walk(dbfs_path, parallelism):
+            if name is not None and not fnmatch.fnmatch(file_info.dbfs_path.basename, name):
+                continue
+            if min_size is not None and (file_info.is_dir or file_info.file_size < min_size):
+                continue
+            yield file_info
+
+    def _read_sync_manifest(self, manifest_path):
+        length = self.get_status(manifest_path).file_size
+        # DBFS rejects reads of more than BUFFER_SIZE_BYTES, so large manifests are read in ranges.
+        contents = b''.join(
+            self._read_range(manifest_path, offset, min(BUFFER_SIZE_BYTES, length - offset))
+            for offset in range(0, length, BUFFER_SIZE_BYTES)) or b'{}'
+        return json.loads(contents.decode('utf-8')).get('files', {})
+
+    def _write_sync_manifest(self, manifest_path, manifest):
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump({'files': manifest}, f, indent=2, sort_keys=True)
+            self.put_file(path, manifest_path, True)
+        finally:
+            os.remove(path)
+
+
+def _checkpoint_key(src, dst):
+    """
+    Identifies the transfer of src to dst in a CheckpointJournal. Each of src and dst is either a
+    DbfsPath or a local path.
+    """
+    def normalize(path):
+        return path.absolute_path if isinstance(path, DbfsPath) else os.path.abspath(path)
+    return '{} -> {}'.format(normalize(src), normalize(dst))
+
+
+def _is_copied(checkpoint, src, dst):
+    if checkpoint is not None and checkpoint.is_file_done(_checkpoint_key(src, dst)):
+        click.echo('{} -> {} was copied by an earlier attempt. Skip.'.format(src, dst))
+        return True
+    return False
+
+
+def _join_relpath(dbfs_path, relpath):
+    return dbfs_path.join(relpath) if relpath else dbfs_path
+
+
+def _relpath(dbfs_path, root):
+    """
+    :return: the '/' separated path of dbfs_path relative to its ancestor root.
+    """
+    prefix = root.absolute_path.rstrip('/') + '/'
+    return dbfs_path.absolute_path[len(prefix):].rstrip('/')
+
+
+def _is_ancestor(parent, child):
+    return parent != child and (parent == '' or child.startswith(parent + '/'))
+
+
+def _list_local_tree(src):
+    """
+    :return: dict that maps the '/' separated path of each file below src to a tuple of
+    (path, size, mtime).
+    """
+    files = {}
+    for dirpath, _, filenames in os.walk(src):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            relpath = os.path.relpath(path, src).replace(os.sep, '/')
+            files[relpath] = (path, stat.st_size, stat.st_mtime)
+    return files
+
+
+def _list_local_dirs(src):
+    dirs = set()
+    for dirpath, dirnames, _ in os.walk(src):
+        for dirname in dirnames:
+            dirs.add(os.path.relpath(os.path.join(dirpath, dirname), src).replace(os.sep, '/'))
+    return dirs
+
+
@@ -0,0 +1,122 @@
+# Databricks CLI
+# Copyright 2018 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import threading
+
+from databricks_cli.configure import provider
+
+CHECKPOINT_DIR_NAME = '.databricks_checkpoints'
+
+
+class CheckpointJournal(object):
+    """
+    An append-only journal of the work completed by a transfer, so that a restarted transfer can
+    skip it.
+
+    Each line of the journal is a JSON object that records either a completed file,
+    ``{"file": key}``, or a completed byte range of a download, ``{"range": key, "offset": offset,
+    "size": size}``, where size is the size of the whole file when the range was read. A line that
+    was only partially written when the process died is ignored.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._files = set()
+        self._ranges = {}
+        if os.path.exists(path):
+            self._load()
+        self._journal = open(path, 'a')
+
+    @classmethod
+    def for_transfer(cls, src, dst):
+        """
+        Opens the journal of the transfer of src to dst. The journal is kept under the home
+        directory of the user so that it survives the restart of a failed transfer.
+        """
+        checkpoint_dir = os.path.join(provider._home, CHECKPOINT_DIR_NAME)
+        if not os.path.isdir(checkpoint_dir):
+            os.makedirs(checkpoint_dir)
+        name = hashlib.sha1('{} -> {}'.format(src, dst).encode('utf-8')).hexdigest()
+        return cls(os.path.join(checkpoint_dir, name + '.journal'))
+
+    def _load(self):
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if 'file' in entry:
+                    self._files.add(entry['file'])
+                elif 'range' in entry:
+                    self._add_range(entry['range'], entry['offset'], entry['size'])
+
+    def _add_range(self, key, offset, size):
+        recorded_size, offsets = self._ranges.get(key, (size, set()))
+        if recorded_size != size:
+            # The file changed between two attempts. Its earlier ranges are stale.
+            offsets = set()
+        offsets.add(offset)
+        self._ranges[key] = (size, offsets)
+
+    def _append(self, entry):
+        with self._lock:
+            self._journal.write(json.dumps(entry) + '\n')
+            self._journal.flush()
+
+    def is_file_done(self, key):
+        return key in self._files
+
+    def file_done(self, key):
+        self._files.add(key)
+        self._append({'file': key})
+
+    def has_ranges(self, key):
+        return key in self._ranges
+
+    def completed_ranges(self, key, size):
+        """
+        :return: set of the offsets of the ranges of key already downloaded when the file had
+        this size.
+        """
+        with self._lock:
+            recorded_size, offsets = self._ranges.get(key, (size, set()))
+            return set(offsets) if recorded_size == size else set()
+
+    def range_done(self, key, offset, size):
+        with self._lock:
+            self._add_range(key, offset, size)
+        self._append({'range': key, 'offset': offset, 'size': size})
+
+    def close(self):
+        self._journal.close()
+
+    def remove(self):
+        """
+        Closes and deletes the journal once the transfer has completed.
+        """
+        self.close()
+        os.remove(self.path)
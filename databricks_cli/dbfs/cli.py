@@ -21,6 +21,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
 import click
 from tabulate import tabulate
 
@@ -28,23 +30,38 @@ from databricks_cli.utils import eat_exceptions, error_and_quit, CONTEXT_SETTING
 from databricks_cli.version import print_version_callback, version
 from databricks_cli.configure.cli import configure_cli
 from databricks_cli.configure.config import provide_api_client, profile_option, debug_option
-from databricks_cli.dbfs.api import DbfsApi
+from databricks_cli.dbfs.api import DbfsApi, UploadMode, DEFAULT_PARALLELISM, \
+    DEFAULT_PUT_THRESHOLD_BYTES
+from databricks_cli.dbfs.checkpoint import CheckpointJournal
 from databricks_cli.dbfs.dbfs_path import DbfsPath, DbfsPathClickType
 
 
+def _parallelism_option(f):
+    return click.option('--parallelism', '-p', default=DEFAULT_PARALLELISM, show_default=True,
+                        type=click.IntRange(min=1),
+                        help='Number of requests made concurrently, such as directory '
+                             'listings or file transfers.')(f)
+
+
 @click.command(context_settings=CONTEXT_SETTINGS)
 @click.option('--absolute', is_flag=True, default=False,
               help='Displays absolute paths.')
 @click.option('-l', is_flag=True, default=False,
               help='Displays full information including size and file type.')
+@click.option('--recursive', '-R', is_flag=True, default=False,
+              help='Lists the contents of the subdirectories as well.')
+@_parallelism_option
 @click.argument('dbfs_path', nargs=-1, type=DbfsPathClickType())
 @debug_option
 @profile_option
 @eat_exceptions
 @provide_api_client
-def ls_cli(api_client, l, absolute, dbfs_path): #  NOQA
+def ls_cli(api_client, l, absolute, recursive, parallelism, dbfs_path): #  NOQA
     """
     List files in DBFS.
+
+    With --recursive, the paths are displayed relative to the listed directory and are printed
+    as soon as their directory has been listed.
     """
     if len(dbfs_path) == 0:
         dbfs_path = DbfsPath('dbfs:/')
@@ -52,12 +69,63 @@ def ls_cli(api_client, l, absolute, dbfs_path): #  NOQA
         dbfs_path = dbfs_path[0]
     else:
         error_and_quit('ls can take a maximum of one path.')
+    if recursive:
+        for f in DbfsApi(api_client).walk(dbfs_path, parallelism):
+            row = f.to_row(is_long_form=l, is_absolute=absolute, relative_to=dbfs_path)
+            click.echo('\t'.join(str(column) for column in row))
+        return
     files = DbfsApi(api_client).list_files(dbfs_path)
     table = tabulate([f.to_row(is_long_form=l, is_absolute=absolute) for f in files],
                      tablefmt='plain')
     click.echo(table)
 
 
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option('--summarize', '-s', is_flag=True, default=False,
+              help='Only displays the total for dbfs_path.')
+@_parallelism_option
+@click.argument('dbfs_path', type=DbfsPathClickType())
+@debug_option
+@profile_option
+@eat_exceptions
+@provide_api_client
+def du_cli(api_client, summarize, parallelism, dbfs_path):
+    """
+    Display the total size in bytes of the files in DBFS directories.
+
+    The total of dbfs_path and of every directory below it is displayed.
+    """
+    usage = DbfsApi(api_client).disk_usage(dbfs_path, parallelism)
+    relpaths = [''] if summarize else sorted(usage)
+    rows = [(usage[relpath], dbfs_path.join(relpath).absolute_path if relpath
+             else dbfs_path.absolute_path) for relpath in relpaths]
+    click.echo(tabulate(rows, tablefmt='plain'))
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option('--name', default=None,
+              help='Only finds files and directories whose name matches this glob pattern.')
+@click.option('--min-size', default=None, type=click.IntRange(min=0),
+              help='Only finds files of at least this many bytes.')
+@click.option('-l', is_flag=True, default=False,
+              help='Displays full information including size and file type.')
+@_parallelism_option
+@click.argument('dbfs_path', type=DbfsPathClickType())
+@debug_option
+@profile_option
+@eat_exceptions
+@provide_api_client
+def find_cli(api_client, name, min_size, l, parallelism, dbfs_path): #  NOQA
+    """
+    Find files and directories below a DBFS directory.
+
+    The absolute paths of the matches are printed as soon as their directory has been listed.
+    """
+    for f in DbfsApi(api_client).find(dbfs_path, name, min_size, parallelism):
+        row = f.to_row(is_long_form=l, is_absolute=True)
+        click.echo('\t'.join(str(column) for column in row))
+
+
 @click.command(context_settings=CONTEXT_SETTINGS)
 @click.argument('dbfs_path', type=DbfsPathClickType())
 @debug_option
@@ -92,13 +160,24 @@ def rm_cli(api_client, recursive, dbfs_path):
 @click.command(context_settings=CONTEXT_SETTINGS)
 @click.option('--recursive', '-r', is_flag=True, default=False)
 @click.option('--overwrite', is_flag=True, default=False)
+@_parallelism_option
+@click.option('--put-threshold', default=DEFAULT_PUT_THRESHOLD_BYTES, show_default=True,
+              type=click.IntRange(min=0),
+              help='Files smaller than this many bytes are uploaded in a single request.')
+@click.option('--upload-mode', default=UploadMode.BLOCK, show_default=True,
+              type=click.Choice(UploadMode.ALL),
+              help='"multipart" streams files to DBFS without base64 encoding them.')
+@click.option('--resume', is_flag=True, default=False,
+              help='Record the progress of the copy and skip the work completed by an earlier '
+                   'interrupted copy of the same src and dst.')
 @click.argument('src')
 @click.argument('dst')
 @debug_option
 @profile_option
 @eat_exceptions
 @provide_api_client
-def cp_cli(api_client, recursive, overwrite, src, dst):
+def cp_cli(api_client, recursive, overwrite, parallelism, put_threshold, upload_mode, resume,
+           src, dst):
     """
     Copy files to and from DBFS.
 
@@ -113,9 +192,60 @@ def cp_cli(api_client, recursive, overwrite, src, dst):
     ``dbfs cp -r dbfs:/foo foo`` will create a directory foo and place the files ``dbfs:/foo/a`` at
     ``foo/a``. If ``foo/a`` already exists, the file will not be overriden unless the --overwrite
     flag is provided -- however, dbfs cp --recursive will continue to try and copy other files.
+
+    Recursive copies transfer up to --parallelism files at a time. A file that fails to copy is
+    reported and does not stop the copy of the remaining files. Large single files copied from
+    DBFS are downloaded with up to --parallelism concurrent ranged reads.
+
+    With --upload-mode multipart, files are streamed to DBFS in a single request without base64
+    encoding. Files the server does not accept this way are uploaded in blocks instead.
+
+    With --resume, the files copied and the ranges of the files downloaded are recorded in a
+    checkpoint journal under ~/.databricks_checkpoints. If the copy is interrupted, running the
+    same command again with --resume skips the completed files and continues partially
+    downloaded files where they stopped. The journal is deleted once the copy succeeds.
+    """
+    checkpoint = None
+    if resume:
+        checkpoint = CheckpointJournal.for_transfer(_normalize_path(src), _normalize_path(dst))
+    dbfs_api = DbfsApi(api_client, put_threshold, upload_mode)
+    dbfs_api.cp(recursive, overwrite, src, dst, parallelism, checkpoint)
+    if checkpoint is not None:
+        checkpoint.remove()
+
+
+def _normalize_path(path):
+    return path if DbfsPath.is_valid(path) else os.path.abspath(path)
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option('--delete', is_flag=True, default=False,
+              help='Delete files in DBFS that do not exist in the local directory.')
+@click.option('--checksum', is_flag=True, default=False,
+              help='Compare file contents by SHA-256 instead of modification times.')
+@_parallelism_option
+@click.argument('src', type=click.Path(exists=True, file_okay=False))
+@click.argument('dst', type=DbfsPathClickType())
+@debug_option
+@profile_option
+@eat_exceptions
+@provide_api_client
+def sync_cli(api_client, delete, checksum, parallelism, src, dst):
+    """
+    Sync a local directory to DBFS.
+
+    Only the files that are new or changed since the last sync are uploaded. A file is changed
+    if its size differs from the DBFS file, if the previous sync did not record it, or if its
+    modification time differs from the one recorded by the previous sync. With --checksum, files
+    whose modification time changed are only uploaded if their contents changed.
+
+    The state of the last sync is kept in a .dbfs_sync_manifest.json file at the root of the
+    DBFS directory. Up to --parallelism DBFS directories are listed, and local files uploaded,
+    concurrently.
     """
-    # Copy to DBFS in this case
-    DbfsApi(api_client).cp(recursive, overwrite, src, dst)
+    failures = DbfsApi(api_client).sync(src, dst, delete, checksum, parallelism)
+    if failures:
+        error_and_quit('{} file(s) failed to upload.'.format(len(failures)))
 
 
 @click.command(context_settings=CONTEXT_SETTINGS)
@@ -152,3 +282,6 @@ dbfs_group.add_command(mkdirs_cli, name='mkdirs')
 dbfs_group.add_command(rm_cli, name='rm')
 dbfs_group.add_command(cp_cli, name='cp')
 dbfs_group.add_command(mv_cli, name='mv')
+dbfs_group.add_command(sync_cli, name='sync')
+dbfs_group.add_command(du_cli, name='du')
+dbfs_group.add_command(find_cli, name='find')
@@ -20,33 +20,78 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import threading
+
 from databricks_cli.sdk import JobsService
 
 
 class JobsApi(object):
     def __init__(self, api_client):
         self.client = JobsService(api_client)
+        self._index_lock = threading.Lock()
+        self._jobs_by_name = None
+        self._job_names = None
+        self._stale_names = set()
 
     def create_job(self, json):
-        return self.client.client.perform_query('POST', '/jobs/create', data=json)
+        result = self.client.client.perform_query('POST', '/jobs/create', data=json)
+        self._invalidate_names(None, json.get('name'))
+        return result
 
     def list_jobs(self):
         return self.client.list_jobs()
 
     def delete_job(self, job_id):
-        return self.client.delete_job(job_id)
+        result = self.client.delete_job(job_id)
+        self._invalidate_names(job_id)
+        return result
 
     def get_job(self, job_id):
         return self.client.get_job(job_id)
 
     def reset_job(self, json):
-        return self.client.client.perform_query('POST', '/jobs/reset', data=json)
+        result = self.client.client.perform_query('POST', '/jobs/reset', data=json)
+        self._invalidate_names(json.get('job_id'), json.get('new_settings', {}).get('name'))
+        return result
 
     def run_now(self, job_id, jar_params, notebook_params, python_params, spark_submit_params):
         return self.client.run_now(job_id, jar_params, notebook_params, python_params,
                                    spark_submit_params)
 
-    def _list_jobs_by_name(self, name):
-        jobs = self.list_jobs()['jobs']
-        result = list(filter(lambda job: job['settings']['name'] == name, jobs))
-        return result
+    def get_jobs_by_name(self, name):
+        """
+        Returns the jobs named name, as listed by list_jobs.
+
+        The jobs are looked up in an index of the jobs by name, which is built from a single
+        list_jobs call the first time it is needed and then kept for the lifetime of this JobsApi.
+        The jobs created, reset or deleted through this JobsApi invalidate the names they
+        affect, and the index is built again the next time one of those names is looked up.
+        Changes made by other clients are not seen once the index is built.
+        """
+        with self._index_lock:
+            if self._jobs_by_name is None or name in self._stale_names:
+                self._build_index()
+            return list(self._jobs_by_name.get(name, []))
+
+    def _build_index(self):
+        jobs_by_name = {}
+        job_names = {}
+        for job in self.list_jobs().get('jobs', []):
+            job_name = job['settings']['name']
+            jobs_by_name.setdefault(job_name, []).append(job)
+            job_names[job['job_id']] = job_name
+        self._jobs_by_name = jobs_by_name
+        self._job_names = job_names
+        self._stale_names = set()
+
+    def _invalidate_names(self, job_id, new_name=None):
+        """
+        Marks the current name of job_id, if it is known, and new_name as stale in the index.
+        """
+        with self._index_lock:
+            if self._jobs_by_name is None:
+                return
+            if job_id in self._job_names:
+                self._stale_names.add(self._job_names[job_id])
+            if new_name is not None:
+                self._stale_names.add(new_name)
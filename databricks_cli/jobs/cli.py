@@ -29,7 +29,7 @@ from tabulate import tabulate
 from databricks_cli.click_types import OutputClickType, JsonClickType, JobIdClickType
 from databricks_cli.jobs.api import JobsApi
 from databricks_cli.utils import eat_exceptions, CONTEXT_SETTINGS, pretty_format, json_cli_base, \
-    truncate_string
+    truncate_string, error_and_quit
 from databricks_cli.configure.config import provide_api_client, profile_option, debug_option
 from databricks_cli.version import print_version_callback, version
 
@@ -141,16 +141,32 @@ def delete_cli(api_client, job_id):
 
 
 @click.command(context_settings=CONTEXT_SETTINGS)
-@click.option('--job-id', required=True, type=JobIdClickType(), help=JobIdClickType.help)
+@click.option('--job-id', default=None, type=JobIdClickType(), help=JobIdClickType.help)
+@click.option('--name', default=None,
+              help='Name of the job. Fails if no job or several jobs have this name.')
 @debug_option
 @profile_option
 @eat_exceptions
 @provide_api_client
-def get_cli(api_client, job_id):
+def get_cli(api_client, job_id, name):
     """
     Describes the metadata for a job.
+
+    The job is given either by its ID, with --job-id, or by its name, with --name.
     """
-    click.echo(pretty_format(JobsApi(api_client).get_job(job_id)))
+    if (job_id is None) == (name is None):
+        raise RuntimeError('Either --job-id or --name should be provided')
+    jobs_api = JobsApi(api_client)
+    if job_id is not None:
+        click.echo(pretty_format(jobs_api.get_job(job_id)))
+        return
+    jobs = jobs_api.get_jobs_by_name(name)
+    if not jobs:
+        error_and_quit('No job named {} was found.'.format(name))
+    if len(jobs) > 1:
+        error_and_quit('{} jobs are named {}, use --job-id with one of: {}'.format(
+            len(jobs), name, ', '.join(str(j['job_id']) for j in jobs)))
+    click.echo(pretty_format(jobs[0]))
 
 
 @click.command(context_settings=CONTEXT_SETTINGS)
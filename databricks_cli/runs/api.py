@@ -21,8 +21,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+
 from databricks_cli.sdk import JobsService
 
+MAX_RUNS_LIMIT = 1000
+
 
 class RunsApi(object):
     def __init__(self, api_client):
@@ -34,6 +38,45 @@ class RunsApi(object):
     def list_runs(self, job_id, active_only, completed_only, offset, limit):
         return self.client.list_runs(job_id, active_only, completed_only, offset, limit)
 
+    def iter_runs(self, job_id=None, active_only=None, completed_only=None, offset=None,
+                  page_size=MAX_RUNS_LIMIT, prefetch=False):
+        """
+        Lazily yields the runs listed by list_runs from offset on, requesting one page of
+        page_size runs at a time until the last one.
+
+        Only the current page, and with prefetch the next page, are held in memory. With
+        prefetch, the next page is requested in the background while the runs of the current page
+        are consumed.
+
+        Runs started while the runs are listed shift the later pages. The runs of a page that
+        were already yielded with the previous page are skipped.
+        """
+        offset = offset or 0
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+        def list_page(page_offset):
+            return self.list_runs(job_id, active_only, completed_only, page_offset, page_size)
+
+        try:
+            page = list_page(offset)
+            previous_run_ids = set()
+            while True:
+                runs = page.get('runs', [])
+                offset += len(runs)
+                has_more = page.get('has_more', False) and runs
+                if has_more and executor is not None:
+                    next_page = executor.submit(list_page, offset)
+                for run in runs:
+                    if run.get('run_id') not in previous_run_ids:
+                        yield run
+                if not has_more:
+                    return
+                previous_run_ids = set(run.get('run_id') for run in runs)
+                page = next_page.result() if executor is not None else list_page(offset)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
     def get_run(self, run_id):
         return self.client.get_run(run_id)
 
@@ -21,14 +21,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from json import dumps as json_dumps
+
 import click
 from tabulate import tabulate
 
-from databricks_cli.click_types import OutputClickType, JsonClickType, RunIdClickType
+from databricks_cli.click_types import OutputClickType, JsonClickType, RunIdClickType, \
+    StreamingOutputClickType
 from databricks_cli.utils import eat_exceptions, CONTEXT_SETTINGS, pretty_format, json_cli_base, \
     truncate_string
 from databricks_cli.configure.config import provide_api_client, profile_option, debug_option
-from databricks_cli.runs.api import RunsApi
+from databricks_cli.runs.api import RunsApi, MAX_RUNS_LIMIT
 from databricks_cli.version import print_version_callback, version
 
 
@@ -51,17 +54,17 @@ def submit_cli(api_client, json_file, json):
     json_cli_base(json_file, json, lambda json: RunsApi(api_client).submit_run(json))
 
 
+def _run_to_row(r):
+    run_id = r.get('run_id', 'no_run_id')
+    run_name = r.get('run_name', 'no_run_name')
+    life_cycle_state = r.get('state', {}).get('life_cycle_state', 'n/a')
+    result_state = r.get('state', {}).get('result_state', 'n/a')
+    run_page_url = r.get('run_page_url', 'n/a')
+    return (run_id, truncate_string(run_name), life_cycle_state, result_state, run_page_url)
+
+
 def _runs_to_table(runs_json):
-    ret = []
-    for r in runs_json.get('runs', []):
-        run_id = r.get('run_id', 'no_run_id')
-        run_name = r.get('run_name', 'no_run_name')
-        life_cycle_state = r.get('state', {}).get('life_cycle_state', 'n/a')
-        result_state = r.get('state', {}).get('result_state', 'n/a')
-        run_page_url = r.get('run_page_url', 'n/a')
-        row = (run_id, truncate_string(run_name), life_cycle_state, result_state, run_page_url)
-        ret.append(row)
-    return ret
+    return [_run_to_row(r) for r in runs_json.get('runs', [])]
 
 
 @click.command(context_settings=CONTEXT_SETTINGS)
@@ -75,19 +78,27 @@ def _runs_to_table(runs_json):
               help='The offset is relative to the most recent run ID. Set to 0 by default.')
 @click.option('--limit', default=None, type=int,
               help='The limit determines the number of runs listed. '
-                   'Limit must be between 0 and 1000. Set to 20 runs by default.')
-@click.option('--output', help=OutputClickType.help, type=OutputClickType())
+                   'Limit must be between 0 and 1000. Set to 20 runs by default. '
+                   'With --all, the number of runs requested per page, 1000 by default.')
+@click.option('--all', 'all_runs', is_flag=True, default=False,
+              help='List all the runs from the offset on, requesting them page by page.')
+@click.option('--output', help=StreamingOutputClickType.help, type=StreamingOutputClickType())
 @debug_option
 @profile_option
 @eat_exceptions # noqa
 @provide_api_client
-def list_cli(api_client, job_id, active_only, completed_only, offset, limit, output): # noqa
+def list_cli(api_client, job_id, active_only, completed_only, offset, limit, all_runs, # noqa
+             output):
     """
     Lists job runs.
 
     The limit and offset determine which runs will be listed. Runs are always listed
     by descending order of run start time and run ID.
 
+    With --all, every run from the offset on is listed. The runs are printed as the pages are
+    received, so listing all the runs of a job uses constant memory. Use the TABLE or NDJSON
+    output modes with --all.
+
     In the TABLE output mode, the columns are as follows.
 
       - Run ID
@@ -97,10 +108,27 @@ def list_cli(api_client, job_id, active_only, completed_only, offset, limit, out
       - Life cycle state
 
       - Result state (can be n/a)
+
+    In the NDJSON output mode, each run is printed as JSON on its own line.
     """
-    runs_json = RunsApi(api_client).list_runs(job_id, active_only, completed_only, offset, limit)
+    runs_api = RunsApi(api_client)
+    if all_runs:
+        if OutputClickType.is_json(output):
+            raise RuntimeError('--all supports the TABLE and NDJSON output modes')
+        runs = runs_api.iter_runs(job_id, active_only, completed_only, offset,
+                                  limit or MAX_RUNS_LIMIT, prefetch=True)
+        for run in runs:
+            if StreamingOutputClickType.is_ndjson(output):
+                click.echo(json_dumps(run))
+            else:
+                click.echo('\t'.join(str(c) for c in _run_to_row(run)))
+        return
+    runs_json = runs_api.list_runs(job_id, active_only, completed_only, offset, limit)
     if OutputClickType.is_json(output):
         click.echo(pretty_format(runs_json))
+    elif StreamingOutputClickType.is_ndjson(output):
+        for run in runs_json.get('runs', []):
+            click.echo(json_dumps(run))
     else:
         click.echo(tabulate(_runs_to_table(runs_json), tablefmt='plain'))
 
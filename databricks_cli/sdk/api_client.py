@@ -30,10 +30,16 @@ A common class to be used by client of different APIs
 
 import base64
 import json
+import random
+import threading
+import time
+import uuid
 import warnings
 import requests
 import ssl
 
+from email.utils import mktime_tz, parsedate_tz
+
 from . import version
 
 from requests.adapters import HTTPAdapter
@@ -54,38 +60,295 @@ class TlsV1HttpAdapter(HTTPAdapter):
     use SSL3 as a default (which is not supported by the server side).
     """
 
-    def init_poolmanager(self, connections, maxsize, block=False):
-        self.poolmanager = PoolManager(num_pools=connections, maxsize=maxsize, block=block, ssl_version=ssl.PROTOCOL_TLSv1_2)
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self.poolmanager = PoolManager(num_pools=connections, maxsize=maxsize, block=block, ssl_version=ssl.PROTOCOL_TLSv1_2, **pool_kwargs)
+
+class MultipartFileBody(object):
+    """
+    A multipart/form-data request body that streams a file instead of loading it in memory.
+
+    The body is made of the form fields, followed by the file read from file_obj in blocks as
+    the request is sent. Its length is known up front so the request is sent with a
+    Content-Length header rather than chunked.
+    """
+    BLOCK_SIZE = 2**16
+
+    def __init__(self, fields, file_field, file_obj, file_size):
+        self.boundary = uuid.uuid4().hex
+        preamble = b''
+        for name, value in fields.items():
+            preamble += ('--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n{}\r\n'
+                         .format(self.boundary, name, value)).encode('utf-8')
+        preamble += ('--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n'
+                     'Content-Type: application/octet-stream\r\n\r\n'
+                     .format(self.boundary, file_field, file_field)).encode('utf-8')
+        epilogue = '\r\n--{}--\r\n'.format(self.boundary).encode('utf-8')
+        self._length = len(preamble) + file_size + len(epilogue)
+        self._parts = [_BytesReader(preamble), file_obj, _BytesReader(epilogue)]
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary={}'.format(self.boundary)
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        chunks = []
+        while self._parts and size != 0:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b''.join(chunks)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.BLOCK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+class _BytesReader(object):
+    def __init__(self, data):
+        self._data = data
+        self._offset = 0
+
+    def read(self, size=-1):
+        end = len(self._data) if size < 0 else self._offset + size
+        chunk = self._data[self._offset:end]
+        self._offset += len(chunk)
+        return chunk
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed request is retried and how long to wait before retrying it.
+
+    The waits grow exponentially with the number of attempts and are randomized with full jitter
+    so that concurrent callers don't retry in lockstep. A Retry-After header sent by the server
+    takes precedence over the computed wait.
+
+    A request that the server rejected with one of the throttling statuses was not processed and
+    is always safe to send again. Other failures, such as a 500 or a dropped connection, may
+    happen after the server acted on the request, so they are only retried for GET requests and
+    for the POST endpoints in idempotent_posts, which have the same effect when sent twice.
+    """
+    THROTTLING_STATUSES = frozenset([429, 503])
+    SERVER_ERROR_STATUSES = frozenset([500, 502, 504])
+    IDEMPOTENT_POSTS = frozenset([
+        '/clusters/delete',
+        '/clusters/edit',
+        '/clusters/permanent-delete',
+        '/clusters/pin',
+        '/clusters/unpin',
+        '/dbfs/delete',
+        '/dbfs/mkdirs',
+        '/jobs/delete',
+        '/jobs/reset',
+        '/jobs/runs/cancel',
+        '/jobs/runs/delete',
+        '/workspace/delete',
+        '/workspace/mkdirs',
+    ])
+
+    def __init__(self, max_retries=6, backoff_factor=0.5, max_backoff=30,
+                 idempotent_posts=IDEMPOTENT_POSTS):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.idempotent_posts = idempotent_posts
+
+    def is_idempotent(self, method, path):
+        return method.upper() == 'GET' or path in self.idempotent_posts
+
+    def should_retry(self, attempt, method, path, status_code=None):
+        """
+        :param attempt: number of attempts already made, starting at 1.
+        :param status_code: status of the failed response, or None if no response was received.
+        """
+        if attempt > self.max_retries:
+            return False
+        if status_code in self.THROTTLING_STATUSES:
+            return True
+        if status_code is None or status_code in self.SERVER_ERROR_STATUSES:
+            return self.is_idempotent(method, path)
+        return False
+
+    def backoff(self, attempt, response=None):
+        """
+        :return: number of seconds to wait before the next attempt.
+        """
+        retry_after = _parse_retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+
+def _parse_retry_after(response):
+    """
+    :return: the number of seconds in the Retry-After header of response, which is either a
+    number of seconds or an HTTP date, or None if there is no valid header.
+    """
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, mktime_tz(date) - time.time())
+
+
+class TokenBucket(object):
+    """
+    A thread-safe token bucket that limits the rate of requests. Share one instance between
+    ApiClients, or one ApiClient between threads, to keep all of their requests together under
+    the rate limit of the workspace.
+
+    Tokens are added at rate per second, up to capacity. When the bucket is empty, acquire
+    reserves the next token and sleeps until it is added, so callers are served in order.
+
+    The rate adapts to throttling: every throttled response halves it, down to min_rate, and
+    every successful response raises it back towards the configured rate, by a twentieth of it.
+    The requests therefore settle just under the rate the server accepts.
+    """
+    def __init__(self, rate, capacity=None, min_rate=None):
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.min_rate = float(min_rate) if min_rate is not None else self.max_rate / 32
+        self.capacity = float(capacity) if capacity is not None else self.max_rate
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """
+        Takes the next token.
+
+        :return: number of seconds to wait before the token is available.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttled(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class _InsecureRequestWarningFilter(object):
+    """
+    Ignores InsecureRequestWarning while in this context, as warnings.catch_warnings does, but
+    from any number of threads at once. catch_warnings saves and restores the process-wide
+    filters, so overlapping uses from several threads would leave them in a wrong state. Here the
+    first thread to enter sets the filter and the last one to exit restores the filters.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._catch_warnings = None
+
+    def __enter__(self):
+        with self._lock:
+            if self._depth == 0:
+                self._catch_warnings = warnings.catch_warnings()
+                self._catch_warnings.__enter__()
+                warnings.simplefilter("ignore", exceptions.InsecureRequestWarning)
+            self._depth += 1
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self._depth -= 1
+            if self._depth == 0:
+                self._catch_warnings.__exit__(None, None, None)
+                self._catch_warnings = None
+
+
+_ignore_insecure_request_warning = _InsecureRequestWarningFilter()
+
+DOWNLOAD_BLOCK_SIZE = 2**16
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 32
+
+
+def build_default_headers(user, password, token, default_headers, command_name):
+    if user is not None and password is not None:
+        encoded_auth = (user + ":" + password).encode()
+        user_header_data = "Basic " + base64.standard_b64encode(encoded_auth).decode()
+        auth = {'Authorization': user_header_data, 'Content-Type': 'text/json'}
+    elif token is not None:
+        auth = {'Authorization': 'Bearer {}'.format(token), 'Content-Type': 'text/json'}
+    else:
+        auth = {}
+    user_agent = {'user-agent': 'databricks-cli-{v}-{c}'.format(v=databricks_cli_version,
+                                                                c=command_name)}
+    headers = {}
+    headers.update(auth)
+    headers.update(default_headers)
+    headers.update(user_agent)
+    return headers
+
 
 class ApiClient(object):
     """
     A partial Python implementation of dbc rest api
     to be used by different versions of the client.
+
+    An ApiClient is safe to share between threads. Its requests reuse up to pool_maxsize
+    connections per host, so pool_maxsize should be at least the number of threads that use the
+    client concurrently. Additional connections are opened when needed but are closed after
+    their request instead of being kept for reuse.
+
+    Failed queries are retried according to retry_policy, which defaults to a RetryPolicy.
+    Pass RetryPolicy(max_retries=0) to disable retries. If rate_limiter, a TokenBucket, is set,
+    every request waits for a token first.
     """
     def __init__(self, user=None, password=None, host=None, token=None,
-                 apiVersion=version.API_VERSION, default_headers={}, verify=True, command_name=""):
+                 apiVersion=version.API_VERSION, default_headers={}, verify=True, command_name="",
+                 retry_policy=None, rate_limiter=None, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE):
         if host[-1] == "/":
             host = host[:-1]
 
         self.session = requests.Session()
-        self.session.mount('https://', TlsV1HttpAdapter())
+        self.session.mount('https://', TlsV1HttpAdapter(pool_connections=pool_connections,
+                                                        pool_maxsize=pool_maxsize))
+        self.session.mount('http://', HTTPAdapter(pool_connections=pool_connections,
+                                                  pool_maxsize=pool_maxsize))
 
         self.url = "%s/api/%s" % (host, apiVersion)
-        if user is not None and password is not None:
-            encoded_auth = (user + ":" + password).encode()
-            user_header_data = "Basic " + base64.standard_b64encode(encoded_auth).decode()
-            auth = {'Authorization': user_header_data, 'Content-Type': 'text/json'}
-        elif token is not None:
-            auth = {'Authorization': 'Bearer {}'.format(token), 'Content-Type': 'text/json'}
-        else:
-            auth = {}
-        user_agent = {'user-agent': 'databricks-cli-{v}-{c}'.format(v=databricks_cli_version,
-                                                                    c=command_name)}
-        self.default_headers = {}
-        self.default_headers.update(auth)
-        self.default_headers.update(default_headers)
-        self.default_headers.update(user_agent)
+        self.default_headers = build_default_headers(user, password, token, default_headers,
+                                                     command_name)
         self.verify = verify
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
 
     def close(self):
         """Close the client"""
@@ -98,13 +361,80 @@ class ApiClient(object):
         if headers is None:
             headers = self.default_headers
 
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", exceptions.InsecureRequestWarning)
-            resp = self.session.request(method, self.url + path, data = json.dumps(data),
-                verify = self.verify, headers = headers)
-
+        resp = self._request_with_retries(method, path, json.dumps(data), headers)
         try:
             resp.raise_for_status()
         except requests.exceptions.HTTPError as e:
             raise e
         return resp.json()
+
+    def perform_download(self, path, data, file_obj, headers=None):
+        """
+        GET path and write the raw response body to file_obj as it is received, in blocks of
+        DOWNLOAD_BLOCK_SIZE bytes, so that the body is never held in memory as a whole.
+        """
+        if headers is None:
+            headers = self.default_headers
+
+        resp = self._request_with_retries('GET', path, json.dumps(data), headers, stream=True)
+        if not resp.ok:
+            # Reading the content keeps the error body available to the caller once the
+            # connection is released.
+            resp.content  # pylint: disable=pointless-statement
+            resp.raise_for_status()
+        try:
+            for block in resp.iter_content(DOWNLOAD_BLOCK_SIZE):
+                file_obj.write(block)
+        finally:
+            resp.close()
+
+    def _request_with_retries(self, method, path, data, headers, stream=False):
+        attempt = 1
+        while True:
+            try:
+                resp = self._request(method, path, data, headers, stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not self.retry_policy.should_retry(attempt, method, path):
+                    raise
+                time.sleep(self.retry_policy.backoff(attempt))
+            else:
+                if resp.ok or not self.retry_policy.should_retry(attempt, method, path,
+                                                                 resp.status_code):
+                    return resp
+                resp.close()
+                time.sleep(self.retry_policy.backoff(attempt, resp))
+            attempt += 1
+
+    def _request(self, method, path, data, headers, stream=False):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.verify:
+            resp = self.session.request(method, self.url + path, data = data,
+                verify = self.verify, headers = headers, stream = stream)
+        else:
+            # The warning is only ignored while the request is made, not for the whole process.
+            with _ignore_insecure_request_warning:
+                resp = self.session.request(method, self.url + path, data = data,
+                    verify = self.verify, headers = headers, stream = stream)
+        if self.rate_limiter is not None:
+            if resp.status_code in RetryPolicy.THROTTLING_STATUSES:
+                self.rate_limiter.throttled()
+            else:
+                self.rate_limiter.succeeded()
+        return resp
+
+    def perform_multipart_upload(self, path, fields, file_field, file_obj, file_size):
+        """
+        POST fields and the contents of file_obj as a multipart/form-data body.
+
+        The file is streamed from file_obj as the request is sent and is not base64 encoded.
+        """
+        body = MultipartFileBody(fields, file_field, file_obj, file_size)
+        headers = dict(self.default_headers)
+        headers['Content-Type'] = body.content_type
+
+        # The file can't be rewound in general, so the upload is not retried. DbfsApi falls back
+        # to the block protocol if it fails.
+        resp = self._request('POST', path, body, headers)
+        resp.raise_for_status()
+        return resp.json()
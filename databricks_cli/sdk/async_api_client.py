@@ -0,0 +1,139 @@
+# Databricks CLI
+# Copyright 2018 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+An asyncio counterpart of ApiClient, to be used with the services of async_service.
+
+Requires Python 3.5.3 or above and aiohttp, which are installed with the async extra:
+
+  pip install databricks-cli[async]
+"""
+
+import asyncio
+import json
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from . import version
+from .api_client import RetryPolicy, build_default_headers
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class AsyncApiClient(object):
+    """
+    An ApiClient whose perform_query is a coroutine, so that many queries can be in flight on one
+    event loop without a thread each.
+
+    perform_query has the same contract as ApiClient.perform_query: it returns the decoded JSON
+    response, retries according to retry_policy, waits for rate_limiter if set, and raises the
+    same requests exceptions. In particular an HTTPError carries a requests.Response, so code that
+    inspects the errors of ApiClient works unchanged.
+
+    At most max_connections requests are sent at once. Additional queries wait for a free
+    connection. The client must be closed with close(), or used as an async context manager.
+    """
+    def __init__(self, user=None, password=None, host=None, token=None,
+                 apiVersion=version.API_VERSION, default_headers={}, verify=True, command_name="",
+                 retry_policy=None, rate_limiter=None, max_connections=DEFAULT_MAX_CONNECTIONS):
+        if host[-1] == "/":
+            host = host[:-1]
+
+        self.url = "%s/api/%s" % (host, apiVersion)
+        self.default_headers = build_default_headers(user, password, token, default_headers,
+                                                     command_name)
+        self.verify = verify
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.max_connections = max_connections
+        self._session = None
+
+    @property
+    def session(self):
+        # Created on first use since an aiohttp session must be created in the event loop.
+        if self._session is None:
+            connector_kwargs = {} if self.verify else {'ssl': False}
+            connector = aiohttp.TCPConnector(limit=self.max_connections, **connector_kwargs)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close the client"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def perform_query(self, method, path, data={}, headers=None):
+        """set up connection and perform query"""
+        if headers is None:
+            headers = self.default_headers
+
+        attempt = 1
+        while True:
+            try:
+                resp = await self._request(method, path, json.dumps(data), headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not self.retry_policy.should_retry(attempt, method, path):
+                    raise requests.exceptions.ConnectionError(e) from e
+                await asyncio.sleep(self.retry_policy.backoff(attempt))
+            else:
+                if resp.ok or not self.retry_policy.should_retry(attempt, method, path,
+                                                                 resp.status_code):
+                    break
+                await asyncio.sleep(self.retry_policy.backoff(attempt, resp))
+            attempt += 1
+
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _request(self, method, path, data, headers):
+        """
+        :return: the response as a requests.Response.
+        """
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        url = self.url + path
+        async with self.session.request(method, url, data=data, headers=headers) as http_resp:
+            content = await http_resp.read()
+        resp = requests.Response()
+        resp.status_code = http_resp.status
+        resp.reason = http_resp.reason
+        resp.headers = CaseInsensitiveDict(http_resp.headers)
+        resp.url = url
+        resp._content = content
+        if self.rate_limiter is not None:
+            if resp.status_code in RetryPolicy.THROTTLING_STATUSES:
+                self.rate_limiter.throttled()
+            else:
+                self.rate_limiter.succeeded()
+        return resp
@@ -0,0 +1,67 @@
+# Databricks CLI
+# Copyright 2018 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Async variants of the services of databricks_cli.sdk.service, to be used with AsyncApiClient.
+
+The variants are generated from the service classes rather than written by hand, so they always
+send the same requests: every public method is wrapped in a coroutine function that awaits the
+query of AsyncApiClient.perform_query.
+
+  client = AsyncApiClient(host="https://dbc-12345678-9101.cloud.databricks.com", token=token)
+  jobs = AsyncJobsService(client)
+  runs = await asyncio.gather(*[jobs.get_run(run_id) for run_id in run_ids])
+  await client.close()
+"""
+
+import functools
+import inspect
+
+from . import service
+
+
+def _async_method(method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await method(self, *args, **kwargs)
+    return wrapper
+
+
+def async_service(service_class):
+    """
+    :return: a subclass of service_class whose public methods are coroutine functions.
+    """
+    methods = {name: _async_method(method) for name, method in vars(service_class).items()
+               if inspect.isfunction(method) and not name.startswith('_')}
+    methods['__doc__'] = 'Async variant of {}.'.format(service_class.__name__)
+    methods['__module__'] = __name__
+    return type('Async' + service_class.__name__, (service_class,), methods)
+
+
+AsyncJobsService = async_service(service.JobsService)
+AsyncClusterService = async_service(service.ClusterService)
+AsyncManagedLibraryService = async_service(service.ManagedLibraryService)
+AsyncDbfsService = async_service(service.DbfsService)
+AsyncWorkspaceService = async_service(service.WorkspaceService)
+AsyncSecretService = async_service(service.SecretService)
+AsyncGroupsService = async_service(service.GroupsService)
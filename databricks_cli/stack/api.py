@@ -23,19 +23,24 @@
 
 import os
 import json
+import hashlib
 from datetime import datetime
 import time
 import copy
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 import click
+from requests.exceptions import HTTPError
 
 from databricks_cli.jobs.api import JobsApi
 from databricks_cli.workspace.api import WorkspaceApi
 from databricks_cli.workspace.types import WorkspaceLanguage
 from databricks_cli.version import version as CLI_VERSION
 from databricks_cli.stack.exceptions import StackError
+from databricks_cli.utils import atomic_write, sha256_file
 
 MS_SEC = 1000
+DEFAULT_PARALLELISM = 8
 
 # Resource Services
 JOBS_SERVICE = 'jobs'
@@ -50,13 +55,24 @@ STACK_DEPLOYED = 'deployed'
 RESOURCE_ID = 'id'
 RESOURCE_SERVICE = 'service'
 RESOURCE_PROPERTIES = 'properties'
+RESOURCE_DEPENDS_ON = 'depends_on'
 
 # Deployed Resource Fields
 RESOURCE_PHYSICAL_ID = 'physical_id'
 RESOURCE_DEPLOY_OUTPUT = 'deploy_output'
 RESOURCE_DEPLOY_TIMESTAMP = 'timestamp'
+RESOURCE_FINGERPRINT = 'fingerprint'
 CLI_VERSION_KEY = 'cli_version'
 
+# Plan Actions
+PLAN_CREATE = 'create'
+PLAN_UPDATE = 'update'
+PLAN_NO_OP = 'no-op'
+
+# Planned Resource Fields
+PLAN_ACTION = 'action'
+PLAN_REASONS = 'reasons'
+
 
 class StackApi(object):
     def __init__(self, api_client):
@@ -73,22 +89,179 @@ class StackApi(object):
         so that paths within the stack configuration are relative to the directory of the
         JSON template instead of the directory where this function is called.
 
+        The status JSON is saved after each resource is deployed, so that if the deployment
+        fails, the next deployment knows about the resources already deployed and skips them.
+
         :param config_path: Path to stack JSON configuration template. Must have the fields of
         'name', the name of the stack and 'resources', a list of stack resources.
         :return: None.
         """
         stack_config = self._load_json(config_path)
-        status_path = self._generate_stack_status_path(config_path)
+        status_path = os.path.abspath(self._generate_stack_status_path(config_path))
         stack_status = self._load_json(status_path)
         config_dir = os.path.dirname(os.path.abspath(config_path))
         cli_dir = os.getcwd()
         os.chdir(config_dir)  # Switch current working directory to where json config is stored
-        new_stack_status = self.deploy_config(stack_config, stack_status, **kwargs)
-        os.chdir(cli_dir)
+        try:
+            new_stack_status = self.deploy_config(stack_config, stack_status, status_path,
+                                                  **kwargs)
+        finally:
+            os.chdir(cli_dir)
         click.echo("Saving stack status to {}".format(status_path))
         self._save_json(status_path, new_stack_status)
 
-    def deploy_config(self, stack_config, stack_status=None, **kwargs):
+    def plan(self, config_path, **kwargs):
+        """
+        Computes what deploy(config_path) would change, without changing anything.
+
+        The stack JSON configuration template and the status JSON are loaded as in deploy, and
+        paths within the stack configuration are relative to the directory of the JSON template.
+
+        :param config_path: Path to stack JSON configuration template.
+        :return: list of the planned resources, see plan_config.
+        """
+        stack_config = self._load_json(config_path)
+        status_path = self._generate_stack_status_path(config_path)
+        stack_status = self._load_json(status_path)
+        config_dir = os.path.dirname(os.path.abspath(config_path))
+        cli_dir = os.getcwd()
+        os.chdir(config_dir)
+        try:
+            return self.plan_config(stack_config, stack_status, **kwargs)
+        finally:
+            os.chdir(cli_dir)
+
+    def plan_config(self, stack_config, stack_status=None, **kwargs):
+        """
+        Computes what deploy_config would change for each resource of stack_config, by reading
+        the current state of the resources on databricks. Only read requests are made, up to
+        kwargs['parallelism'] of them concurrently.
+
+        :param stack_config: Must have the fields of
+        'name', the name of the stack and 'resources', a list of stack resources.
+        :param stack_status: The status JSON of the last deployment, if any.
+        :return: list of dicts, one for each resource in stack_config in the same order, with
+        the resource id, service and physical_id (None if the resource will be created), the
+        action, which is one of PLAN_CREATE, PLAN_UPDATE and PLAN_NO_OP, and a list of the
+        reasons for the action.
+        ex. {'id': 'example-resource', 'service': 'jobs', 'physical_id': {'job_id': 123},
+        'action': 'update', 'reasons': ["properties changed: 'max_retries'"]}
+        """
+        self._validate_config(stack_config)
+        if stack_status:
+            self._validate_status(stack_status)
+            resource_id_to_status = self._get_resource_to_status_map(stack_status)
+            resource_id_to_last_config = {
+                (resource.get(RESOURCE_ID), resource.get(RESOURCE_SERVICE)): resource
+                for resource in stack_status.get(STACK_RESOURCES)
+            }
+        else:
+            resource_id_to_status = {}
+            resource_id_to_last_config = {}
+
+        def plan_resource(resource_config):
+            resource_map_key = (resource_config.get(RESOURCE_ID),
+                                resource_config.get(RESOURCE_SERVICE))
+            return self._plan_resource(resource_config,
+                                       resource_id_to_status.get(resource_map_key),
+                                       resource_id_to_last_config.get(resource_map_key))
+
+        with ThreadPoolExecutor(max_workers=kwargs.get('parallelism', DEFAULT_PARALLELISM)) \
+                as executor:
+            return list(executor.map(plan_resource, stack_config.get(STACK_RESOURCES)))
+
+    def _checkpoint_status(self, stack_config, resource_id_to_new_status, resource_id_to_status):
+        """
+        Returns the stack status of a deployment in progress. It has, in the order of the
+        resources in stack_config, the new status of the resources deployed so far and the status
+        from the last deployment of the others, if any.
+        """
+        resource_statuses = []
+        for resource in stack_config.get(STACK_RESOURCES):
+            resource_id = resource.get(RESOURCE_ID)
+            resource_map_key = (resource_id, resource.get(RESOURCE_SERVICE))
+            if resource_id in resource_id_to_new_status:
+                resource_statuses.append(resource_id_to_new_status[resource_id])
+            elif resource_map_key in resource_id_to_status:
+                resource_statuses.append(resource_id_to_status[resource_map_key])
+        stack_status = copy.deepcopy(stack_config)
+        stack_status.update({STACK_DEPLOYED: resource_statuses})
+        stack_status.update({CLI_VERSION_KEY: CLI_VERSION})
+        return stack_status
+
+    def _plan_resource(self, resource_config, resource_status=None, last_resource_config=None):
+        """
+        Computes what _deploy_resource would do with a resource, see plan_config.
+
+        :param resource_config: A dict of the resource from the stack JSON configuration.
+        :param resource_status: A dict of the resource's deployment info from the last
+        deployment, or None.
+        :param last_resource_config: A dict of the resource from the stack JSON configuration
+        of the last deployment, or None.
+        :return: dict of the planned resource.
+        """
+        resource_id = resource_config.get(RESOURCE_ID)
+        resource_service = resource_config.get(RESOURCE_SERVICE)
+        resource_properties = resource_config.get(RESOURCE_PROPERTIES)
+        physical_id = resource_status.get(RESOURCE_PHYSICAL_ID) if resource_status else None
+        planned_resource = {RESOURCE_ID: resource_id,
+                            RESOURCE_SERVICE: resource_service,
+                            RESOURCE_PHYSICAL_ID: physical_id}
+
+        if resource_service not in (JOBS_SERVICE, WORKSPACE_SERVICE):
+            raise StackError("Resource service '{}' not supported".format(resource_service))
+
+        if not physical_id:
+            # Like the deployment, find an existing resource with the same job name or path.
+            if resource_service == JOBS_SERVICE:
+                if 'name' not in resource_properties:
+                    raise StackError("Please supply 'name' in job resource 'properties'")
+                job_name = resource_properties.get('name')
+                jobs_same_name = self.jobs_client.get_jobs_by_name(job_name)
+                if len(jobs_same_name) > 1:
+                    raise StackError("Multiple jobs with the same name '{}' already exist, "
+                                     "deployment would abort".format(job_name))
+                if jobs_same_name:
+                    physical_id = {'job_id': jobs_same_name[0].get('job_id')}
+                    reason = "job with the same name '{}' exists".format(job_name)
+            else:
+                workspace_path = resource_properties.get('path')
+                if self._get_remote_state(resource_service, {'path': workspace_path}):
+                    physical_id = {'path': workspace_path}
+                    reason = "workspace path {} exists".format(workspace_path)
+            if physical_id:
+                planned_resource.update({RESOURCE_PHYSICAL_ID: physical_id,
+                                         PLAN_ACTION: PLAN_UPDATE,
+                                         PLAN_REASONS: [reason]})
+            else:
+                planned_resource.update({PLAN_ACTION: PLAN_CREATE,
+                                         PLAN_REASONS: ['not deployed yet']})
+            return planned_resource
+
+        reasons = []
+        if resource_status.get(RESOURCE_FINGERPRINT) is None:
+            reasons.append('deployed without a fingerprint')
+        elif resource_status.get(RESOURCE_FINGERPRINT) != self._get_fingerprint(resource_config):
+            last_properties = last_resource_config.get(RESOURCE_PROPERTIES, {}) \
+                if last_resource_config else {}
+            changed_properties = sorted(
+                key for key in set(resource_properties) | set(last_properties)
+                if resource_properties.get(key) != last_properties.get(key))
+            if changed_properties:
+                reasons.append('properties changed: {}'.format(
+                    ', '.join("'{}'".format(key) for key in changed_properties)))
+            else:
+                reasons.append('source files changed')
+        remote_state = self._get_remote_state(resource_service, physical_id)
+        if remote_state is None:
+            reasons.append('not found on databricks')
+        elif not self._is_remote_unchanged(resource_status, remote_state):
+            reasons.append('changed on databricks')
+        planned_resource.update({PLAN_ACTION: PLAN_UPDATE if reasons else PLAN_NO_OP,
+                                 PLAN_REASONS: reasons})
+        return planned_resource
+
+    def deploy_config(self, stack_config, stack_status=None, status_path=None, **kwargs):
         """
         Deploys a stack given stack JSON configuration template at path config_path.
 
@@ -97,9 +270,21 @@ class StackApi(object):
         For each resource deployment, stack_status is used to get the associated resource status
         of a resource from the last deployment.
 
+        A resource is deployed once all of the resources listed in its optional 'depends_on'
+        field have been deployed. Resources that don't depend on each other are deployed
+        concurrently, by up to kwargs['parallelism'] workers. If a resource fails to deploy, no
+        other resource is started, the resources already being deployed are finished and the
+        error is raised.
+
+        Once all the resources are deployed, their deploy outputs are read in a single pass, see
+        _fetch_deploy_outputs, unless kwargs['skip_deploy_output'] is set.
+
         :param stack_config: Must have the fields of
         'name', the name of the stack and 'resources', a list of stack resources.
         :param stack_status: Must have the fields of
+        :param status_path: If given, a stack status is saved at this path after each resource is
+        deployed. It has the new status of the resources deployed so far and the status in
+        stack_status of the others.
         :return:
         """
         self._validate_config(stack_config)
@@ -112,21 +297,63 @@ class StackApi(object):
         stack_name = stack_config.get(STACK_NAME)
         click.echo('Deploying stack {}'.format(stack_name))
 
-        # List of statuses, One for each resource in stack_config[STACK_RESOURCES]
-        resource_statuses = []
+        resources = stack_config.get(STACK_RESOURCES)
+        dependencies = self._get_dependencies(resources)
+        dependents = {resource.get(RESOURCE_ID): [] for resource in resources}
+        for resource_id, resource_dependencies in dependencies.items():
+            for dependency in resource_dependencies:
+                dependents[dependency].append(resource_id)
+        resource_id_to_config = {resource.get(RESOURCE_ID): resource for resource in resources}
+        waiting_on = {resource_id: len(resource_dependencies)
+                      for resource_id, resource_dependencies in dependencies.items()}
+        ready = [resource.get(RESOURCE_ID) for resource in resources
+                 if not waiting_on[resource.get(RESOURCE_ID)]]
+
+        # Resource statuses by resource id, one for each resource in stack_config[STACK_RESOURCES]
+        resource_id_to_new_status = {}
+        failed = []
         click.echo('#' * 80)
-        for resource_config in stack_config.get(STACK_RESOURCES):
-            # Retrieve resource deployment info from the last deployment.
-            resource_map_key = (resource_config.get(RESOURCE_ID),
-                                resource_config.get(RESOURCE_SERVICE))
-            resource_status = resource_id_to_status.get(resource_map_key) \
-                if resource_map_key in resource_id_to_status else None
-            # Deploy resource, get resource_status
-            new_resource_status = self._deploy_resource(resource_config, resource_status, **kwargs)
-            resource_statuses.append(new_resource_status)
-            click.echo('#' * 80)
-
-        # stack deploy status is original config with deployed resource statuses added
+        with ThreadPoolExecutor(max_workers=kwargs.get('parallelism', DEFAULT_PARALLELISM)) \
+                as executor:
+            pending = {}
+            while True:
+                while ready and not failed:
+                    resource_config = resource_id_to_config[ready.pop(0)]
+                    # Retrieve resource deployment info from the last deployment.
+                    resource_map_key = (resource_config.get(RESOURCE_ID),
+                                        resource_config.get(RESOURCE_SERVICE))
+                    resource_status = resource_id_to_status.get(resource_map_key)
+                    future = executor.submit(self._deploy_resource, resource_config,
+                                             resource_status, **kwargs)
+                    pending[future] = resource_config.get(RESOURCE_ID)
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    resource_id = pending.pop(future)
+                    if future.exception() is not None:
+                        failed.append(future)
+                        continue
+                    resource_id_to_new_status[resource_id] = future.result()
+                    if status_path is not None:
+                        self._save_json(status_path, self._checkpoint_status(
+                            stack_config, resource_id_to_new_status, resource_id_to_status))
+                    click.echo('#' * 80)
+                    for dependent in dependents[resource_id]:
+                        waiting_on[dependent] -= 1
+                        if not waiting_on[dependent]:
+                            ready.append(dependent)
+        if failed:
+            # Raises the error of the first resource that failed to deploy.
+            failed[0].result()
+
+        # stack deploy status is original config with deployed resource statuses added, in the
+        # order of the resources in the config.
+        resource_statuses = [resource_id_to_new_status[resource.get(RESOURCE_ID)]
+                             for resource in resources]
+        if not kwargs.get('skip_deploy_output', False):
+            self._fetch_deploy_outputs(resource_statuses,
+                                       kwargs.get('parallelism', DEFAULT_PARALLELISM))
         new_stack_status = copy.deepcopy(stack_config)
         new_stack_status.update({STACK_DEPLOYED: resource_statuses})
         new_stack_status.update({CLI_VERSION_KEY: CLI_VERSION})
@@ -141,6 +368,14 @@ class StackApi(object):
         Deploys a resource given a resource information extracted from the stack JSON configuration
         template.
 
+        The resource is skipped when its fingerprint is the same as at the last deployment and its
+        state on databricks is still the deploy output of the last deployment, or if no deploy
+        output was recorded, when it still exists. Its status from the last deployment is then
+        returned as is.
+
+        The status of a deployed resource has no deploy output. deploy_config adds it once all
+        resources are deployed.
+
         :param resource_config: A dict of the resource with fields of RESOURCE_ID, RESOURCE_SERVICE
         and RESOURCE_PROPERTIES.
         ex. {'id': 'example-resource', 'service': 'jobs', 'properties': {...}}
@@ -149,20 +384,28 @@ class StackApi(object):
         ex. {'id': 'example-resource', 'service': 'jobs', 'physical_id': {...}}
         :return: dict resource_status- A dictionary of deployment information of the
         resource to be stored at deploy time. It includes the resource id of the resource along
-        with the physical id and deploy output of the resource.
+        with the physical id of the resource.
         ex. {'id': 'example-resource', 'service': 'jobs', 'physical_id': {'job_id': 123},
-        'timestamp': 123456789, 'deploy_output': {..}}
+        'timestamp': 123456789, 'fingerprint': '3f2a...'}
         """
         resource_id = resource_config.get(RESOURCE_ID)
         resource_service = resource_config.get(RESOURCE_SERVICE)
         resource_properties = resource_config.get(RESOURCE_PROPERTIES)
         physical_id = resource_status.get(RESOURCE_PHYSICAL_ID) if resource_status else None
 
+        fingerprint = self._get_fingerprint(resource_config)
+        if physical_id and resource_status.get(RESOURCE_FINGERPRINT) == fingerprint:
+            remote_state = self._get_remote_state(resource_service, physical_id)
+            if remote_state is not None and \
+                    self._is_remote_unchanged(resource_status, remote_state):
+                click.echo("Resource '{}' unchanged since the last deployment, skipping".format(
+                    resource_id))
+                return copy.deepcopy(resource_status)
+
         if resource_service == JOBS_SERVICE:
             click.echo("Deploying job '{}' with properties: \n{}".format(resource_id, json.dumps(
                 resource_properties, indent=2, separators=(',', ': '))))
-            new_physical_id, deploy_output = self._deploy_job(resource_properties,
-                                                              physical_id)
+            new_physical_id = self._deploy_job(resource_properties, physical_id)
         elif resource_service == WORKSPACE_SERVICE:
             click.echo(
                 "Deploying workspace asset '{}' with properties \n{}"
@@ -171,9 +414,7 @@ class StackApi(object):
                 )
             )
             overwrite = kwargs.get('overwrite_notebooks', False)
-            new_physical_id, deploy_output = self._deploy_workspace(resource_properties,
-                                                                    physical_id,
-                                                                    overwrite)
+            new_physical_id = self._deploy_workspace(resource_properties, physical_id, overwrite)
         else:
             raise StackError("Resource service '{}' not supported".format(resource_service))
 
@@ -183,9 +424,106 @@ class StackApi(object):
                                    # Milliseconds since epoch.
                                    int(time.mktime(datetime.now().timetuple()) * MS_SEC),
                                RESOURCE_PHYSICAL_ID: new_physical_id,
-                               RESOURCE_DEPLOY_OUTPUT: deploy_output}
+                               RESOURCE_FINGERPRINT: fingerprint}
         return new_resource_status
 
+    def _fetch_deploy_outputs(self, resource_statuses, parallelism=DEFAULT_PARALLELISM):
+        """
+        Adds the deploy output, the state of the resource on databricks, to the resource statuses
+        that don't have one yet.
+
+        The jobs are all read with a single list_jobs request and the workspace assets are read
+        with up to parallelism concurrent get_status requests. A job missing from the list gets
+        a deploy output of None.
+
+        :param resource_statuses: list of resource statuses, updated in place.
+        """
+        statuses = [resource_status for resource_status in resource_statuses
+                    if RESOURCE_DEPLOY_OUTPUT not in resource_status]
+        job_statuses = [resource_status for resource_status in statuses
+                        if resource_status.get(RESOURCE_SERVICE) == JOBS_SERVICE]
+        workspace_statuses = [resource_status for resource_status in statuses
+                              if resource_status.get(RESOURCE_SERVICE) == WORKSPACE_SERVICE]
+        if job_statuses:
+            jobs = {job.get('job_id'): job for job in self.jobs_client.list_jobs().get('jobs', [])}
+            for resource_status in job_statuses:
+                job_id = resource_status.get(RESOURCE_PHYSICAL_ID).get('job_id')
+                resource_status[RESOURCE_DEPLOY_OUTPUT] = jobs.get(job_id)
+        if workspace_statuses:
+            with ThreadPoolExecutor(max_workers=parallelism) as executor:
+                deploy_outputs = executor.map(
+                    lambda resource_status: self.workspace_client.client.get_status(
+                        resource_status.get(RESOURCE_PHYSICAL_ID).get('path')),
+                    workspace_statuses)
+                for resource_status, deploy_output in zip(workspace_statuses, deploy_outputs):
+                    resource_status[RESOURCE_DEPLOY_OUTPUT] = deploy_output
+
+    def _is_remote_unchanged(self, resource_status, remote_state):
+        """
+        Whether remote_state, the current state of a resource on databricks, is the deploy output
+        recorded in its resource_status. Any state matches when no deploy output was recorded.
+
+        The deploy output of a job comes from the list of jobs while its current state comes from
+        get_job, which returns more fields, so only the job id and settings of jobs are compared.
+        """
+        deploy_output = resource_status.get(RESOURCE_DEPLOY_OUTPUT)
+        if deploy_output is None:
+            return True
+        if resource_status.get(RESOURCE_SERVICE) == JOBS_SERVICE:
+            return all(remote_state.get(key) == deploy_output.get(key)
+                       for key in ('job_id', 'settings'))
+        return remote_state == deploy_output
+
+    def _get_fingerprint(self, resource_config):
+        """
+        Returns a hash of everything a resource is deployed from: its service and properties and,
+        for a workspace resource, the contents of the local files at its 'source_path'. Hidden
+        files are left out of the hash of a directory, as they are not imported.
+
+        :param resource_config: A dict of the resource with fields of RESOURCE_ID,
+        RESOURCE_SERVICE and RESOURCE_PROPERTIES.
+        :return: str- hex digest of the hash.
+        """
+        resource_service = resource_config.get(RESOURCE_SERVICE)
+        resource_properties = resource_config.get(RESOURCE_PROPERTIES)
+        sha256 = hashlib.sha256()
+        sha256.update(json.dumps([resource_service, resource_properties],
+                                 sort_keys=True).encode('utf-8'))
+        local_path = resource_properties.get('source_path') \
+            if resource_service == WORKSPACE_SERVICE else None
+        if not local_path or not os.path.exists(local_path):
+            return sha256.hexdigest()
+        if os.path.isdir(local_path):
+            files = []
+            for dir_path, dir_names, file_names in os.walk(local_path):
+                dir_names[:] = [d for d in dir_names if not d.startswith('.')]
+                files.extend(os.path.join(dir_path, f) for f in file_names
+                             if not f.startswith('.'))
+        else:
+            files = [local_path]
+        for file_path in sorted(files):
+            sha256.update(os.path.relpath(file_path, local_path).encode('utf-8') + b'\0')
+            sha256_file(file_path, sha256)
+            sha256.update(b'\0')
+        return sha256.hexdigest()
+
+    def _get_remote_state(self, resource_service, physical_id):
+        """
+        Reads the current state of a deployed resource on databricks, in the same form as the
+        deploy_output stored at deploy time.
+
+        :return: dict- the state, or None if it can't be read, for instance because the resource
+        has been deleted.
+        """
+        try:
+            if resource_service == JOBS_SERVICE:
+                return self.jobs_client.get_job(physical_id.get('job_id'))
+            elif resource_service == WORKSPACE_SERVICE:
+                return self.workspace_client.client.get_status(physical_id.get('path'))
+        except HTTPError:
+            return None
+        return None
+
     def _deploy_job(self, resource_properties, physical_id=None):
         """
         Deploys a job resource by either creating a job if the job isn't kept track of through
@@ -196,9 +534,8 @@ class StackApi(object):
         :param physical_id: A dict object containing 'job_id' field of job identifier in Databricks
         server
 
-        :return: tuple of (physical_id, deploy_output), where physical_id contains a 'job_id' field
-        of the physical job_id of the job on databricks. deploy_output is the output of the job
-        from databricks when a GET request is called for it.
+        :return: physical_id, which contains a 'job_id' field of the physical job_id of the job on
+        databricks.
         """
         job_settings = resource_properties  # resource_properties of jobs are solely job settings.
 
@@ -208,9 +545,7 @@ class StackApi(object):
         else:
             job_id = self._put_job(job_settings)
         click.echo("Job deployed on Databricks with Job ID {}".format(job_id))
-        physical_id = {'job_id': job_id}
-        deploy_output = self.jobs_client.get_job(job_id)
-        return physical_id, deploy_output
+        return {'job_id': job_id}
 
     def _put_job(self, job_settings):
         """
@@ -225,7 +560,7 @@ class StackApi(object):
         if 'name' not in job_settings:
             raise StackError("Please supply 'name' in job resource 'properties'")
         job_name = job_settings.get('name')
-        jobs_same_name = self.jobs_client._list_jobs_by_name(job_name)
+        jobs_same_name = self.jobs_client.get_jobs_by_name(job_name)
         if len(jobs_same_name) > 1:
             raise StackError("Multiple jobs with the same name '{}' already exist, aborting"
                              " stack deployment".format(job_name))
@@ -263,10 +598,8 @@ class StackApi(object):
         :param physical_id: dict containing physical identifier of workspace asset on databricks.
         Should contain the field 'path'.
         :param overwrite: Whether or not to overwrite the contents of workspace notebooks.
-        :return: (dict, dict) of (physical_id, deploy_output). physical_id is the physical ID for
-        the stack status that contains the workspace path of the notebook or directory on datbricks.
-        deploy_output is the initial information about the asset on databricks at deploy time
-        returned by the REST API.
+        :return: dict physical_id, the physical ID for the stack status that contains the workspace
+        path of the notebook or directory on datbricks.
         """
         # Required fields. TODO(alinxie) put in _validate_config
         local_path = resource_properties.get('source_path')
@@ -293,8 +626,12 @@ class StackApi(object):
             self.workspace_client.import_workspace(local_path, workspace_path, language, fmt,
                                                    overwrite)
         elif object_type == 'DIRECTORY':
-            self.workspace_client.import_workspace_dir(local_path, workspace_path, overwrite,
-                                                       exclude_hidden_files=True)
+            failures = self.workspace_client.import_workspace_dir(local_path, workspace_path,
+                                                                  overwrite,
+                                                                  exclude_hidden_files=True)
+            if failures:
+                raise StackError("{} notebook(s) failed to import from {}".format(len(failures),
+                                                                                 local_path))
         else:
             # Shouldn't reach here because of verification of object_type above.
             assert False
@@ -303,10 +640,7 @@ class StackApi(object):
             # physical_id['path'] is the workspace path from the last deployment. Alert when changed
             click.echo("Workspace asset had path changed from {} to {}".format(physical_id['path'],
                                                                                workspace_path))
-        new_physical_id = {'path': workspace_path}
-        deploy_output = self.workspace_client.client.get_status(workspace_path)
-
-        return new_physical_id, deploy_output
+        return {'path': workspace_path}
 
     def _validate_config(self, stack_config):
         """
@@ -335,6 +669,52 @@ class StackApi(object):
                 raise StackError("Duplicate resource ID '{}' found, please resolve.".format(
                     resource_id))
             seen_resource_ids.add(resource_id)
+        # Raises on dependencies that are unknown or that form a cycle.
+        self._get_dependencies(stack_config.get(STACK_RESOURCES))
+
+    def _get_dependencies(self, resources):
+        """
+        Returns a dictionary that maps the id of each resource to the set of ids of the resources
+        in its 'depends_on' field.
+
+        :param resources: list of resource configs, with unique resource ids.
+        :return: dict. Raises a StackError if a resource depends on a resource that doesn't exist
+        in the stack or if the dependencies form a cycle.
+        """
+        dependencies = {}
+        for resource in resources:
+            resource_id = resource.get(RESOURCE_ID)
+            depends_on = resource.get(RESOURCE_DEPENDS_ON, [])
+            if not isinstance(depends_on, list):
+                raise StackError("'{}' of resource '{}' must be a list of resource ID's".format(
+                    RESOURCE_DEPENDS_ON, resource_id))
+            dependencies[resource_id] = set(depends_on)
+        for resource_id, resource_dependencies in dependencies.items():
+            for dependency in resource_dependencies:
+                if dependency not in dependencies:
+                    raise StackError("Resource '{}' depends on resource '{}' which doesn't exist "
+                                     "in the stack".format(resource_id, dependency))
+
+        # Depth first search, where a resource that is reached again while its own dependencies
+        # are still being visited closes a cycle.
+        visiting, visited = [], set()
+
+        def visit(resource_id):
+            if resource_id in visited:
+                return
+            if resource_id in visiting:
+                cycle = visiting[visiting.index(resource_id):] + [resource_id]
+                raise StackError("Resource dependencies form a cycle: {}".format(
+                    ' -> '.join("'{}'".format(r) for r in cycle)))
+            visiting.append(resource_id)
+            for dependency in sorted(dependencies[resource_id]):
+                visit(dependency)
+            visiting.pop()
+            visited.add(resource_id)
+
+        for resource in resources:
+            visit(resource.get(RESOURCE_ID))
+        return dependencies
 
     def _validate_status(self, stack_status):
         """
@@ -412,9 +792,12 @@ class StackApi(object):
         """
         Writes data to a JSON file.
 
+        The data is first written to a temporary file in the same directory, which then
+        replaces the JSON file, so that the JSON file is never left partially written.
+
         :param path: Path of JSON file.
         :param data: dict- data that wants to by written to JSON file
         :return: None
         """
-        with open(path, 'w') as f:
+        with atomic_write(path) as f:
             json.dump(data, f, indent=2, sort_keys=True)
@@ -22,11 +22,14 @@
 # limitations under the License.
 
 import click
+from tabulate import tabulate
 
-from databricks_cli.utils import eat_exceptions, CONTEXT_SETTINGS
+from databricks_cli.click_types import OutputClickType
+from databricks_cli.utils import eat_exceptions, CONTEXT_SETTINGS, pretty_format
 from databricks_cli.version import print_version_callback, version
 from databricks_cli.configure.config import provide_api_client, profile_option, debug_option
-from databricks_cli.stack.api import StackApi
+from databricks_cli.stack.api import StackApi, DEFAULT_PARALLELISM, RESOURCE_ID, \
+    RESOURCE_SERVICE, PLAN_ACTION, PLAN_REASONS, PLAN_CREATE, PLAN_UPDATE, PLAN_NO_OP
 
 DEBUG_MODE = True
 
@@ -36,20 +39,53 @@ DEBUG_MODE = True
 @click.argument('config_path', type=click.Path(exists=True), required=True)
 @click.option('--overwrite-notebooks', '-o', is_flag=True, default=False, show_default=True,
               help='Include to overwrite existing notebooks in the workspace.')
+@click.option('--parallelism', '-p', type=click.IntRange(min=1), default=DEFAULT_PARALLELISM,
+              show_default=True,
+              help='Number of resources deployed concurrently. A resource is only deployed '
+                   'after the resources in its depends_on field.')
+@click.option('--skip-deploy-output', is_flag=True, default=False,
+              help='Do not record the state of the deployed resources in the stack status. This '
+                   'saves the requests that read it, but later deployments then only skip '
+                   'unchanged resources that still exist, even if they were edited on Databricks.')
+@click.option('--plan', is_flag=True, default=False,
+              help='Only print what the deployment would create or update, without changing '
+                   'anything.')
+@click.option('--output', default=None, help='With --plan, ' + OutputClickType.help,
+              type=OutputClickType())
 @debug_option
 @profile_option
 @eat_exceptions
 @provide_api_client
-def deploy(api_client, config_path, **kwargs):
+def deploy(api_client, config_path, plan, output, **kwargs):
     """
     Deploy a stack to the databricks workspace given a JSON stack configuration template.
+
+    With --plan, the current state of the resources is read from the workspace and the action
+    the deployment would take for each resource is printed: create, update or no-op.
     """
+    if plan:
+        planned_resources = StackApi(api_client).plan(config_path, **kwargs)
+        if OutputClickType.is_json(output):
+            click.echo(pretty_format(planned_resources))
+        else:
+            _print_plan(planned_resources)
+        return
     click.echo('#' * 80)
     click.echo('Deploying stack at: {} with options: {}'.format(config_path, kwargs))
     StackApi(api_client).deploy(config_path, **kwargs)
     click.echo('#' * 80)
 
 
+def _print_plan(planned_resources):
+    rows = [(r[PLAN_ACTION], r[RESOURCE_SERVICE], r[RESOURCE_ID], '; '.join(r[PLAN_REASONS]))
+            for r in planned_resources]
+    if rows:
+        click.echo(tabulate(rows, tablefmt='plain'))
+    actions = [r[PLAN_ACTION] for r in planned_resources]
+    click.echo('{} to create, {} to update, {} unchanged.'.format(
+        actions.count(PLAN_CREATE), actions.count(PLAN_UPDATE), actions.count(PLAN_NO_OP)))
+
+
 @click.group(context_settings=CONTEXT_SETTINGS,
              short_help='Utility to deploy and download Databricks resource stacks.')
 @click.option('--version', '-v', is_flag=True, callback=print_version_callback,
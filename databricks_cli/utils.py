@@ -21,8 +21,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import os
+import stat
 import sys
+import tempfile
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from json import dumps as json_dumps, loads as json_loads
 
 import click
@@ -34,6 +40,7 @@ from databricks_cli.click_types import ContextObject
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 DEBUG_MODE = False
+HASH_BLOCK_SIZE_BYTES = 2**20
 
 
 def eat_exceptions(function):
@@ -81,6 +88,113 @@ def json_cli_base(json_file, json, api):
     click.echo(pretty_format(res))
 
 
+class TransferFailure(object):
+    """
+    Records a single file of a multi-file transfer that could not be copied.
+    """
+    def __init__(self, src, dst, exception):
+        self.src = src
+        self.dst = dst
+        self.exception = exception
+
+    def __repr__(self):
+        return '{} -> {}: {}'.format(self.src, self.dst, self.exception)
+
+
+def walk_concurrently(root, list_fn, is_dir, path_fn, parallelism):
+    """
+    Lazily yields every entry of the tree below root, where list_fn(path) returns the entries of
+    the directory at path, is_dir(entry) tells whether an entry is a directory and path_fn(entry)
+    returns the path of an entry.
+
+    Directories are listed breadth first, with up to parallelism listings in flight. The
+    entries of a directory are yielded as soon as its listing completes, so a directory is
+    always yielded before its contents but siblings may be yielded in any order.
+    """
+    executor = ThreadPoolExecutor(max_workers=parallelism)
+    pending = {executor.submit(list_fn, root)}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for entry in future.result():
+                    if is_dir(entry):
+                        pending.add(executor.submit(list_fn, path_fn(entry)))
+                    yield entry
+    finally:
+        # Don't wait for the listings nobody will consume if the caller stopped early.
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def make_local_dir(path, remote_path):
+    """
+    Creates the local directory path, the copy of the directory remote_path, if it doesn't exist.
+
+    :return: False if path exists as a file, in which case the subtree of remote_path is to be
+    skipped.
+    """
+    if os.path.isfile(path):
+        click.echo('{} exists as a file. Skipping this subtree {}'.format(path, remote_path))
+        return False
+    elif not os.path.isdir(path):
+        os.makedirs(path)
+    return True
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """
+    Opens a temporary file in the directory of path for writing, which replaces path once the
+    block completes. If the block raises, the temporary file is removed and path is left as is,
+    so path is never left partially written. An existing path keeps its permissions.
+    """
+    path_dir, path_name = os.path.split(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=path_dir, prefix='.{}.'.format(path_name),
+                                         suffix='.tmp')
+    try:
+        with os.fdopen(handle, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates files that only the user can read.
+        os.chmod(temp_path,
+                 stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else 0o644)
+        _replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def sha256_file(path, sha256=None):
+    """
+    Updates sha256, a new hashlib.sha256() by default, with the contents of the file at path,
+    which are read a block at a time.
+
+    :return: sha256
+    """
+    if sha256 is None:
+        sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE_BYTES), b''):
+            sha256.update(block)
+    return sha256
+
+
+def _replace(src, dst):
+    """
+    Renames src to dst, replacing dst if it exists.
+    """
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)  # pylint: disable=no-member
+    else:
+        # Python 2, where rename replaces dst atomically on POSIX only.
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
 def truncate_string(s, length=100):
     if len(s) <= length:
         return s
@@ -21,20 +21,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import fnmatch
+import io
+import json
 import os
-from base64 import b64encode, b64decode
+import shutil
+import tempfile
+import zipfile
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import click
 from requests.exceptions import HTTPError
 
 from databricks_cli.dbfs.exceptions import LocalFileExistsException
 from databricks_cli.sdk import WorkspaceService
+from databricks_cli.utils import atomic_write, make_local_dir, walk_concurrently, \
+    TransferFailure
 from databricks_cli.workspace.types import WorkspaceFormat, WorkspaceLanguage
 
 DIRECTORY = 'DIRECTORY'
 NOTEBOOK = 'NOTEBOOK'
 LIBRARY = 'LIBRARY'
 
+DEFAULT_PARALLELISM = 8
+
+
+class DiffStatus(object):
+    ADDED = 'added'
+    REMOVED = 'removed'
+    CHANGED = 'changed'
+    FAILED = 'failed'
+
 
 class WorkspaceFileInfo(object):
     def __init__(self, path, object_type, language=None):
@@ -42,8 +60,17 @@ class WorkspaceFileInfo(object):
         self.object_type = object_type
         self.language = language
 
-    def to_row(self, is_long_form, is_absolute):
-        path = self.path if is_absolute else self.basename
+    def to_row(self, is_long_form, is_absolute, relative_to=None):
+        """
+        :param relative_to: If set and is_absolute is not, display the path relative to this
+        workspace directory instead of the basename.
+        """
+        if is_absolute:
+            path = self.path
+        elif relative_to is not None:
+            path = _workspace_relpath(self.path, relative_to)
+        else:
+            path = self.basename
         if self.is_dir:
             stylized_path = click.style(path, 'cyan')
         elif self.is_library:
@@ -93,6 +120,44 @@ class WorkspaceApi(object):
         objects = response['objects']
         return [WorkspaceFileInfo.from_json(f) for f in objects]
 
+    def walk(self, workspace_path, parallelism=DEFAULT_PARALLELISM):
+        """
+        Lazily yields the WorkspaceFileInfo of every object below workspace_path, with up to
+        parallelism directories listed concurrently. See utils.walk_concurrently for the order.
+        """
+        return walk_concurrently(workspace_path, self.list_objects, lambda o: o.is_dir,
+                                 lambda o: o.path, parallelism)
+
+    def find(self, workspace_path, name=None, language=None, parallelism=DEFAULT_PARALLELISM):
+        """
+        Lazily yields the WorkspaceFileInfo of the objects below workspace_path whose basename
+        matches the glob name and, if language is set, the notebooks in that language.
+        """
+        for obj in self.walk(workspace_path, parallelism):
+            if name is not None and not fnmatch.fnmatch(obj.basename, name):
+                continue
+            if language is not None and obj.language != language:
+                continue
+            yield obj
+
+    def count_objects(self, workspace_path, parallelism=DEFAULT_PARALLELISM):
+        """
+        :return: dict that maps workspace_path and every directory below it, relative to
+        workspace_path ('' for workspace_path itself), to a dict of the number of objects of each
+        object type that it contains, at any depth.
+        """
+        counts = {'': _empty_counts()}
+        for obj in self.walk(workspace_path, parallelism):
+            relpath = _workspace_relpath(obj.path, workspace_path)
+            if obj.is_dir:
+                counts.setdefault(relpath, _empty_counts())
+            parts = relpath.split('/')
+            for i in range(len(parts)):
+                parent = '/'.join(parts[:i])
+                parent_counts = counts.setdefault(parent, _empty_counts())
+                parent_counts[obj.object_type] = parent_counts.get(obj.object_type, 0) + 1
+        return counts
+
     def mkdirs(self, workspace_path):
         self.client.mkdirs(workspace_path)
 
@@ -111,65 +176,406 @@ class WorkspaceApi(object):
         """
         Faithfully exports the source_path to the target_path. Does not
         attempt to do any munging of the target_path if it is a directory.
+
+        The export is streamed to a temporary file next to target_path as it is received, so it
+        is never held in memory, and only replaces target_path once it is complete.
         """
         if os.path.exists(target_path) and not is_overwrite:
             raise LocalFileExistsException('Target {} already exists.'.format(target_path))
-        output = self.client.export_workspace(source_path, fmt)
-        content = output['content']
         # Will overwrite target_path.
-        with open(target_path, 'wb') as f:
-            decoded = b64decode(content)
-            f.write(decoded)
+        with atomic_write(target_path, 'wb') as f:
+            self._download(source_path, fmt, f)
+
+    def _download(self, source_path, fmt, f):
+        """
+        Writes the raw export of source_path to the file object f.
+        """
+        # Bypass the service, which would return the whole export base64 encoded in JSON.
+        data = {'path': source_path, 'format': fmt, 'direct_download': True}
+        self.client.client.perform_download('/workspace/export', data, f)
 
     def delete(self, workspace_path, is_recursive):
         self.client.delete(workspace_path, is_recursive)
 
-    def import_workspace_dir(self, source_path, target_path, overwrite, exclude_hidden_files):
-        filenames = os.listdir(source_path)
+    def import_workspace_dir(self, source_path, target_path, overwrite, exclude_hidden_files,
+                             parallelism=DEFAULT_PARALLELISM, manifest=None):
+        """
+        Imports the notebooks below the local directory source_path to target_path.
+
+        The whole tree is planned first. Its directories are then created, parents first, and
+        the notebooks are imported concurrently by up to parallelism workers. A notebook that
+        fails to import does not abort the others.
+
+        :param manifest: ImportManifest of an earlier import. If set, only the notebooks and
+        directories that changed since are imported, and the manifest is updated.
+        :return: list of TransferFailure for the notebooks that could not be imported.
+        """
+        dirs, imports = self._plan_import_dir(source_path, target_path, exclude_hidden_files)
+        unchanged = 0
+        if manifest is not None:
+            manifest.load()
+            records = {i[1]: manifest.record(i[0], i[2], i[3]) for i in imports}
+            changed = [i for i in imports if manifest.notebooks.get(i[1]) != records[i[1]]]
+            unchanged = len(imports) - len(changed)
+            imports = changed
+            dirs = [d for d in dirs if d not in manifest.dirs]
+        failed_dirs = []
+        for cur_dst in dirs:
+            if any(_is_workspace_ancestor(d, cur_dst) for d in failed_dirs):
+                continue
+            try:
+                self.mkdirs(cur_dst)
+            except HTTPError as e:
+                click.echo(e.response.json())
+                failed_dirs.append(cur_dst)
+            else:
+                if manifest is not None:
+                    manifest.dirs.add(cur_dst)
+        imports = [i for i in imports
+                   if not any(_is_workspace_ancestor(d, i[1]) for d in failed_dirs)]
+
+        def import_notebook(cur_src, cur_dst, language, file_format):
+            self.import_workspace(cur_src, cur_dst, language, file_format, overwrite)
+            click.echo('{} -> {}'.format(cur_src, cur_dst))
+
+        failures = []
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            futures = {executor.submit(import_notebook, *i): i for i in imports}
+            for future in as_completed(futures):
+                exception = future.exception()
+                if exception is not None:
+                    cur_src, cur_dst = futures[future][:2]
+                    click.echo('Failed to import {} -> {}: {}'.format(cur_src, cur_dst,
+                                                                     exception))
+                    failures.append(TransferFailure(cur_src, cur_dst, exception))
+                    if manifest is not None:
+                        manifest.notebooks.pop(cur_dst, None)
+                elif manifest is not None:
+                    cur_dst = futures[future][1]
+                    manifest.notebooks[cur_dst] = records[cur_dst]
+        if manifest is not None:
+            manifest.save()
+            click.echo('{} notebook(s) imported, {} unchanged, {} failed.'.format(
+                len(imports) - len(failures), unchanged, len(failures)))
+        else:
+            click.echo('{} notebook(s) imported, {} failed.'.format(len(imports) - len(failures),
+                                                                   len(failures)))
+        return failures
+
+    def diff(self, source_path, target_path, exclude_hidden_files=False,
+             parallelism=DEFAULT_PARALLELISM, manifest=None):
+        """
+        Compares the notebooks below the local directory source_path with the notebooks below
+        the workspace directory target_path, matching them as import_workspace_dir would.
+
+        Lazily yields (status, workspace_path, local_path) tuples, where status is a DiffStatus:
+        ADDED for a local notebook missing from the workspace, REMOVED for a workspace notebook
+        missing locally, CHANGED for a notebook whose language or contents differ, and FAILED
+        for a notebook whose export failed. The differences are yielded as the tree is walked
+        and the exports return.
+
+        The listings only tell the presence and language of the notebooks, so comparing contents
+        takes an export of every notebook present on both sides in the same language. Source
+        notebooks are compared line by line and Jupyter notebooks by the sources of their cells,
+        as the other fields of an export differ from the imported file. With the ImportManifest
+        of the last import of source_path to target_path, the notebooks whose local file is
+        unchanged since that import are assumed unchanged and not exported. This misses the
+        edits made in the workspace since the import.
+        """
+        _, imports = self._plan_import_dir(source_path, target_path, exclude_hidden_files)
+        local = {cur_dst: (cur_src, language, file_format)
+                 for cur_src, cur_dst, language, file_format in imports}
+        seen = set()
+        if manifest is not None:
+            manifest.load()
+
+        def is_changed(cur_src, cur_dst, file_format):
+            with open(cur_src, 'rb') as f:
+                local_contents = f.read()
+            remote = io.BytesIO()
+            self._download(cur_dst, file_format, remote)
+            if file_format == WorkspaceFormat.JUPYTER:
+                normalize = _jupyter_cell_sources
+            else:
+                normalize = _normalize_source
+            try:
+                return normalize(local_contents) != normalize(remote.getvalue())
+            except ValueError:
+                # The local file is not a valid notebook, so it can't match the export.
+                return True
+
+        def remote_objects():
+            walked = []
+            try:
+                for obj in self.walk(target_path, parallelism):
+                    walked.append(obj)
+                    yield obj
+            except HTTPError as e:
+                # A missing target_path is an empty tree, to which every local notebook is added.
+                if walked or e.response.json().get('error_code') != 'RESOURCE_DOES_NOT_EXIST':
+                    raise e
+
+        def changes(done, futures):
+            for future in done:
+                exception = future.exception()
+                if exception is not None:
+                    click.echo('Failed to export {}: {}'.format(futures[future][0], exception))
+                    yield (DiffStatus.FAILED, ) + futures[future]
+                elif future.result():
+                    yield (DiffStatus.CHANGED, ) + futures[future]
+
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            futures = {}
+            for obj in remote_objects():
+                if not obj.is_notebook:
+                    continue
+                seen.add(obj.path)
+                if obj.path not in local:
+                    yield (DiffStatus.REMOVED, obj.path, None)
+                    continue
+                cur_src, language, file_format = local[obj.path]
+                if obj.language != language:
+                    yield (DiffStatus.CHANGED, obj.path, cur_src)
+                    continue
+                if manifest is not None and manifest.notebooks.get(obj.path) == \
+                        manifest.record(cur_src, language, file_format):
+                    continue
+                futures[executor.submit(is_changed, cur_src, obj.path, file_format)] = \
+                    (obj.path, cur_src)
+                done = [f for f in futures if f.done()]
+                for change in changes(done, futures):
+                    yield change
+                for future in done:
+                    del futures[future]
+            for change in changes(as_completed(futures), futures):
+                yield change
+        for cur_dst in sorted(set(local) - seen):
+            yield (DiffStatus.ADDED, cur_dst, local[cur_dst][0])
+
+    def _plan_import_dir(self, source_path, target_path, exclude_hidden_files):
+        """
+        :return: the workspace directories to create, parents first, and the list of
+        (local_path, workspace_path, language, format) of the notebooks to import.
+        """
+        dirs = [target_path]
+        imports = []
+        filenames = sorted(os.listdir(source_path))
         if exclude_hidden_files:
             # for now, just exclude hidden files or directories based on starting '.'
             filenames = [f for f in filenames if not f.startswith('.')]
-        try:
-            self.mkdirs(target_path)
-        except HTTPError as e:
-            click.echo(e.response.json())
-            return
         for filename in filenames:
             cur_src = os.path.join(source_path, filename)
             # don't use os.path.join here since it will set \ on Windows
             cur_dst = target_path.rstrip('/') + '/' + filename
             if os.path.isdir(cur_src):
-                self.import_workspace_dir(cur_src, cur_dst, overwrite, exclude_hidden_files)
+                sub_dirs, sub_imports = self._plan_import_dir(cur_src, cur_dst,
+                                                              exclude_hidden_files)
+                dirs.extend(sub_dirs)
+                imports.extend(sub_imports)
             elif os.path.isfile(cur_src):
                 ext = WorkspaceLanguage.get_extension(cur_src)
                 if ext != '':
                     cur_dst = cur_dst[:-len(ext)]
                     (language, file_format) = WorkspaceLanguage.to_language_and_format(cur_src)
-                    self.import_workspace(cur_src, cur_dst, language, file_format, overwrite)
-                    click.echo('{} -> {}'.format(cur_src, cur_dst))
+                    imports.append((cur_src, cur_dst, language, file_format))
                 else:
                     extensions = ', '.join(WorkspaceLanguage.EXTENSIONS)
                     click.echo(('{} does not have a valid extension of {}. Skip this file and ' +
                                 'continue.').format(cur_src, extensions))
+        return dirs, imports
+
+    def export_workspace_dir(self, source_path, target_path, overwrite,
+                             parallelism=DEFAULT_PARALLELISM):
+        """
+        Exports the notebooks below the workspace directory source_path to target_path.
+
+        The directories are listed breadth first and each notebook is exported as soon as it is
+        listed, with up to parallelism listings and parallelism exports in flight. A notebook that
+        fails to export does not abort the others.
+
+        :return: list of TransferFailure for the notebooks that could not be exported.
+        """
+        if not make_local_dir(target_path, source_path):
+            return []
+
+        def export_notebook(cur_src, cur_dst):
+            try:
+                self.export_workspace(cur_src, cur_dst, WorkspaceFormat.SOURCE, overwrite)
+                click.echo('{} -> {}'.format(cur_src, cur_dst))
+            except LocalFileExistsException:
+                click.echo('{} already exists locally as {}. Skip.'.format(cur_src, cur_dst))
 
-    def export_workspace_dir(self, source_path, target_path, overwrite):
-        if os.path.isfile(target_path):
-            click.echo('{} exists as a file. Skipping this subtree {}'
-                       .format(target_path, source_path))
+        skipped_dirs = []
+        futures = {}
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            for obj in self.walk(source_path, parallelism):
+                if any(_is_workspace_ancestor(d, obj.path) for d in skipped_dirs):
+                    continue
+                cur_dst = os.path.join(target_path,
+                                       *_workspace_relpath(obj.path, source_path).split('/'))
+                if obj.is_dir:
+                    if not make_local_dir(cur_dst, obj.path):
+                        skipped_dirs.append(obj.path)
+                elif obj.is_notebook:
+                    cur_dst = cur_dst + WorkspaceLanguage.to_extension(obj.language)
+                    future = executor.submit(export_notebook, obj.path, cur_dst)
+                    futures[future] = (obj.path, cur_dst)
+                else:
+                    click.echo('{} is neither a dir or a notebook. Skip.'.format(obj.path))
+
+            failures = []
+            for future in as_completed(futures):
+                exception = future.exception()
+                if exception is not None:
+                    cur_src, cur_dst = futures[future]
+                    click.echo('Failed to export {} -> {}: {}'.format(cur_src, cur_dst,
+                                                                     exception))
+                    failures.append(TransferFailure(cur_src, cur_dst, exception))
+        click.echo('{} notebook(s) exported, {} failed.'.format(len(futures) - len(failures),
+                                                               len(failures)))
+        return failures
+
+    def export_workspace_archive(self, source_path, target_path, fmt, overwrite):
+        """
+        Exports the workspace directory source_path with a single request.
+
+        With the DBC format, the archive is written as is to the file target_path. With the
+        SOURCE format, the zip archive returned is unpacked into the directory target_path, which
+        then has the same layout as after export_workspace_dir.
+        """
+        if fmt == WorkspaceFormat.DBC:
+            self.export_workspace(source_path, target_path, fmt, overwrite)
+            click.echo('{} -> {}'.format(source_path, target_path))
             return
-        if not os.path.isdir(target_path):
-            os.makedirs(target_path)
-        for obj in self.list_objects(source_path):
-            cur_src = obj.path
-            cur_dst = os.path.join(target_path, obj.basename)
-            if obj.is_dir:
-                self.export_workspace_dir(cur_src, cur_dst, overwrite)
-            elif obj.is_notebook:
-                cur_dst = cur_dst + WorkspaceLanguage.to_extension(obj.language)
-                try:
-                    self.export_workspace(cur_src, cur_dst, WorkspaceFormat.SOURCE, overwrite)
-                    click.echo('{} -> {}'.format(cur_src, cur_dst))
-                except LocalFileExistsException:
-                    click.echo('{} already exists locally as {}. Skip.'.format(cur_src, cur_dst))
-            else:
-                click.echo('{} is neither a dir or a notebook. Skip.'.format(cur_src))
+        if not make_local_dir(target_path, source_path):
+            return
+        with tempfile.TemporaryFile() as archive_file:
+            self._download(source_path, fmt, archive_file)
+            _unpack_source_archive(zipfile.ZipFile(archive_file), source_path, target_path,
+                                   overwrite)
+
+    def import_workspace_archive(self, source_path, target_path, fmt, overwrite,
+                                 exclude_hidden_files):
+        """
+        Imports a whole directory to target_path with a single request.
+
+        With the DBC format, source_path is a DBC archive file. The workspace rejects overwrite
+        for DBC imports, so target_path must not exist yet. With the SOURCE format, source_path
+        is a local directory whose source notebooks are packed into a zip archive first. Jupyter
+        notebooks can't be part of such an archive and are skipped.
+        """
+        if fmt == WorkspaceFormat.DBC:
+            self.import_workspace(source_path, target_path, None, fmt, overwrite)
+            click.echo('{} -> {}'.format(source_path, target_path))
+            return
+        handle, archive_path = tempfile.mkstemp(suffix='.zip')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                packed = _pack_source_archive(source_path, f, exclude_hidden_files)
+            if not packed:
+                click.echo('{} has no source notebooks. Nothing to import.'.format(source_path))
+                return
+            # The language of each notebook comes from its extension in the archive, so none is
+            # given for the archive itself.
+            self.import_workspace(archive_path, target_path, None, fmt, overwrite)
+        finally:
+            os.remove(archive_path)
+        click.echo('{} -> {}'.format(source_path, target_path))
+
+
+def _unpack_source_archive(archive, source_path, target_path, overwrite):
+    """
+    Extracts the SOURCE zip archive of the workspace directory source_path into target_path.
+    """
+    names = [name for name in archive.namelist() if not name.endswith('/')]
+    # The archive may hold the exported directory itself rather than its contents.
+    root = os.path.basename(source_path.rstrip('/')) + '/'
+    if names and all(name.startswith(root) for name in names):
+        relpaths = [name[len(root):] for name in names]
+    else:
+        relpaths = names
+    for name, relpath in zip(names, relpaths):
+        parts = relpath.split('/')
+        if any(part in ('', '.', '..') for part in parts):
+            click.echo('{} is not a valid path in the archive. Skip.'.format(name))
+            continue
+        cur_src = source_path.rstrip('/') + '/' + relpath
+        cur_dst = os.path.join(target_path, *parts)
+        if os.path.exists(cur_dst) and not overwrite:
+            click.echo('{} already exists locally as {}. Skip.'.format(cur_src, cur_dst))
+            continue
+        if not make_local_dir(os.path.dirname(cur_dst), cur_src):
+            continue
+        with archive.open(name) as src, open(cur_dst, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        click.echo('{} -> {}'.format(cur_src, cur_dst))
+
+
+def _pack_source_archive(source_path, f, exclude_hidden_files):
+    """
+    Writes a zip archive of the source notebooks below the local directory source_path to the
+    file object f.
+
+    :return: the number of notebooks written to the archive.
+    """
+    packed = 0
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for dirpath, dirnames, filenames in os.walk(source_path):
+            if exclude_hidden_files:
+                # for now, just exclude hidden files or directories based on starting '.'
+                dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+                filenames = [name for name in filenames if not name.startswith('.')]
+            dirnames.sort()
+            for filename in sorted(filenames):
+                cur_src = os.path.join(dirpath, filename)
+                language_and_format = WorkspaceLanguage.to_language_and_format(cur_src)
+                if language_and_format is None:
+                    click.echo('{} is not a source notebook. Skip this file and continue.'
+                               .format(cur_src))
+                    continue
+                if language_and_format[1] != WorkspaceFormat.SOURCE:
+                    click.echo('{} is a Jupyter notebook, which a SOURCE archive can\'t hold. '
+                               'Skip this file and continue.'.format(cur_src))
+                    continue
+                relpath = os.path.relpath(cur_src, source_path).replace(os.sep, '/')
+                archive.write(cur_src, relpath)
+                packed += 1
+    return packed
+
+
+def _is_workspace_ancestor(parent, child):
+    """
+    :return: whether the workspace path child is parent or is below it.
+    """
+    return child == parent or child.startswith(parent.rstrip('/') + '/')
+
+
+def _jupyter_cell_sources(contents):
+    """
+    :return: the sources of the cells of the Jupyter notebook contents, without trailing
+    whitespace. Raises ValueError if contents is not a Jupyter notebook.
+    """
+    cells = json.loads(contents.decode('utf-8')).get('cells', [])
+    return [''.join(cell.get('source', [])).rstrip() for cell in cells]
+
+
+def _normalize_source(contents):
+    """
+    Drops the header line that the workspace adds to source exports, as well as the trailing
+    whitespace, which the exports don't preserve.
+    """
+    lines = contents.rstrip().split(b'\n')
+    if lines and lines[0].rstrip().endswith(b'Databricks notebook source'):
+        lines = lines[1:]
+    return b'\n'.join(line.rstrip() for line in lines).strip()
+
+
+def _empty_counts():
+    return {DIRECTORY: 0, NOTEBOOK: 0, LIBRARY: 0}
+
+
+def _workspace_relpath(path, root):
+    """
+    :return: the workspace path relative to its ancestor root.
+    """
+    return path[len(root.rstrip('/') + '/'):]
@@ -25,13 +25,24 @@ import os
 import click
 from tabulate import tabulate
 
-from databricks_cli.utils import eat_exceptions, CONTEXT_SETTINGS
+from databricks_cli.utils import eat_exceptions, error_and_quit, CONTEXT_SETTINGS
 from databricks_cli.version import print_version_callback, version
 from databricks_cli.configure.config import provide_api_client, profile_option, debug_option
-from databricks_cli.workspace.api import WorkspaceApi
+from databricks_cli.workspace.api import WorkspaceApi, DEFAULT_PARALLELISM, DIRECTORY, NOTEBOOK, \
+    LIBRARY, DiffStatus
+from databricks_cli.workspace.manifest import ImportManifest
+from databricks_cli.workspace.watch import WorkspaceWatch
 from databricks_cli.workspace.types import LanguageClickType, FormatClickType, WorkspaceFormat, \
     WorkspaceLanguage
 
+ARCHIVE_FORMATS = [WorkspaceFormat.DBC, WorkspaceFormat.SOURCE]
+
+
+def _listing_parallelism_option(f):
+    return click.option('--parallelism', '-p', default=DEFAULT_PARALLELISM, show_default=True,
+                        type=click.IntRange(min=1),
+                        help='Number of directories listed concurrently.')(f)
+
 
 @click.command(context_settings=CONTEXT_SETTINGS,
                short_help='List objects in the Databricks Workspace. ls and list are synonyms.')
@@ -39,25 +50,89 @@ from databricks_cli.workspace.types import LanguageClickType, FormatClickType, W
               help='Displays absolute paths.')
 @click.option('-l', is_flag=True, default=False,
               help='Displays full information including ObjectType, Path, Language')
+@click.option('--recursive', '-R', is_flag=True, default=False,
+              help='Lists the contents of the subdirectories as well.')
+@_listing_parallelism_option
 @click.argument('workspace_path', type=str, nargs=-1)
 @debug_option
 @profile_option
 @eat_exceptions
 @provide_api_client
-def ls_cli(api_client, l, absolute, workspace_path):
+def ls_cli(api_client, l, absolute, recursive, parallelism, workspace_path): # NOQA
     """
     List objects in the Databricks Workspace.
+
+    With --recursive, the paths are displayed relative to the listed directory and are printed
+    as soon as their directory has been listed.
     """
     if len(workspace_path) == 0:
         workspace_path = '/'
     else:
         workspace_path = workspace_path[0]
+    if recursive:
+        for obj in WorkspaceApi(api_client).walk(workspace_path, parallelism):
+            row = obj.to_row(is_long_form=l, is_absolute=absolute, relative_to=workspace_path)
+            click.echo('\t'.join(str(column) for column in row))
+        return
     objects = WorkspaceApi(api_client).list_objects(workspace_path)
     table = tabulate([obj.to_row(is_long_form=l, is_absolute=absolute) for obj in objects],
                      tablefmt='plain')
     click.echo(table)
 
 
+@click.command(context_settings=CONTEXT_SETTINGS,
+               short_help='Finds objects below a directory of the Databricks workspace.')
+@click.option('--name', default=None,
+              help='Only finds the objects whose name matches this glob pattern.')
+@click.option('--language', default=None, type=LanguageClickType(),
+              help='Only finds the notebooks in this language: ' + ', '.join(WorkspaceLanguage.ALL))
+@click.option('-l', is_flag=True, default=False,
+              help='Displays full information including ObjectType, Path, Language')
+@_listing_parallelism_option
+@click.argument('workspace_path')
+@debug_option
+@profile_option
+@eat_exceptions
+@provide_api_client
+def find_cli(api_client, name, language, l, parallelism, workspace_path): # NOQA
+    """
+    Finds objects below a directory of the Databricks workspace.
+
+    The absolute paths of the matches are printed as soon as their directory has been listed.
+    """
+    for obj in WorkspaceApi(api_client).find(workspace_path, name, language, parallelism):
+        row = obj.to_row(is_long_form=l, is_absolute=True)
+        click.echo('\t'.join(str(column) for column in row))
+
+
+@click.command(context_settings=CONTEXT_SETTINGS,
+               short_help='Counts the objects in directories of the Databricks workspace.')
+@click.option('--summarize', '-s', is_flag=True, default=False,
+              help='Only displays the counts of workspace_path.')
+@_listing_parallelism_option
+@click.argument('workspace_path')
+@debug_option
+@profile_option
+@eat_exceptions
+@provide_api_client
+def count_cli(api_client, summarize, parallelism, workspace_path):
+    """
+    Counts the objects in directories of the Databricks workspace.
+
+    The number of directories, notebooks and libraries below workspace_path and below every
+    directory it contains are displayed.
+    """
+    counts = WorkspaceApi(api_client).count_objects(workspace_path, parallelism)
+    relpaths = [''] if summarize else sorted(counts)
+    rows = []
+    for relpath in relpaths:
+        path = workspace_path.rstrip('/') + '/' + relpath if relpath else workspace_path
+        rows.append([counts[relpath][DIRECTORY], counts[relpath][NOTEBOOK],
+                     counts[relpath][LIBRARY], path])
+    click.echo(tabulate(rows, headers=['DIRECTORIES', 'NOTEBOOKS', 'LIBRARIES', 'PATH'],
+                        tablefmt='plain'))
+
+
 @click.command(context_settings=CONTEXT_SETTINGS,
                short_help='Make directories in the Databricks Workspace.')
 @click.argument('workspace_path')
@@ -147,22 +222,37 @@ def delete_cli(api_client, workspace_path, recursive):
 @click.argument('source_path')
 @click.argument('target_path')
 @click.option('--overwrite', '-o', is_flag=True, default=False)
+@click.option('--parallelism', '-p', default=DEFAULT_PARALLELISM, show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of directories listed and of notebooks exported concurrently.')
+@click.option('--archive', default=None, type=click.Choice(ARCHIVE_FORMATS),
+              help='Exports the whole directory in a single request, in this format.')
 @debug_option
 @profile_option
 @eat_exceptions
 @provide_api_client
-def export_dir_cli(api_client, source_path, target_path, overwrite):
+def export_dir_cli(api_client, source_path, target_path, overwrite, parallelism, archive):
     """
     Recursively exports a directory from the Databricks workspace.
 
     Only directories and notebooks are exported. Notebooks are always exported in the SOURCE
     format. Notebooks will also have the extension of .scala, .py, .sql, or .r appended
     depending on the language type.
+
+    With --archive DBC, the directory is exported as a single DBC archive to the file
+    target_path. With --archive SOURCE, it is exported as a single zip archive that is unpacked
+    into target_path.
     """
     workspace_api = WorkspaceApi(api_client)
     assert workspace_api.get_status(source_path).is_dir, 'The source path must be a directory. {}' \
         .format(source_path)
-    workspace_api.export_workspace_dir(source_path, target_path, overwrite)
+    if archive is not None:
+        workspace_api.export_workspace_archive(source_path, target_path, archive, overwrite)
+        return
+    failures = workspace_api.export_workspace_dir(source_path, target_path, overwrite,
+                                                  parallelism)
+    if failures:
+        error_and_quit('{} notebook(s) failed to export.'.format(len(failures)))
 
 
 @click.command(context_settings=CONTEXT_SETTINGS,
@@ -171,19 +261,156 @@ def export_dir_cli(api_client, source_path, target_path, overwrite):
 @click.argument('target_path')
 @click.option('--overwrite', '-o', is_flag=True, default=False)
 @click.option('--exclude-hidden-files', '-e', is_flag=True, default=False)
+@click.option('--parallelism', '-p', default=DEFAULT_PARALLELISM, show_default=True,
+              type=click.IntRange(min=1), help='Number of notebooks imported concurrently.')
+@click.option('--archive', default=None, type=click.Choice(ARCHIVE_FORMATS),
+              help='Imports the whole directory in a single request, in this format.')
+@click.option('--manifest', '-m', default=None,
+              help='Only imports the notebooks that changed since the import recorded in this '
+                   'manifest file, which is local or on DBFS (dbfs:/...). The manifest is '
+                   'created if it does not exist.')
 @debug_option
 @profile_option
 @eat_exceptions
 @provide_api_client
-def import_dir_cli(api_client, source_path, target_path, overwrite, exclude_hidden_files):
+def import_dir_cli(api_client, source_path, target_path, overwrite, exclude_hidden_files,
+                   parallelism, archive, manifest):
     """
     Recursively imports a directory from local to the Databricks workspace.
 
     Only directories and files with the extensions .scala, .py, .sql, .r, .R, .ipynb are imported.
     When imported, these extensions will be stripped off the name of the notebook.
+
+    With --archive DBC, source_path is a DBC archive file that is imported in a single request.
+    With --archive SOURCE, the source notebooks of the directory source_path are packed into a
+    zip archive that is imported in a single request. The workspace does not overwrite DBC
+    imports, so --overwrite can't be used with --archive DBC: delete target_path first instead.
+    """
+    if archive is not None:
+        if archive == WorkspaceFormat.DBC and not os.path.isfile(source_path):
+            error_and_quit('The source path must be a DBC archive file. {}'.format(source_path))
+        if archive == WorkspaceFormat.DBC and overwrite:
+            error_and_quit('--overwrite is not supported with --archive DBC. Delete {} first.'
+                           .format(target_path))
+        if archive == WorkspaceFormat.SOURCE and not os.path.isdir(source_path):
+            error_and_quit('The source path must be a directory. {}'.format(source_path))
+        WorkspaceApi(api_client).import_workspace_archive(source_path, target_path, archive,
+                                                          overwrite, exclude_hidden_files)
+        return
+    if manifest is not None:
+        manifest = ImportManifest(manifest, api_client)
+    failures = WorkspaceApi(api_client).import_workspace_dir(source_path, target_path, overwrite,
+                                                             exclude_hidden_files, parallelism,
+                                                             manifest)
+    if failures:
+        error_and_quit('{} notebook(s) failed to import.'.format(len(failures)))
+
+
+@click.command(context_settings=CONTEXT_SETTINGS,
+               short_help='Syncs a local directory to the Databricks workspace.')
+@click.argument('source_path', type=click.Path(exists=True, file_okay=False))
+@click.argument('target_path')
+@click.option('--watch', '-w', is_flag=True, default=False,
+              help='Keeps running and pushes the notebooks as they are edited.')
+@click.option('--delete', is_flag=True, default=False,
+              help='While watching, deletes the notebooks removed locally from the workspace.')
+@click.option('--poll', is_flag=True, default=False,
+              help='While watching, polls for changes instead of using filesystem '
+                   'notifications.')
+@click.option('--exclude-hidden-files', '-e', is_flag=True, default=False)
+@click.option('--parallelism', '-p', default=DEFAULT_PARALLELISM, show_default=True,
+              type=click.IntRange(min=1), help='Number of notebooks imported concurrently.')
+@click.option('--manifest', '-m', default=None,
+              help='Manifest of the initial import, as for import_dir. Defaults to a manifest '
+                   'kept under the home directory for this source and target.')
+@click.option('--full', is_flag=True, default=False,
+              help='Imports every notebook initially, even those the manifest records as '
+                   'unchanged.')
+@debug_option
+@profile_option
+@eat_exceptions
+@provide_api_client
+def sync_cli(api_client, source_path, target_path, watch, delete, poll, exclude_hidden_files,
+             parallelism, manifest, full):
+    """
+    Syncs a local directory to the Databricks workspace.
+
+    The notebooks that changed since the last sync are first imported as with import_dir
+    --overwrite --manifest. Unless --manifest is given, the manifest is kept under the home
+    directory, one per source directory, workspace and target directory. The manifest only knows
+    about the imports it recorded: use --full to import everything again after the workspace was
+    changed by other means.
+
+    With --watch, the command then keeps running and imports every notebook that is saved,
+    shortly after the last of a burst of saves. Filesystem notifications are used when the
+    watchdog package is installed, and the directory is polled otherwise.
+    """
+    workspace_api = WorkspaceApi(api_client)
+    if manifest is not None:
+        manifest = ImportManifest(manifest, api_client)
+    else:
+        manifest = ImportManifest.for_sync(source_path, target_path, api_client)
+    if full:
+        manifest.reset()
+    failures = workspace_api.import_workspace_dir(source_path, target_path, True,
+                                                  exclude_hidden_files, parallelism, manifest)
+    if not watch:
+        if failures:
+            error_and_quit('{} notebook(s) failed to import.'.format(len(failures)))
+        return
+    click.echo('Watching {} for changes. Press Ctrl-C to stop.'.format(source_path))
+    WorkspaceWatch(workspace_api, source_path, target_path, delete, exclude_hidden_files,
+                   use_polling=poll).run()
+
+
+@click.command(context_settings=CONTEXT_SETTINGS,
+               short_help='Compares a local directory with a workspace directory.')
+@click.argument('source_path', type=click.Path(exists=True, file_okay=False))
+@click.argument('target_path')
+@click.option('--exclude-hidden-files', '-e', is_flag=True, default=False)
+@click.option('--parallelism', '-p', default=DEFAULT_PARALLELISM, show_default=True,
+              type=click.IntRange(min=1),
+              help='Number of directories listed and of notebooks exported concurrently.')
+@click.option('--manifest', '-m', default=None,
+              help='Manifest of the last import_dir or sync of the directory. The notebooks whose '
+                   'local file is unchanged since are not exported.')
+@debug_option
+@profile_option
+@eat_exceptions
+@provide_api_client
+def diff_cli(api_client, source_path, target_path, exclude_hidden_files, parallelism, manifest):
+    """
+    Compares a local directory with a workspace directory.
+
+    Local files are matched with notebooks as import_dir would import them. Each difference is
+    printed as soon as it is found, as one of:
+
+    added: the local notebook is missing from the workspace.
+
+    removed: the workspace notebook is missing locally.
+
+    changed: the language or the contents of the notebook differ.
+
+    failed: the notebook could not be exported to compare its contents.
+
+    Comparing contents exports every notebook present on both sides in the same language. With
+    --manifest, the notebooks whose local file is unchanged since the import recorded in the
+    manifest are not exported, and edits made in the workspace since that import are missed.
     """
-    WorkspaceApi(api_client).import_workspace_dir(source_path, target_path, overwrite,
-                                                  exclude_hidden_files)
+    if manifest is not None:
+        manifest = ImportManifest(manifest, api_client)
+    diff = WorkspaceApi(api_client).diff(source_path, target_path, exclude_hidden_files,
+                                         parallelism, manifest)
+    failed = 0
+    for status, workspace_path, local_path in diff:
+        if status == DiffStatus.FAILED:
+            failed += 1
+        if local_path is None:
+            click.echo('{}\t{}'.format(status, workspace_path))
+        else:
+            click.echo('{}\t{}\t{}'.format(status, workspace_path, local_path))
+    if failed:
+        error_and_quit('{} notebook(s) failed to export.'.format(failed))
 
 
 @click.group(context_settings=CONTEXT_SETTINGS,
@@ -202,9 +429,13 @@ def workspace_group():
 workspace_group.add_command(ls_cli, name='ls')
 workspace_group.add_command(ls_cli, name='list')
 workspace_group.add_command(mkdirs_cli, name='mkdirs')
+workspace_group.add_command(find_cli, name='find')
+workspace_group.add_command(count_cli, name='count')
 workspace_group.add_command(import_workspace_cli, name='import')
 workspace_group.add_command(export_workspace_cli, name='export')
 workspace_group.add_command(delete_cli, name='delete')
 workspace_group.add_command(delete_cli, name='rm')
 workspace_group.add_command(export_dir_cli, name='export_dir')
 workspace_group.add_command(import_dir_cli, name='import_dir')
+workspace_group.add_command(sync_cli, name='sync')
+workspace_group.add_command(diff_cli, name='diff')
@@ -0,0 +1,129 @@
+# Databricks CLI
+# Copyright 2018 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import tempfile
+
+from databricks_cli.dbfs.api import DbfsApi
+from databricks_cli.dbfs.dbfs_path import DbfsPath
+from databricks_cli.configure import provider
+from databricks_cli.utils import atomic_write, sha256_file
+
+SYNC_MANIFEST_DIR_NAME = '.databricks_sync_manifests'
+
+
+class ImportManifest(object):
+    """
+    Records what an import of a directory to the workspace created, so that the next import of
+    the same directory only imports the notebooks that changed since.
+
+    For each imported notebook, the manifest keeps the hash of the file it was imported from and
+    its language and format. It also keeps the directories created. The manifest is a local file
+    or, if its path starts with dbfs:/, a DBFS file, which lets CI jobs on fresh machines share it.
+
+    The manifest only knows about the imports it recorded. If the workspace is changed by other
+    means, delete the manifest to import everything again.
+    """
+    def __init__(self, path, api_client):
+        self.path = path
+        self._dbfs_api = DbfsApi(api_client) if DbfsPath.is_valid(path) else None
+        self.notebooks = {}
+        self.dirs = set()
+
+    @classmethod
+    def for_sync(cls, source_path, target_path, api_client):
+        """
+        Opens the default manifest of the sync of the local directory source_path to the
+        workspace directory target_path of api_client. These manifests are kept under the home
+        directory of the user.
+        """
+        manifest_dir = os.path.join(provider._home, SYNC_MANIFEST_DIR_NAME)
+        if not os.path.isdir(manifest_dir):
+            os.makedirs(manifest_dir)
+        key = '{} {} -> {}'.format(api_client.url, os.path.abspath(source_path), target_path)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return cls(os.path.join(manifest_dir, name + '.json'), api_client)
+
+    @staticmethod
+    def record(source_path, language, file_format):
+        """
+        :return: the entry of the manifest for a notebook imported from the local file
+        source_path.
+        """
+        return {'sha256': sha256_file(source_path).hexdigest(), 'language': language,
+                'format': file_format}
+
+    def load(self):
+        contents = self._read()
+        if contents is None:
+            return
+        manifest = json.loads(contents)
+        self.notebooks = manifest.get('notebooks', {})
+        self.dirs = set(manifest.get('dirs', []))
+
+    def save(self):
+        contents = json.dumps({'notebooks': self.notebooks, 'dirs': sorted(self.dirs)},
+                              indent=2, sort_keys=True)
+        if self._dbfs_api is None:
+            # An interrupted save leaves the previous manifest rather than a truncated one.
+            with atomic_write(self.path) as f:
+                f.write(contents)
+            return
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, 'w') as f:
+                f.write(contents)
+            self._dbfs_api.put_file(path, DbfsPath(self.path), True)
+        finally:
+            os.remove(path)
+
+    def reset(self):
+        """
+        Forgets every import recorded, so that the next import imports everything.
+        """
+        self.notebooks = {}
+        self.dirs = set()
+        self.save()
+
+    def _read(self):
+        """
+        :return: the contents of the manifest, or None if it does not exist yet.
+        """
+        if self._dbfs_api is None:
+            if not os.path.exists(self.path):
+                return None
+            with open(self.path, 'r') as f:
+                return f.read()
+        dbfs_path = DbfsPath(self.path)
+        if not self._dbfs_api.file_exists(dbfs_path):
+            return None
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            self._dbfs_api.get_file(dbfs_path, path, True)
+            with open(path, 'r') as f:
+                return f.read()
+        finally:
+            os.remove(path)
@@ -0,0 +1,251 @@
+# Databricks CLI
+# Copyright 2018 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pushes the notebooks of a local directory to the workspace as they are edited.
+
+Changes are detected with the filesystem notifications of watchdog when it is installed, which
+is done with the watch extra (pip install databricks-cli[watch]), and by polling otherwise.
+"""
+
+import os
+import threading
+import time
+
+import click
+from requests.exceptions import HTTPError
+
+from databricks_cli.workspace.types import WorkspaceLanguage
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+DEFAULT_DEBOUNCE_SECONDS = 0.3
+DEFAULT_POLL_INTERVAL_SECONDS = 0.5
+TICK_SECONDS = 0.1
+
+
+class Debouncer(object):
+    """
+    Coalesces bursts of events per key. A key becomes ready once no event was seen for it during
+    delay seconds, so that an editor saving a file several times in a row triggers a single push.
+    """
+    def __init__(self, delay):
+        self.delay = delay
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def touch(self, key, now=None):
+        with self._lock:
+            self._pending[key] = now if now is not None else time.time()
+
+    def pop_ready(self, now=None):
+        """
+        :return: sorted list of the keys whose last event is at least delay seconds old.
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            ready = sorted(k for k, t in self._pending.items() if now - t >= self.delay)
+            for key in ready:
+                del self._pending[key]
+        return ready
+
+
+class PollingWatcher(object):
+    """
+    Detects the files added, modified or removed below source_path by comparing their
+    modification time and size between two calls to poll.
+    """
+    def __init__(self, source_path, callback, poll_interval=DEFAULT_POLL_INTERVAL_SECONDS):
+        self.source_path = source_path
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self._snapshot = _scan(source_path)
+        self._last_poll = time.time()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def poll(self, now=None):
+        now = now if now is not None else time.time()
+        if now - self._last_poll < self.poll_interval:
+            return
+        self._last_poll = now
+        snapshot = _scan(self.source_path)
+        for path in set(snapshot) | set(self._snapshot):
+            if snapshot.get(path) != self._snapshot.get(path):
+                self.callback(path)
+        self._snapshot = snapshot
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, callback):
+        self.callback = callback
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self.callback(event.src_path)
+        # Editors often save by moving a temporary file over the notebook.
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.callback(dest_path)
+
+
+class NotificationWatcher(object):
+    """
+    Detects the files changed below source_path with the filesystem notifications of watchdog.
+    """
+    def __init__(self, source_path, callback):
+        self._observer = Observer()
+        self._observer.schedule(_EventHandler(callback), source_path, recursive=True)
+
+    def start(self):
+        self._observer.start()
+
+    def stop(self):
+        self._observer.stop()
+        self._observer.join()
+
+    def poll(self, now=None):
+        pass
+
+
+def create_watcher(source_path, callback, use_polling=False,
+                   poll_interval=DEFAULT_POLL_INTERVAL_SECONDS):
+    """
+    :return: a started NotificationWatcher, or a PollingWatcher if use_polling is set, watchdog
+    is not installed or the notifications can't be set up (for example when the inotify watch
+    limit is reached).
+    """
+    if not use_polling and Observer is not None:
+        watcher = NotificationWatcher(source_path, callback)
+        try:
+            watcher.start()
+            return watcher
+        except OSError as e:
+            click.echo('Filesystem notifications are unavailable ({}). Polling instead.'.format(e))
+    watcher = PollingWatcher(source_path, callback, poll_interval)
+    watcher.start()
+    return watcher
+
+
+class WorkspaceWatch(object):
+    """
+    Pushes the notebooks below the local directory source_path to target_path as they change.
+
+    Every changed notebook is imported with overwrite once its burst of changes has settled for
+    debounce seconds. If delete is set, the notebooks removed locally are also deleted from the
+    workspace.
+    """
+    def __init__(self, workspace_api, source_path, target_path, delete=False,
+                 exclude_hidden_files=False, debounce=DEFAULT_DEBOUNCE_SECONDS, use_polling=False,
+                 poll_interval=DEFAULT_POLL_INTERVAL_SECONDS):
+        self.workspace_api = workspace_api
+        self.source_path = os.path.abspath(source_path)
+        self.target_path = target_path
+        self.delete = delete
+        self.exclude_hidden_files = exclude_hidden_files
+        self.use_polling = use_polling
+        self.poll_interval = poll_interval
+        self.debouncer = Debouncer(debounce)
+        self._created_dirs = set()
+
+    def on_change(self, local_path):
+        relpath = os.path.relpath(os.path.abspath(local_path), self.source_path)
+        parts = relpath.split(os.sep)
+        if parts[0] == os.pardir:
+            return
+        if self.exclude_hidden_files and any(part.startswith('.') for part in parts):
+            return
+        if WorkspaceLanguage.get_extension(local_path) == '':
+            return
+        self.debouncer.touch(os.path.join(self.source_path, relpath))
+
+    def push(self, local_path):
+        """
+        Imports the notebook local_path, or deletes it from the workspace if it was removed.
+        """
+        relpath = os.path.relpath(local_path, self.source_path).replace(os.sep, '/')
+        ext = WorkspaceLanguage.get_extension(local_path)
+        # don't use os.path.join here since it will set \ on Windows
+        cur_dst = self.target_path.rstrip('/') + '/' + relpath[:-len(ext)]
+        if os.path.isfile(local_path):
+            parent = cur_dst.rsplit('/', 1)[0] or '/'
+            if parent not in self._created_dirs:
+                self.workspace_api.mkdirs(parent)
+                self._created_dirs.add(parent)
+            (language, file_format) = WorkspaceLanguage.to_language_and_format(local_path)
+            self.workspace_api.import_workspace(local_path, cur_dst, language, file_format, True)
+            click.echo('{} -> {}'.format(local_path, cur_dst))
+        elif not os.path.exists(local_path) and self.delete:
+            try:
+                self.workspace_api.delete(cur_dst, False)
+                click.echo('Deleted {}'.format(cur_dst))
+            except HTTPError as e:
+                if e.response.json().get('error_code') != 'RESOURCE_DOES_NOT_EXIST':
+                    raise e
+
+    def run(self, stop_event=None):
+        """
+        Watches source_path until stop_event is set or the process is interrupted.
+        """
+        watcher = create_watcher(self.source_path, self.on_change, self.use_polling,
+                                 self.poll_interval)
+        try:
+            while stop_event is None or not stop_event.is_set():
+                watcher.poll()
+                for local_path in self.debouncer.pop_ready():
+                    try:
+                        self.push(local_path)
+                    except Exception as e: # NOQA
+                        click.echo('Failed to push {}: {}'.format(local_path, e))
+                time.sleep(TICK_SECONDS)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.stop()
+
+
+def _scan(source_path):
+    """
+    :return: dict that maps the path of every file below source_path to its modification time
+    and size.
+    """
+    snapshot = {}
+    for dirpath, _, filenames in os.walk(source_path):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime, stat.st_size)
+    return snapshot
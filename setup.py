@@ -38,8 +38,13 @@ setup(
         'requests>=2.17.3',
         'tabulate>=0.7.7',
         'six>=1.10.0',
-        'configparser >= 0.3.5'
+        'configparser >= 0.3.5',
+        'futures>=3.1.1; python_version < "3"'
     ],
+    extras_require={
+        'async': ['aiohttp>=3.3; python_version >= "3.5.3"'],
+        'watch': ['watchdog>=0.8.3'],
+    },
     entry_points='''
         [console_scripts]
         databricks=databricks_cli.cli:cli
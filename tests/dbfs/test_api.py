@@ -22,7 +22,7 @@
 # limitations under the License.
 
 # pylint:disable=redefined-outer-name
-from base64 import b64encode
+from base64 import b64encode, b64decode
 
 import os
 import requests
@@ -30,6 +30,7 @@ import mock
 import pytest
 
 import databricks_cli.dbfs.api as api
+from databricks_cli.dbfs.checkpoint import CheckpointJournal
 from databricks_cli.dbfs.dbfs_path import DbfsPath
 from databricks_cli.dbfs.exceptions import LocalFileExistsException
 
@@ -123,11 +124,40 @@ class TestDbfsApi(object):
         api_mock = dbfs_api.client
         test_handle = 0
         api_mock.create.return_value = {'handle': test_handle}
+        dbfs_api.put_threshold = 0
         dbfs_api.put_file(test_file_path, TEST_DBFS_PATH, True)
 
         assert api_mock.add_block.call_count == 1
         assert test_handle == api_mock.add_block.call_args[0][0]
         assert b64encode(b'test').decode() == api_mock.add_block.call_args[0][1]
+        assert api_mock.put.call_count == 0
+
+    def test_put_file_small(self, dbfs_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with open(test_file_path, 'wt') as f:
+            f.write('test')
+
+        api_mock = dbfs_api.client
+        dbfs_api.put_file(test_file_path, TEST_DBFS_PATH, True)
+
+        assert api_mock.create.call_count == 0
+        assert api_mock.add_block.call_count == 0
+        assert api_mock.put.call_count == 1
+        assert api_mock.put.call_args[0] == \
+            (TEST_DBFS_PATH.absolute_path, b64encode(b'test').decode(), True)
+
+    def test_put_file_at_threshold(self, dbfs_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with open(test_file_path, 'wt') as f:
+            f.write('test')
+
+        api_mock = dbfs_api.client
+        api_mock.create.return_value = {'handle': 0}
+        dbfs_api.put_threshold = 4
+        dbfs_api.put_file(test_file_path, TEST_DBFS_PATH, True)
+
+        assert api_mock.put.call_count == 0
+        assert api_mock.create.call_count == 1
 
     def test_get_file_check_overwrite(self, dbfs_api, tmpdir):
         test_file_path = os.path.join(tmpdir.strpath, 'test')
@@ -149,3 +179,414 @@ class TestDbfsApi(object):
 
         with open(test_file_path, 'r') as f:
             assert f.read() == 'x'
+
+    def test_put_files(self, dbfs_api, tmpdir):
+        transfers = []
+        for i in range(4):
+            test_file_path = os.path.join(tmpdir.strpath, 'test{}'.format(i))
+            with open(test_file_path, 'wt') as f:
+                f.write('test')
+            transfers.append((test_file_path, TEST_DBFS_PATH.join('test{}'.format(i))))
+
+        api_mock = dbfs_api.client
+        failures = dbfs_api.put_files(transfers, True, parallelism=2)
+
+        assert failures == []
+        assert api_mock.put.call_count == 4
+        created = sorted(call[0][0] for call in api_mock.put.call_args_list)
+        assert created == ['dbfs:/test/test{}'.format(i) for i in range(4)]
+
+    def test_put_files_reports_failures(self, dbfs_api, tmpdir):
+        good_path = os.path.join(tmpdir.strpath, 'good')
+        with open(good_path, 'wt') as f:
+            f.write('test')
+        missing_path = os.path.join(tmpdir.strpath, 'missing')
+
+        failures = dbfs_api.put_files([(missing_path, TEST_DBFS_PATH.join('missing')),
+                                       (good_path, TEST_DBFS_PATH.join('good'))], True)
+
+        assert len(failures) == 1
+        assert failures[0].src == missing_path
+        assert isinstance(failures[0].exception, OSError)
+        assert dbfs_api.client.put.call_count == 1
+
+    def test_get_files(self, dbfs_api, tmpdir):
+        api_mock = dbfs_api.client
+        api_mock.get_status.return_value = TEST_FILE_JSON
+        api_mock.read.return_value = {
+            'bytes_read': 1,
+            'data': b64encode(b'x'),
+        }
+        transfers = [(TEST_DBFS_PATH, os.path.join(tmpdir.strpath, 'test{}'.format(i)))
+                     for i in range(3)]
+        failures = dbfs_api.get_files(transfers, True, parallelism=3)
+
+        assert failures == []
+        for _, dst in transfers:
+            with open(dst, 'r') as f:
+                assert f.read() == 'x'
+
+    def test_copy_to_dbfs_recursive(self, dbfs_api, tmpdir):
+        os.makedirs(os.path.join(tmpdir.strpath, 'a', 'b'))
+        for path in [('a', 'x'), ('a', 'b', 'y')]:
+            with open(os.path.join(tmpdir.strpath, *path), 'wt') as f:
+                f.write('test')
+
+        api_mock = dbfs_api.client
+        failures = dbfs_api._copy_to_dbfs_recursive(os.path.join(tmpdir.strpath, 'a'),
+                                                    TEST_DBFS_PATH, True, parallelism=2)
+
+        assert failures == []
+        mkdirs = [call[0][0] for call in api_mock.mkdirs.call_args_list]
+        assert mkdirs == ['dbfs:/test', 'dbfs:/test/b']
+        created = sorted(call[0][0] for call in api_mock.put.call_args_list)
+        assert created == ['dbfs:/test/b/y', 'dbfs:/test/x']
+
+    def test_get_file_ranges(self, dbfs_api, tmpdir):
+        contents = os.urandom(2 * api.BUFFER_SIZE_BYTES + 10)
+
+        def read(path, offset, length):
+            # Return short reads to exercise the re-read of a partial range.
+            data = contents[offset:offset + min(length, api.BUFFER_SIZE_BYTES // 2)]
+            return {'bytes_read': len(data), 'data': b64encode(data)}
+
+        api_mock = dbfs_api.client
+        api_mock.get_status.return_value = {
+            'path': '/test',
+            'is_dir': False,
+            'file_size': len(contents)
+        }
+        api_mock.read.side_effect = read
+
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        dbfs_api.get_file(TEST_DBFS_PATH, test_file_path, True, parallelism=4)
+
+        with open(test_file_path, 'rb') as f:
+            assert f.read() == contents
+        assert api_mock.read.call_count == 5
+
+    def test_get_file_ranges_unexpected_eof(self, dbfs_api, tmpdir):
+        api_mock = dbfs_api.client
+        api_mock.get_status.return_value = {
+            'path': '/test',
+            'is_dir': False,
+            'file_size': 2 * api.BUFFER_SIZE_BYTES
+        }
+        api_mock.read.return_value = {'bytes_read': 0, 'data': ''}
+
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with pytest.raises(RuntimeError):
+            dbfs_api.get_file(TEST_DBFS_PATH, test_file_path, True, parallelism=2)
+
+    def test_put_file_multipart(self, dbfs_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with open(test_file_path, 'wt') as f:
+            f.write('test')
+
+        api_mock = dbfs_api.client
+        dbfs_api.upload_mode = api.UploadMode.MULTIPART
+        dbfs_api.put_file(test_file_path, TEST_DBFS_PATH, True)
+
+        upload = api_mock.client.perform_multipart_upload
+        assert upload.call_count == 1
+        assert upload.call_args[0][0] == '/dbfs/put'
+        assert upload.call_args[0][1] == {'path': 'dbfs:/test', 'overwrite': 'true'}
+        assert upload.call_args[0][4] == 4
+        assert api_mock.put.call_count == 0
+        assert api_mock.create.call_count == 0
+
+    def test_put_file_multipart_fallback(self, dbfs_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with open(test_file_path, 'wt') as f:
+            f.write('test')
+
+        response = requests.Response()
+        response.status_code = 413
+        response._content = b'<html>Request Entity Too Large</html>'
+        api_mock = dbfs_api.client
+        api_mock.client.perform_multipart_upload.side_effect = \
+            requests.exceptions.HTTPError(response=response)
+        api_mock.create.return_value = {'handle': 0}
+        dbfs_api.upload_mode = api.UploadMode.MULTIPART
+        dbfs_api.put_file(test_file_path, TEST_DBFS_PATH, True)
+
+        assert api_mock.create.call_count == 1
+        assert api_mock.add_block.call_count == 1
+        assert api_mock.close.call_count == 1
+
+    def test_put_file_multipart_fallback_connection_error(self, dbfs_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with open(test_file_path, 'wt') as f:
+            f.write('test')
+
+        api_mock = dbfs_api.client
+        api_mock.client.perform_multipart_upload.side_effect = \
+            requests.exceptions.ConnectionError('Connection reset by peer')
+        api_mock.create.return_value = {'handle': 0}
+        dbfs_api.upload_mode = api.UploadMode.MULTIPART
+        dbfs_api.put_file(test_file_path, TEST_DBFS_PATH, True)
+
+        assert api_mock.create.call_count == 1
+        assert api_mock.add_block.call_count == 1
+        assert api_mock.close.call_count == 1
+
+    def test_put_file_multipart_already_exists(self, dbfs_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with open(test_file_path, 'wt') as f:
+            f.write('test')
+
+        response = requests.Response()
+        response.status_code = 400
+        response._content = b'{"error_code": "RESOURCE_ALREADY_EXISTS"}'
+        api_mock = dbfs_api.client
+        api_mock.client.perform_multipart_upload.side_effect = \
+            requests.exceptions.HTTPError(response=response)
+        dbfs_api.upload_mode = api.UploadMode.MULTIPART
+        with pytest.raises(requests.exceptions.HTTPError):
+            dbfs_api.put_file(test_file_path, TEST_DBFS_PATH, False)
+
+        assert api_mock.create.call_count == 0
+
+    def test_get_file_resume(self, dbfs_api, tmpdir):
+        contents = os.urandom(3 * api.BUFFER_SIZE_BYTES)
+        api_mock = dbfs_api.client
+        api_mock.get_status.return_value = {
+            'path': '/test',
+            'is_dir': False,
+            'file_size': len(contents)
+        }
+
+        def read(path, offset, length):
+            data = contents[offset:offset + length]
+            return {'bytes_read': len(data), 'data': b64encode(data)}
+        api_mock.read.side_effect = read
+
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        key = api._checkpoint_key(TEST_DBFS_PATH, test_file_path)
+        # An earlier attempt downloaded the second range only.
+        with open(test_file_path, 'wb') as f:
+            f.write(b'\0' * api.BUFFER_SIZE_BYTES)
+            f.write(contents[api.BUFFER_SIZE_BYTES:2 * api.BUFFER_SIZE_BYTES])
+            f.write(b'\0' * api.BUFFER_SIZE_BYTES)
+        checkpoint = CheckpointJournal(os.path.join(tmpdir.strpath, 'journal'))
+        checkpoint.range_done(key, api.BUFFER_SIZE_BYTES, len(contents))
+
+        dbfs_api.get_file(TEST_DBFS_PATH, test_file_path, False, checkpoint=checkpoint)
+
+        with open(test_file_path, 'rb') as f:
+            assert f.read() == contents
+        offsets = sorted(call[0][1] for call in api_mock.read.call_args_list)
+        assert offsets == [0, 2 * api.BUFFER_SIZE_BYTES]
+        assert checkpoint.is_file_done(key)
+        checkpoint.close()
+
+    def test_put_files_resume(self, dbfs_api, tmpdir):
+        transfers = []
+        for name in ['done', 'todo']:
+            test_file_path = os.path.join(tmpdir.strpath, name)
+            with open(test_file_path, 'wt') as f:
+                f.write('test')
+            transfers.append((test_file_path, TEST_DBFS_PATH.join(name)))
+        checkpoint = CheckpointJournal(os.path.join(tmpdir.strpath, 'journal'))
+        checkpoint.file_done(api._checkpoint_key(*transfers[0]))
+
+        failures = dbfs_api.put_files(transfers, True, checkpoint=checkpoint)
+
+        assert failures == []
+        assert dbfs_api.client.put.call_count == 1
+        assert dbfs_api.client.put.call_args[0][0] == 'dbfs:/test/todo'
+        assert checkpoint.is_file_done(api._checkpoint_key(*transfers[1]))
+        checkpoint.close()
+
+
+class FakeDbfsService(object):
+    """
+    In memory implementation of the DbfsService calls used by DbfsApi.sync and DbfsApi.walk.
+    """
+    def __init__(self):
+        self.files = {}
+        self.dirs = set()
+        self.puts = []
+        self.deletes = []
+
+    def _error(self, error_code):
+        response = requests.Response()
+        response._content = ('{"error_code": "' + error_code + '"}').encode()
+        return requests.exceptions.HTTPError(response=response)
+
+    def list(self, path):
+        path = path[len('dbfs:'):].rstrip('/')
+        if path not in self.dirs:
+            raise self._error(api.DbfsErrorCodes.RESOURCE_DOES_NOT_EXIST)
+        children = [{'path': p, 'is_dir': False, 'file_size': len(c)}
+                    for p, c in self.files.items() if os.path.dirname(p) == path]
+        children += [{'path': d, 'is_dir': True, 'file_size': 0}
+                     for d in self.dirs if d != path and os.path.dirname(d) == path]
+        return {'files': children}
+
+    def get_status(self, path):
+        path = path[len('dbfs:'):]
+        return {'path': path, 'is_dir': False, 'file_size': len(self.files[path])}
+
+    def read(self, path, offset, length):
+        if length > api.BUFFER_SIZE_BYTES:
+            raise self._error('MAX_READ_SIZE_EXCEEDED')
+        data = self.files[path[len('dbfs:'):]][offset:offset + length]
+        return {'bytes_read': len(data), 'data': b64encode(data)}
+
+    def mkdirs(self, path):
+        path = path[len('dbfs:'):]
+        while path not in ('/', ''):
+            self.dirs.add(path)
+            path = os.path.dirname(path)
+
+    def put(self, path, contents, overwrite):
+        path = path[len('dbfs:'):]
+        self.mkdirs('dbfs:' + os.path.dirname(path))
+        self.files[path] = b64decode(contents)
+        self.puts.append(path)
+
+    def delete(self, path, recursive):
+        path = path[len('dbfs:'):]
+        self.deletes.append(path)
+        self.files = {p: c for p, c in self.files.items() if not (p + '/').startswith(path + '/')}
+        self.dirs = set(d for d in self.dirs if not (d + '/').startswith(path + '/'))
+
+
+class TestDbfsSync(object):
+    @pytest.fixture()
+    def fake_dbfs(self, dbfs_api):
+        dbfs_api.client = FakeDbfsService()
+        return dbfs_api.client
+
+    def _write(self, tmpdir, relpath, contents):
+        path = os.path.join(tmpdir.strpath, 'src', *relpath.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(contents)
+        return path
+
+    def test_sync_uploads_new_files(self, dbfs_api, fake_dbfs, tmpdir):
+        self._write(tmpdir, 'a', 'a')
+        self._write(tmpdir, 'b/c', 'c')
+        os.makedirs(os.path.join(tmpdir.strpath, 'src', 'empty'))
+
+        failures = dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH)
+
+        assert failures == []
+        assert fake_dbfs.files['/test/a'] == b'a'
+        assert fake_dbfs.files['/test/b/c'] == b'c'
+        assert '/test/empty' in fake_dbfs.dirs
+        assert '/test/' + api.SYNC_MANIFEST_NAME in fake_dbfs.files
+
+    def test_sync_no_changes(self, dbfs_api, fake_dbfs, tmpdir):
+        self._write(tmpdir, 'a', 'a')
+        self._write(tmpdir, 'b/c', 'c')
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH)
+        fake_dbfs.puts = []
+
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH)
+
+        assert fake_dbfs.puts == []
+
+    def test_sync_changed_files(self, dbfs_api, fake_dbfs, tmpdir):
+        self._write(tmpdir, 'a', 'a')
+        same_size = self._write(tmpdir, 'b', 'b')
+        self._write(tmpdir, 'c', 'c')
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH)
+        fake_dbfs.puts = []
+
+        self._write(tmpdir, 'a', 'longer')
+        self._write(tmpdir, 'b', 'x')
+        os.utime(same_size, (0, 0))
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH)
+
+        assert sorted(fake_dbfs.puts) == ['/test/' + api.SYNC_MANIFEST_NAME, '/test/a', '/test/b']
+        assert fake_dbfs.files['/test/b'] == b'x'
+
+    def test_sync_without_manifest(self, dbfs_api, fake_dbfs, tmpdir):
+        self._write(tmpdir, 'a', 'new')
+        fake_dbfs.put('dbfs:/test/a', b64encode(b'old').decode(), True)
+        fake_dbfs.puts = []
+
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH)
+
+        assert fake_dbfs.files['/test/a'] == b'new'
+        fake_dbfs.puts = []
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH)
+        assert fake_dbfs.puts == []
+
+    def test_sync_checksum_skips_touched_files(self, dbfs_api, fake_dbfs, tmpdir):
+        touched = self._write(tmpdir, 'a', 'a')
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH, checksum=True)
+        fake_dbfs.puts = []
+
+        os.utime(touched, (0, 0))
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH, checksum=True)
+
+        # Only the manifest is rewritten with the new modification time.
+        assert fake_dbfs.puts == ['/test/' + api.SYNC_MANIFEST_NAME]
+
+    def test_sync_large_manifest(self, dbfs_api, fake_dbfs, tmpdir):
+        for i in range(20):
+            self._write(tmpdir, 'dir/file-{}'.format(i), str(i))
+        with mock.patch('databricks_cli.dbfs.api.BUFFER_SIZE_BYTES', 256):
+            dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH, checksum=True)
+            assert len(fake_dbfs.files['/test/' + api.SYNC_MANIFEST_NAME]) > 256
+            fake_dbfs.puts = []
+
+            dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH, checksum=True)
+
+        assert fake_dbfs.puts == []
+
+    def test_sync_delete(self, dbfs_api, fake_dbfs, tmpdir):
+        self._write(tmpdir, 'a', 'a')
+        fake_dbfs.mkdirs('dbfs:/test/old/nested')
+        fake_dbfs.put('dbfs:/test/old/nested/x', b64encode(b'x').decode(), True)
+        fake_dbfs.put('dbfs:/test/y', b64encode(b'y').decode(), True)
+
+        dbfs_api.sync(os.path.join(tmpdir.strpath, 'src'), TEST_DBFS_PATH, delete=True)
+
+        assert sorted(fake_dbfs.deletes) == ['/test/old', '/test/y']
+        assert sorted(fake_dbfs.files) == ['/test/' + api.SYNC_MANIFEST_NAME, '/test/a']
+
+
+class TestDbfsWalk(object):
+    @pytest.fixture()
+    def fake_dbfs(self, dbfs_api):
+        fake_dbfs = FakeDbfsService()
+        fake_dbfs.mkdirs('dbfs:/test/b/d')
+        fake_dbfs.mkdirs('dbfs:/test/e')
+        fake_dbfs.files['/test/a.txt'] = b'aaa'
+        fake_dbfs.files['/test/b/c.txt'] = b'cc'
+        fake_dbfs.files['/test/b/d/f.csv'] = b'ffff'
+        dbfs_api.client = fake_dbfs
+        return fake_dbfs
+
+    def test_walk(self, dbfs_api, fake_dbfs):
+        paths = [f.dbfs_path.absolute_path for f in dbfs_api.walk(TEST_DBFS_PATH, 2)]
+
+        assert sorted(paths) == ['dbfs:/test/a.txt', 'dbfs:/test/b', 'dbfs:/test/b/c.txt',
+                                 'dbfs:/test/b/d', 'dbfs:/test/b/d/f.csv', 'dbfs:/test/e']
+        # A directory is yielded before its contents.
+        assert paths.index('dbfs:/test/b') < paths.index('dbfs:/test/b/c.txt')
+        assert paths.index('dbfs:/test/b/d') < paths.index('dbfs:/test/b/d/f.csv')
+
+    def test_walk_stop_early(self, dbfs_api, fake_dbfs):
+        walk = dbfs_api.walk(TEST_DBFS_PATH, 2)
+        next(walk)
+        walk.close()
+
+    def test_disk_usage(self, dbfs_api, fake_dbfs):
+        assert dbfs_api.disk_usage(TEST_DBFS_PATH) == {'': 9, 'b': 6, 'b/d': 4, 'e': 0}
+
+    def test_find(self, dbfs_api, fake_dbfs):
+        def find(**kwargs):
+            return sorted(f.dbfs_path.absolute_path
+                          for f in dbfs_api.find(TEST_DBFS_PATH, **kwargs))
+
+        assert find(name='*.txt') == ['dbfs:/test/a.txt', 'dbfs:/test/b/c.txt']
+        assert find(min_size=3) == ['dbfs:/test/a.txt', 'dbfs:/test/b/d/f.csv']
+        assert find(name='*.txt', min_size=3) == ['dbfs:/test/a.txt']
+        assert find(name='[bd]') == ['dbfs:/test/b', 'dbfs:/test/b/d']
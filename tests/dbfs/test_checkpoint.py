@@ -0,0 +1,81 @@
+# Databricks CLI
+# Copyright 2018 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from databricks_cli.dbfs.checkpoint import CheckpointJournal
+from databricks_cli.configure import provider
+
+TEST_KEY = 'dbfs:/test -> /tmp/test'
+
+
+def test_checkpoint_round_trip(tmpdir):
+    path = os.path.join(tmpdir.strpath, 'journal')
+    checkpoint = CheckpointJournal(path)
+    checkpoint.file_done('a -> b')
+    checkpoint.range_done(TEST_KEY, 0, 10)
+    checkpoint.range_done(TEST_KEY, 5, 10)
+    checkpoint.close()
+
+    checkpoint = CheckpointJournal(path)
+    assert checkpoint.is_file_done('a -> b')
+    assert not checkpoint.is_file_done(TEST_KEY)
+    assert checkpoint.has_ranges(TEST_KEY)
+    assert checkpoint.completed_ranges(TEST_KEY, 10) == {0, 5}
+    # The ranges were read from a file of another size.
+    assert checkpoint.completed_ranges(TEST_KEY, 11) == set()
+    checkpoint.close()
+
+
+def test_checkpoint_ignores_partial_lines(tmpdir):
+    path = os.path.join(tmpdir.strpath, 'journal')
+    with open(path, 'w') as f:
+        f.write('{"file": "a -> b"}\n{"range": "dbfs:/te')
+    checkpoint = CheckpointJournal(path)
+    assert checkpoint.is_file_done('a -> b')
+    assert not checkpoint.has_ranges(TEST_KEY)
+    checkpoint.close()
+
+
+def test_checkpoint_discards_ranges_of_changed_file(tmpdir):
+    path = os.path.join(tmpdir.strpath, 'journal')
+    checkpoint = CheckpointJournal(path)
+    checkpoint.range_done(TEST_KEY, 0, 10)
+    checkpoint.range_done(TEST_KEY, 0, 20)
+    checkpoint.close()
+
+    checkpoint = CheckpointJournal(path)
+    assert checkpoint.completed_ranges(TEST_KEY, 10) == set()
+    assert checkpoint.completed_ranges(TEST_KEY, 20) == {0}
+    checkpoint.close()
+
+
+def test_for_transfer(tmpdir):
+    provider._home = tmpdir.strpath
+    checkpoint = CheckpointJournal.for_transfer('/tmp/src', 'dbfs:/dst')
+    checkpoint.file_done('a -> b')
+    assert os.path.dirname(checkpoint.path) == \
+        os.path.join(tmpdir.strpath, '.databricks_checkpoints')
+    assert CheckpointJournal.for_transfer('/tmp/src', 'dbfs:/dst').path == checkpoint.path
+    checkpoint.remove()
+    assert not os.path.exists(checkpoint.path)
@@ -39,28 +39,38 @@ def jobs_api():
 
 
 @provide_conf
-def test_list_jobs_by_name(jobs_api):
-    test_job_name = 'test job'
-    test_job_alt_name = 'test job alt'
-    test_job = {'settings': {'name': test_job_name}}
-    test_job_alt = {'settings': {'name': test_job_alt_name}}
-    jobs_api.list_jobs = mock.MagicMock()
+def test_get_jobs_by_name(jobs_api):
+    test_job = {'job_id': 1, 'settings': {'name': 'test job'}}
+    test_job_alt = {'job_id': 2, 'settings': {'name': 'test job alt'}}
+    jobs_api.list_jobs = mock.MagicMock(return_value={'jobs': [test_job, test_job_alt]})
+    jobs_api.client = mock.MagicMock()
+    jobs_api.client.client.perform_query.return_value = {'job_id': 3}
 
-    jobs_api.list_jobs.return_value = {'jobs': []}
-    res = jobs_api._list_jobs_by_name(test_job_name)
-    assert len(res) == 0
+    assert jobs_api.get_jobs_by_name('test job') == [test_job]
+    assert jobs_api.get_jobs_by_name('test job alt') == [test_job_alt]
+    assert jobs_api.get_jobs_by_name('missing') == []
+    # The index is built from a single list.
+    assert jobs_api.list_jobs.call_count == 1
 
-    jobs_api.list_jobs.return_value = {'jobs': [test_job_alt]}
-    res = jobs_api._list_jobs_by_name(test_job_name)
-    assert len(res) == 0
+    # Creating a job invalidates its name only.
+    created_job = {'job_id': 3, 'settings': {'name': 'new job'}}
+    jobs_api.create_job({'name': 'new job'})
+    assert jobs_api.get_jobs_by_name('test job') == [test_job]
+    assert jobs_api.list_jobs.call_count == 1
+    jobs_api.list_jobs.return_value = {'jobs': [test_job, test_job_alt, created_job]}
+    assert jobs_api.get_jobs_by_name('new job') == [created_job]
+    assert jobs_api.list_jobs.call_count == 2
 
-    jobs_api.list_jobs.return_value = {'jobs': [test_job, test_job_alt]}
-    res = jobs_api._list_jobs_by_name(test_job_name)
-    assert len(res) == 1
-    assert res[0]['settings']['name'] == test_job_name
+    # Renaming a job invalidates both its old and its new name.
+    renamed_job = {'job_id': 2, 'settings': {'name': 'test job'}}
+    jobs_api.reset_job({'job_id': 2, 'new_settings': {'name': 'test job'}})
+    jobs_api.list_jobs.return_value = {'jobs': [test_job, renamed_job, created_job]}
+    assert jobs_api.get_jobs_by_name('test job alt') == []
+    assert jobs_api.get_jobs_by_name('test job') == [test_job, renamed_job]
+    assert jobs_api.list_jobs.call_count == 3
 
-    jobs_api.list_jobs.return_value = {'jobs': [test_job, test_job_alt, test_job]}
-    res = jobs_api._list_jobs_by_name(test_job_name)
-    assert len(res) == 2
-    assert res[0]['settings']['name'] == test_job_name
-    assert res[1]['settings']['name'] == test_job_name
+    # Deleting a job invalidates its name.
+    jobs_api.delete_job(3)
+    jobs_api.list_jobs.return_value = {'jobs': [test_job, renamed_job]}
+    assert jobs_api.get_jobs_by_name('new job') == []
+    assert jobs_api.list_jobs.call_count == 4
@@ -123,6 +123,30 @@ def test_list_jobs_output_json(jobs_api_mock):
         assert echo_mock.call_args[0][0] == pretty_format(LIST_RETURN)
 
 
+@provide_conf
+def test_get_cli_name(jobs_api_mock):
+    job = LIST_RETURN['jobs'][0]
+    with mock.patch('databricks_cli.jobs.cli.click.echo') as echo_mock:
+        jobs_api_mock.get_jobs_by_name.return_value = [job]
+        runner = CliRunner()
+        runner.invoke(cli.get_cli, ['--name', 'b'])
+        assert jobs_api_mock.get_jobs_by_name.call_args[0][0] == 'b'
+        assert echo_mock.call_args[0][0] == pretty_format(job)
+        jobs_api_mock.get_job.assert_not_called()
+
+
+@provide_conf
+def test_get_cli_name_not_unique(jobs_api_mock):
+    jobs_api_mock.get_jobs_by_name.return_value = []
+    runner = CliRunner()
+    res = runner.invoke(cli.get_cli, ['--name', 'b'])
+    assert res.exit_code != 0
+
+    jobs_api_mock.get_jobs_by_name.return_value = LIST_RETURN['jobs'][:2]
+    res = runner.invoke(cli.get_cli, ['--name', 'b'])
+    assert res.exit_code != 0
+
+
 RUN_NOW_RETURN = {
     "number_in_job": 1,
     "run_id": 1
@@ -0,0 +1,107 @@
+# Databricks CLI
+# Copyright 2017 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint:disable=redefined-outer-name
+
+import threading
+
+import mock
+import pytest
+
+from databricks_cli.runs.api import RunsApi
+
+
+@pytest.fixture()
+def runs_api():
+    runs_api = RunsApi(None)
+    runs_api.list_runs = mock.MagicMock()
+    yield runs_api
+
+
+def _pages(run_ids, page_size):
+    """
+    Returns a list_runs side effect that lists runs with the given ids in pages.
+    """
+    def list_runs(job_id, active_only, completed_only, offset, limit):
+        assert limit == page_size
+        runs = [{'run_id': run_id} for run_id in run_ids[offset:offset + limit]]
+        return {'runs': runs, 'has_more': offset + limit < len(run_ids)}
+    return list_runs
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_iter_runs(runs_api, prefetch):
+    run_ids = list(range(25, 0, -1))
+    runs_api.list_runs.side_effect = _pages(run_ids, 10)
+    runs = runs_api.iter_runs(job_id=1, page_size=10, prefetch=prefetch)
+    assert [run['run_id'] for run in runs] == run_ids
+    assert [c[0][3] for c in runs_api.list_runs.call_args_list] == [0, 10, 20]
+    assert all(c[0][0] == 1 for c in runs_api.list_runs.call_args_list)
+
+
+def test_iter_runs_empty(runs_api):
+    runs_api.list_runs.return_value = {'has_more': False}
+    assert list(runs_api.iter_runs(offset=5)) == []
+    assert runs_api.list_runs.call_args[0][3] == 5
+
+
+def test_iter_runs_lazy(runs_api):
+    runs_api.list_runs.side_effect = _pages(list(range(25, 0, -1)), 10)
+    runs = runs_api.iter_runs(page_size=10)
+    next(runs)
+    assert runs_api.list_runs.call_count == 1
+
+
+def test_iter_runs_prefetch(runs_api):
+    """
+    With prefetch, the next page is requested while the current page is consumed.
+    """
+    second_page_requested = threading.Event()
+    list_runs = _pages(list(range(25, 0, -1)), 10)
+
+    def side_effect(job_id, active_only, completed_only, offset, limit):
+        if offset == 10:
+            second_page_requested.set()
+        return list_runs(job_id, active_only, completed_only, offset, limit)
+
+    runs_api.list_runs.side_effect = side_effect
+    runs = runs_api.iter_runs(page_size=10, prefetch=True)
+    next(runs)
+    assert second_page_requested.wait(5)
+
+
+def test_iter_runs_new_runs(runs_api):
+    """
+    Runs started during the listing shift the pages, and the runs listed twice are skipped.
+    """
+    run_ids = list(range(25, 0, -1))
+    list_runs = _pages(run_ids, 10)
+
+    def side_effect(job_id, active_only, completed_only, offset, limit):
+        page = list_runs(job_id, active_only, completed_only, offset, limit)
+        if offset == 0:
+            run_ids[:0] = [27, 26]
+        return page
+
+    runs_api.list_runs.side_effect = side_effect
+    assert [run['run_id'] for run in runs_api.iter_runs(page_size=10)] == list(range(25, 0, -1))
@@ -105,3 +105,27 @@ def test_cancel_cli(runs_api_mock):
         runner.invoke(cli.cancel_cli, ['--run-id', 1])
         assert runs_api_mock.cancel_run.call_args[0][0] == 1
         assert echo_mock.call_args[0][0] == pretty_format({})
+
+
+@provide_conf
+def test_list_runs_output_ndjson(runs_api_mock):
+    runs_api_mock.list_runs.return_value = LIST_RETURN
+    runner = CliRunner()
+    res = runner.invoke(cli.list_cli, ['--output', 'ndjson'])
+    assert [json.loads(line) for line in res.output.splitlines()] == LIST_RETURN['runs']
+
+
+@provide_conf
+def test_list_runs_all(runs_api_mock):
+    runs = [{'run_id': 2, 'run_name': 'b'}, {'run_id': 1, 'run_name': 'a'}]
+    runs_api_mock.iter_runs.return_value = iter(runs)
+    runner = CliRunner()
+    res = runner.invoke(cli.list_cli, ['--all', '--job-id', '1', '--output', 'ndjson'])
+    assert [json.loads(line) for line in res.output.splitlines()] == runs
+    assert runs_api_mock.iter_runs.call_args[0][0] == 1
+    assert runs_api_mock.iter_runs.call_args[1]['prefetch'] is True
+    runs_api_mock.list_runs.assert_not_called()
+
+    runs_api_mock.iter_runs.return_value = iter(runs)
+    res = runner.invoke(cli.list_cli, ['--all'])
+    assert res.output.splitlines() == ['2\tb\tn/a\tn/a\tn/a', '1\ta\tn/a\tn/a\tn/a']
@@ -21,7 +21,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from databricks_cli.sdk.api_client import ApiClient
+import io
+import json
+import threading
+import warnings
+
+import mock
+import pytest
+import requests
+from six.moves import BaseHTTPServer, socketserver
+
+from databricks_cli.sdk.api_client import ApiClient, MultipartFileBody, RetryPolicy, TokenBucket
+from databricks_cli.sdk.api_client import exceptions
 
 
 def test_api_client_constructor():
@@ -29,3 +40,248 @@ def test_api_client_constructor():
     client = ApiClient(user='apple', password='banana', host='https://databricks.com')
     # echo -n "apple:banana" | base64
     assert client.default_headers['Authorization'] == 'Basic YXBwbGU6YmFuYW5h'
+
+
+def test_multipart_file_body():
+    contents = b'x' * 100000
+    body = MultipartFileBody({'path': '/test'}, 'contents', io.BytesIO(contents), len(contents))
+    data = b''.join(body)
+
+    assert len(data) == len(body)
+    assert body.content_type == 'multipart/form-data; boundary={}'.format(body.boundary)
+    assert data.startswith('--{}\r\n'.format(body.boundary).encode())
+    assert b'Content-Disposition: form-data; name="path"\r\n\r\n/test\r\n' in data
+    assert b'name="contents"; filename="contents"' in data
+    assert b'\r\n\r\n' + contents + '\r\n--{}--\r\n'.format(body.boundary).encode() in data
+
+
+def _response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b'{}'
+    response.raw = io.BytesIO()
+    return response
+
+
+@pytest.fixture()
+def client():
+    client = ApiClient(host='https://databricks.com', token='token')
+    with mock.patch.object(client, 'session'), \
+            mock.patch('databricks_cli.sdk.api_client.time.sleep') as sleep:
+        client.sleep = sleep
+        yield client
+
+
+def test_insecure_request_warning_ignored_during_requests_only():
+    filters = list(warnings.filters)
+    client = ApiClient(host='https://databricks.com', token='token', verify=False)
+
+    def request(*args, **kwargs):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.warn('unverified', exceptions.InsecureRequestWarning)
+        assert caught == []
+        return _response(200)
+
+    with mock.patch.object(client, 'session') as session:
+        session.request.side_effect = request
+        client.perform_query('GET', '/test')
+
+    assert warnings.filters == filters
+
+
+def test_perform_query_retries_throttled_requests(client):
+    client.session.request.side_effect = [_response(429, {'Retry-After': '7'}), _response(503),
+                                          _response(200)]
+
+    assert client.perform_query('POST', '/jobs/create') == {}
+    assert client.session.request.call_count == 3
+    assert client.sleep.call_args_list[0] == mock.call(7.0)
+
+
+def test_perform_query_retries_server_errors_of_idempotent_requests(client):
+    client.session.request.side_effect = [_response(500), requests.exceptions.ConnectionError(),
+                                          _response(200)]
+
+    assert client.perform_query('GET', '/jobs/list') == {}
+    assert client.session.request.call_count == 3
+
+
+def test_perform_query_does_not_replay_non_idempotent_requests(client):
+    client.session.request.side_effect = [_response(500)]
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.perform_query('POST', '/jobs/create')
+
+    client.session.request.side_effect = [requests.exceptions.ConnectionError()]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.perform_query('POST', '/jobs/run-now')
+
+    client.session.request.side_effect = [_response(500), _response(200)]
+    assert client.perform_query('POST', '/jobs/reset') == {}
+
+
+def test_perform_query_gives_up_after_max_retries(client):
+    client.retry_policy = RetryPolicy(max_retries=2)
+    client.session.request.return_value = _response(429)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.perform_query('GET', '/jobs/list')
+    assert client.session.request.call_count == 3
+
+
+def test_perform_query_does_not_retry_client_errors(client):
+    client.session.request.return_value = _response(400)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.perform_query('GET', '/jobs/list')
+    assert client.session.request.call_count == 1
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+
+    for attempt in range(1, 10):
+        assert 0 <= policy.backoff(attempt) <= min(5, 2 ** attempt)
+    assert policy.backoff(1, _response(429, {'Retry-After': '2'})) == 2
+    date = 'Thu, 01 Jan 1970 00:00:00 GMT'
+    assert policy.backoff(1, _response(429, {'Retry-After': date})) == 0
+
+
+def test_token_bucket():
+    with mock.patch('databricks_cli.sdk.api_client.time') as time:
+        time.time.return_value = 100.0
+        bucket = TokenBucket(rate=10, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+        assert not time.sleep.called
+
+        bucket.acquire()
+        time.sleep.assert_called_once_with(pytest.approx(0.1))
+
+        bucket.throttled()
+        assert bucket.rate == 5
+        for _ in range(100):
+            bucket.succeeded()
+        assert bucket.rate == 10
+
+
+class _StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # A handler serves every request of one connection.
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length).decode('utf-8'))
+        if request.get('hold'):
+            # Holds the requests until hold of them are in flight at once.
+            with self.server.lock:
+                self.server.held += 1
+                if self.server.held == request['hold']:
+                    self.server.all_held.set()
+            self.server.all_held.wait(10)
+        body = json.dumps({'echo': request['id']}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # NOQA
+        pass
+
+
+class _StubServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture()
+def stub_server():
+    server = _StubServer(('127.0.0.1', 0), _StubHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.held = 0
+    server.all_held = threading.Event()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _run_threads(threads_count, target):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_api_client_shared_between_threads(stub_server):
+    threads_count = 64
+    requests_per_thread = 10
+    client = ApiClient(host='http://127.0.0.1:{}'.format(stub_server.server_address[1]),
+                       token='token', pool_maxsize=threads_count)
+    errors = []
+    start = threading.Barrier(threads_count) if hasattr(threading, 'Barrier') else None
+
+    def open_connection(thread_id):
+        response = client.perform_query('GET', '/stub',
+                                        data={'id': thread_id, 'hold': threads_count})
+        assert response == {'echo': thread_id}
+
+    def hammer(thread_id):
+        if start is not None:
+            start.wait()
+        try:
+            for i in range(requests_per_thread):
+                request_id = '{}-{}'.format(thread_id, i)
+                response = client.perform_query('GET', '/stub', data={'id': request_id})
+                assert response == {'echo': request_id}
+        except Exception as e: # NOQA
+            errors.append(e)
+
+    # Fills the pool with a connection per thread, which the server holds open all at once.
+    _run_threads(threads_count, open_connection)
+    assert stub_server.connections == threads_count
+    _run_threads(threads_count, hammer)
+
+    assert errors == []
+    # Every connection was kept in the pool and reused rather than reopened for each request.
+    assert stub_server.connections == threads_count
+
+
+def test_perform_download(client):
+    contents = b'x' * 200000
+    response = _response(200)
+    response.raw = io.BytesIO(contents)
+    client.session.request.return_value = response
+    f = io.BytesIO()
+
+    client.perform_download('/workspace/export', {'path': '/a', 'direct_download': True}, f)
+
+    assert f.getvalue() == contents
+    assert client.session.request.call_args[1]['stream'] is True
+    assert json.loads(client.session.request.call_args[1]['data']) == \
+        {'path': '/a', 'direct_download': True}
+
+
+def test_perform_download_error(client):
+    error = b'{"error_code": "RESOURCE_DOES_NOT_EXIST", "message": "Path (/a) doesn\'t exist."}'
+    response = _response(404)
+    response._content = False
+    response.raw = io.BytesIO(error)
+    client.session.request.return_value = response
+    f = io.BytesIO()
+
+    with pytest.raises(requests.exceptions.HTTPError) as e:
+        client.perform_download('/workspace/export', {'path': '/a', 'direct_download': True}, f)
+
+    assert e.value.response.content == error
+    assert e.value.response.json()['error_code'] == 'RESOURCE_DOES_NOT_EXIST'
+    assert f.getvalue() == b''
@@ -0,0 +1,174 @@
+# Databricks CLI
+# Copyright 2017 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import inspect
+import json
+
+import pytest
+import requests
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web # NOQA
+
+from databricks_cli.sdk import service # NOQA
+from databricks_cli.sdk.api_client import RetryPolicy # NOQA
+from databricks_cli.sdk.async_api_client import AsyncApiClient # NOQA
+from databricks_cli.sdk import async_service # NOQA
+
+
+def _run(coroutine_function):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine_function())
+    finally:
+        loop.close()
+
+
+class StubServer(object):
+    """
+    Echoes the path and the JSON body of the requests, after failing them with the statuses
+    queued in failures.
+    """
+    def __init__(self):
+        self.failures = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            if self.failures:
+                status = self.failures.pop(0)
+                return web.json_response({'error_code': str(status)}, status=status,
+                                         headers={'Retry-After': '0'})
+            body = json.loads((await request.read()).decode('utf-8'))
+            return web.json_response({'method': request.method, 'path': request.path,
+                                      'data': body})
+        finally:
+            self.in_flight -= 1
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return 'http://127.0.0.1:{}'.format(port)
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def test_perform_query_concurrently():
+    server = StubServer()
+
+    async def test():
+        host = await server.start()
+        try:
+            async with AsyncApiClient(host=host, token='token', max_connections=50) as client:
+                results = await asyncio.gather(*[
+                    client.perform_query('GET', '/jobs/get', data={'job_id': i})
+                    for i in range(2000)])
+        finally:
+            await server.stop()
+        return results
+
+    results = _run(test)
+
+    assert [r['data']['job_id'] for r in results] == list(range(2000))
+    assert results[0]['path'] == '/api/2.0/jobs/get'
+    assert server.max_in_flight <= 50
+
+
+def test_perform_query_retries_and_raises_http_errors():
+    server = StubServer()
+
+    async def test():
+        host = await server.start()
+        try:
+            async with AsyncApiClient(host=host, token='token') as client:
+                server.failures = [429, 503]
+                result = await client.perform_query('POST', '/jobs/create', data={'name': 'a'})
+
+                server.failures = [500]
+                with pytest.raises(requests.exceptions.HTTPError) as e:
+                    await client.perform_query('POST', '/jobs/create', data={'name': 'a'})
+                error = e.value.response.json()
+
+                client.retry_policy = RetryPolicy(max_retries=0)
+                server.failures = [429]
+                with pytest.raises(requests.exceptions.HTTPError):
+                    await client.perform_query('GET', '/jobs/list')
+        finally:
+            await server.stop()
+        return result, error
+
+    result, error = _run(test)
+
+    assert result['data'] == {'name': 'a'}
+    assert error == {'error_code': '500'}
+    assert server.requests == 5
+
+
+def test_perform_query_connection_error():
+    async def test():
+        async with AsyncApiClient(host='http://127.0.0.1:1', token='token',
+                                  retry_policy=RetryPolicy(max_retries=0)) as client:
+            await client.perform_query('GET', '/jobs/list')
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        _run(test)
+
+
+def test_async_services_cover_every_service():
+    service_classes = [c for _, c in inspect.getmembers(service, inspect.isclass)
+                       if c.__module__ == service.__name__]
+    for service_class in service_classes:
+        async_class = getattr(async_service, 'Async' + service_class.__name__)
+        assert issubclass(async_class, service_class)
+        for name, method in inspect.getmembers(service_class, inspect.isfunction):
+            if not name.startswith('_'):
+                assert inspect.iscoroutinefunction(getattr(async_class, name)), name
+
+
+def test_async_service():
+    server = StubServer()
+
+    async def test():
+        host = await server.start()
+        try:
+            async with AsyncApiClient(host=host, token='token') as client:
+                return await async_service.AsyncJobsService(client).get_job(1)
+        finally:
+            await server.stop()
+
+    result = _run(test)
+
+    assert result == {'method': 'GET', 'path': '/api/2.0/jobs/get', 'data': {'job_id': 1}}
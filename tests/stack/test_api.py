@@ -26,13 +26,17 @@
 # pylint:disable=unused-argument
 
 import os
+import copy
 import json
+import threading
+
 import mock
 from requests.exceptions import HTTPError
 
 import pytest
 
 import databricks_cli.stack.api as api
+from databricks_cli.utils import TransferFailure
 from databricks_cli.stack.exceptions import StackError
 
 TEST_STACK_PATH = 'stack/stack.json'
@@ -99,25 +103,30 @@ class _TestJobsClient(object):
             # Job created is not found.
             raise HTTPError('Job not Found')
         else:
-            return self.jobs_in_databricks[job_id]
+            # Unlike the list, get also returns the user the job runs as.
+            return dict(copy.deepcopy(self.jobs_in_databricks[job_id]),
+                        run_as_user_name='testuser@example.com')
 
     def reset_job(self, data):
         if data['job_id'] not in self.jobs_in_databricks:
             raise HTTPError('Job Not Found')
-        self.jobs_in_databricks[data['job_id']]['job_settings'] = data['new_settings']
+        self.jobs_in_databricks[data['job_id']]['settings'] = data['new_settings']
 
     def create_job(self, job_settings):
         job_id = self.available_job_id.pop()
         new_job_json = {'job_id': job_id,
-                        'job_settings': job_settings.copy(),
+                        'settings': job_settings.copy(),
                         'creator_user_name': 'testuser@example.com',
                         'created_time': 987654321}
         self.jobs_in_databricks[job_id] = new_job_json
         return new_job_json
 
-    def _list_jobs_by_name(self, job_name):
+    def list_jobs(self):
+        return {'jobs': copy.deepcopy(list(self.jobs_in_databricks.values()))}
+
+    def get_jobs_by_name(self, job_name):
         return [job for job in self.jobs_in_databricks.values()
-                if job['job_settings']['name'] == job_name]
+                if job['settings']['name'] == job_name]
 
 
 @pytest.fixture()
@@ -208,29 +217,27 @@ class TestStackApi(object):
         stack_api.jobs_client = _TestJobsClient()
         # TEST CASE 1:
         # stack_api._deploy_job should create job if physical_id not given job doesn't exist
-        res_physical_id_1, res_deploy_output_1 = stack_api._deploy_job(test_job_settings)
-        assert stack_api.jobs_client.get_job(res_physical_id_1['job_id']) == res_deploy_output_1
-        assert res_deploy_output_1['job_id'] == res_physical_id_1['job_id']
-        assert test_job_settings == res_deploy_output_1['job_settings']
+        res_physical_id_1 = stack_api._deploy_job(test_job_settings)
+        res_deploy_output_1 = stack_api.jobs_client.get_job(res_physical_id_1['job_id'])
+        assert test_job_settings == res_deploy_output_1['settings']
 
         # TEST CASE 2:
         # stack_api._deploy_job should reset job if physical_id given.
-        res_physical_id_2, res_deploy_output_2 = stack_api._deploy_job(alt_test_job_settings,
-                                                                       res_physical_id_1)
+        res_physical_id_2 = stack_api._deploy_job(alt_test_job_settings, res_physical_id_1)
+        res_deploy_output_2 = stack_api.jobs_client.get_job(res_physical_id_2['job_id'])
         # physical job id not changed from last update
         assert res_physical_id_2['job_id'] == res_physical_id_1['job_id']
-        assert res_deploy_output_2['job_id'] == res_physical_id_2['job_id']
-        assert alt_test_job_settings == res_deploy_output_2['job_settings']
+        assert alt_test_job_settings == res_deploy_output_2['settings']
 
         # TEST CASE 3:
         # stack_api._deploy_job should reset job if a physical_id not given, but job with same name
         # found
         alt_test_job_settings['new_property'] = 'new_property_value'
-        res_physical_id_3, res_deploy_output_3 = stack_api._deploy_job(alt_test_job_settings)
+        res_physical_id_3 = stack_api._deploy_job(alt_test_job_settings)
+        res_deploy_output_3 = stack_api.jobs_client.get_job(res_physical_id_3['job_id'])
         # physical job id not changed from last update
         assert res_physical_id_3['job_id'] == res_physical_id_2['job_id']
-        assert res_deploy_output_3['job_id'] == res_physical_id_3['job_id']
-        assert alt_test_job_settings == res_deploy_output_3['job_settings']
+        assert alt_test_job_settings == res_deploy_output_3['settings']
 
         # TEST CASE 4
         # If a physical_id is not given but there is already multiple jobs of the same name in
@@ -238,7 +245,7 @@ class TestStackApi(object):
         # Add new job with different physical id but same name settings as alt_test_job_settings
         stack_api.jobs_client.jobs_in_databricks[123] = {
             'job_id': 123,
-            'job_settings': alt_test_job_settings
+            'settings': alt_test_job_settings
         }
         with pytest.raises(StackError):
             stack_api._deploy_job(alt_test_job_settings)
@@ -248,12 +255,9 @@ class TestStackApi(object):
             stack_api._deploy_workspace should call certain workspace client functions depending
             on object_type and error when object_type is defined incorrectly.
         """
-        test_deploy_output = {'test': 'test'}  # default deploy_output return value
-
         stack_api.workspace_client.client = mock.MagicMock()
-        stack_api.workspace_client.client.get_status.return_value = test_deploy_output
         stack_api.workspace_client.import_workspace = mock.MagicMock()
-        stack_api.workspace_client.import_workspace_dir = mock.MagicMock()
+        stack_api.workspace_client.import_workspace_dir = mock.MagicMock(return_value=[])
 
         test_workspace_nb_properties = TEST_WORKSPACE_NB_PROPERTIES.copy()
         test_workspace_nb_properties.update(
@@ -267,7 +271,7 @@ class TestStackApi(object):
                                          test_workspace_dir_properties['source_path'])})
         os.makedirs(test_workspace_dir_properties['source_path'])
 
-        dir_physical_id, dir_deploy_output = \
+        dir_physical_id = \
             stack_api._deploy_workspace(test_workspace_dir_properties, None, True)
         stack_api.workspace_client.import_workspace_dir.assert_called_once()
         assert stack_api.workspace_client.import_workspace_dir.call_args[0][0] == \
@@ -275,9 +279,8 @@ class TestStackApi(object):
         assert stack_api.workspace_client.import_workspace_dir.call_args[0][1] == \
             test_workspace_dir_properties['path']
         assert dir_physical_id == {'path': test_workspace_dir_properties['path']}
-        assert dir_deploy_output == test_deploy_output
 
-        nb_physical_id, nb_deploy_output = \
+        nb_physical_id = \
             stack_api._deploy_workspace(test_workspace_nb_properties, None, True)
         stack_api.workspace_client.import_workspace.assert_called_once()
         assert stack_api.workspace_client.import_workspace.call_args[0][0] == \
@@ -285,7 +288,6 @@ class TestStackApi(object):
         assert stack_api.workspace_client.import_workspace.call_args[0][1] == \
             test_workspace_nb_properties['path']
         assert nb_physical_id == {'path': test_workspace_nb_properties['path']}
-        assert nb_deploy_output == test_deploy_output
 
         # Should raise error if resource object_type doesn't match actually is in filesystem.
         test_workspace_dir_properties.update({'object_type': 'NOTEBOOK'})
@@ -305,13 +307,14 @@ class TestStackApi(object):
         # A job resource should have _deploy_resource call on _deploy_job
         stack_api._deploy_job = mock.MagicMock()
         test_job_physical_id = {'job_id': 12345}
-        stack_api._deploy_job.return_value = (test_job_physical_id, {})
+        stack_api._deploy_job.return_value = test_job_physical_id
         test_job_resource_status = {api.RESOURCE_PHYSICAL_ID: test_job_physical_id}
         new_resource_status = stack_api._deploy_resource(TEST_JOB_RESOURCE,
                                                          resource_status=test_job_resource_status)
         assert api.RESOURCE_ID in new_resource_status
         assert api.RESOURCE_PHYSICAL_ID in new_resource_status
-        assert api.RESOURCE_DEPLOY_OUTPUT in new_resource_status
+        # The deploy output is added by deploy_config once all resources are deployed.
+        assert api.RESOURCE_DEPLOY_OUTPUT not in new_resource_status
         assert api.RESOURCE_SERVICE in new_resource_status
         stack_api._deploy_job.assert_called()
         assert stack_api._deploy_job.call_args[0][0] == TEST_JOB_RESOURCE[api.RESOURCE_PROPERTIES]
@@ -320,7 +323,7 @@ class TestStackApi(object):
         # A workspace resource should have _deploy_resource call on _deploy_workspace
         stack_api._deploy_workspace = mock.MagicMock()
         test_workspace_physical_id = {'path': '/test/path'}
-        stack_api._deploy_workspace.return_value = (test_workspace_physical_id, {})
+        stack_api._deploy_workspace.return_value = test_workspace_physical_id
         test_workspace_resource_status = {api.RESOURCE_PHYSICAL_ID: test_workspace_physical_id}
         stack_api._deploy_resource(TEST_WORKSPACE_NB_RESOURCE,
                                    resource_status=test_workspace_resource_status,
@@ -338,3 +341,341 @@ class TestStackApi(object):
         }
         with pytest.raises(StackError):
             stack_api._deploy_resource(resource_badtype)
+
+    def test_validate_config_depends_on(self, stack_api):
+        """
+            stack_api._validate_config should raise a StackError when a resource depends on a
+            resource that is not in the stack or when the dependencies form a cycle.
+        """
+        def _resource(resource_id, depends_on=None):
+            resource = {api.RESOURCE_ID: resource_id,
+                        api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+                        api.RESOURCE_PROPERTIES: {'name': resource_id}}
+            if depends_on is not None:
+                resource[api.RESOURCE_DEPENDS_ON] = depends_on
+            return resource
+
+        stack_api._validate_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: [
+            _resource('a'), _resource('b', ['a']), _resource('c', ['a', 'b'])]})
+        with pytest.raises(StackError):
+            stack_api._validate_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: [
+                _resource('a', ['missing'])]})
+        with pytest.raises(StackError):
+            stack_api._validate_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: [
+                _resource('a', 'b'), _resource('b')]})
+        with pytest.raises(StackError):
+            stack_api._validate_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: [
+                _resource('a', ['c']), _resource('b', ['a']), _resource('c', ['b'])]})
+        with pytest.raises(StackError):
+            stack_api._validate_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: [
+                _resource('a', ['a'])]})
+
+    def test_deploy_config_depends_on(self, stack_api):
+        """
+            stack_api.deploy_config should deploy a resource only after the resources it depends
+            on, and store the resource statuses in the order of the resources in the config.
+        """
+        resources = [
+            {api.RESOURCE_ID: 'job', api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+             api.RESOURCE_PROPERTIES: {}, api.RESOURCE_DEPENDS_ON: ['notebook', 'directory']},
+            {api.RESOURCE_ID: 'notebook', api.RESOURCE_SERVICE: api.WORKSPACE_SERVICE,
+             api.RESOURCE_PROPERTIES: {}},
+            {api.RESOURCE_ID: 'directory', api.RESOURCE_SERVICE: api.WORKSPACE_SERVICE,
+             api.RESOURCE_PROPERTIES: {}},
+        ]
+        deployed = []
+        lock = threading.Lock()
+
+        def _deploy_resource(resource_config, resource_status=None, **kwargs):
+            with lock:
+                deployed.append(resource_config[api.RESOURCE_ID])
+            return {api.RESOURCE_ID: resource_config[api.RESOURCE_ID],
+                    api.RESOURCE_SERVICE: resource_config[api.RESOURCE_SERVICE],
+                    api.RESOURCE_PHYSICAL_ID: {}}
+
+        stack_api._deploy_resource = mock.Mock(wraps=_deploy_resource)
+        status = stack_api.deploy_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: resources},
+                                         parallelism=4)
+        assert deployed[-1] == 'job'
+        assert [s[api.RESOURCE_ID] for s in status[api.STACK_DEPLOYED]] == \
+            ['job', 'notebook', 'directory']
+        assert status[api.STACK_RESOURCES] == resources
+
+    def test_deploy_config_concurrent(self, stack_api):
+        """
+            stack_api.deploy_config should deploy independent resources concurrently and, when a
+            resource fails, raise its error without starting the resources that depend on it.
+        """
+        resources = [{api.RESOURCE_ID: str(i), api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+                      api.RESOURCE_PROPERTIES: {}} for i in range(4)]
+        barrier = threading.Event()
+        running = []
+        lock = threading.Lock()
+
+        def _deploy_resource(resource_config, resource_status=None, **kwargs):
+            with lock:
+                running.append(resource_config[api.RESOURCE_ID])
+                if len(running) == 4:
+                    barrier.set()
+            # Only returns if all four resources are being deployed at the same time.
+            assert barrier.wait(5)
+            return {api.RESOURCE_ID: resource_config[api.RESOURCE_ID],
+                    api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+                    api.RESOURCE_PHYSICAL_ID: {}}
+
+        stack_api._deploy_resource = mock.Mock(wraps=_deploy_resource)
+        status = stack_api.deploy_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: resources},
+                                         parallelism=4)
+        assert len(status[api.STACK_DEPLOYED]) == 4
+
+        resources.append({api.RESOURCE_ID: 'dependent', api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+                          api.RESOURCE_PROPERTIES: {}, api.RESOURCE_DEPENDS_ON: ['0']})
+        stack_api._deploy_resource = mock.Mock(side_effect=StackError('failed'))
+        with pytest.raises(StackError):
+            stack_api.deploy_config({api.STACK_NAME: 'test', api.STACK_RESOURCES: resources})
+        deployed_ids = [c[0][0][api.RESOURCE_ID] for c in stack_api._deploy_resource.call_args_list]
+        assert 'dependent' not in deployed_ids
+
+    def test_deploy_workspace_dir_failures(self, stack_api, tmpdir):
+        """
+            stack_api._deploy_workspace should raise a StackError if notebooks of a directory
+            failed to import, so that the directory isn't recorded as deployed.
+        """
+        stack_api.workspace_client.import_workspace_dir = mock.MagicMock(
+            return_value=[TransferFailure('a.py', '/test/dir/a', HTTPError('failed'))])
+        with pytest.raises(StackError):
+            stack_api._deploy_workspace({'source_path': tmpdir.strpath, 'path': '/test/dir',
+                                         'object_type': 'DIRECTORY'}, None, True)
+
+    def test_get_fingerprint(self, stack_api, tmpdir):
+        """
+            The fingerprint of a resource should change with its properties and with the contents
+            of the non hidden local files it is deployed from.
+        """
+        source_dir = tmpdir.mkdir('dir')
+        source_dir.join('a.py').write("print('a')\n")
+        source_dir.mkdir('sub').join('b.sql').write('SELECT 1\n')
+        resource = {api.RESOURCE_ID: 'dir', api.RESOURCE_SERVICE: api.WORKSPACE_SERVICE,
+                    api.RESOURCE_PROPERTIES: {'source_path': source_dir.strpath,
+                                              'path': '/test/dir',
+                                              'object_type': 'DIRECTORY'}}
+        fingerprint = stack_api._get_fingerprint(resource)
+        assert stack_api._get_fingerprint(copy.deepcopy(resource)) == fingerprint
+
+        source_dir.join('.hidden.py').write('hidden')
+        assert stack_api._get_fingerprint(resource) == fingerprint
+
+        source_dir.join('sub', 'b.sql').write('SELECT 2\n')
+        changed_fingerprint = stack_api._get_fingerprint(resource)
+        assert changed_fingerprint != fingerprint
+
+        resource[api.RESOURCE_PROPERTIES]['path'] = '/test/other'
+        assert stack_api._get_fingerprint(resource) != changed_fingerprint
+
+        job_resource = copy.deepcopy(TEST_JOB_RESOURCE)
+        job_fingerprint = stack_api._get_fingerprint(job_resource)
+        job_resource[api.RESOURCE_PROPERTIES]['max_retries'] = 1
+        assert stack_api._get_fingerprint(job_resource) != job_fingerprint
+
+    def test_deploy_resource_unchanged(self, stack_api):
+        """
+            stack_api._deploy_resource should skip a resource whose fingerprint and state on
+            databricks haven't changed since the last deployment, and deploy it otherwise.
+        """
+        stack_api.jobs_client = _TestJobsClient()
+        status = stack_api._deploy_resource(TEST_JOB_RESOURCE)
+        assert status[api.RESOURCE_FINGERPRINT] == stack_api._get_fingerprint(TEST_JOB_RESOURCE)
+        stack_api._fetch_deploy_outputs([status])
+        # The deploy output from the list has fewer fields than the job returned by get_job.
+        job_id = status[api.RESOURCE_PHYSICAL_ID]['job_id']
+        assert status[api.RESOURCE_DEPLOY_OUTPUT] != stack_api.jobs_client.get_job(job_id)
+
+        stack_api._deploy_job = mock.MagicMock()
+        assert stack_api._deploy_resource(TEST_JOB_RESOURCE, status) == status
+        stack_api._deploy_job.assert_not_called()
+
+        # The job was changed on databricks since the last deployment.
+        stack_api._deploy_job.return_value = status[api.RESOURCE_PHYSICAL_ID]
+        edited_job = copy.deepcopy(stack_api.jobs_client.jobs_in_databricks[job_id])
+        edited_job['settings'] = {'name': 'edited'}
+        stack_api.jobs_client.jobs_in_databricks[job_id] = edited_job
+        stack_api._deploy_resource(TEST_JOB_RESOURCE, status)
+        assert stack_api._deploy_job.call_count == 1
+
+        # The job was deleted on databricks since the last deployment.
+        del stack_api.jobs_client.jobs_in_databricks[job_id]
+        stack_api._deploy_resource(TEST_JOB_RESOURCE, status)
+        assert stack_api._deploy_job.call_count == 2
+
+        # The job settings changed in the config.
+        changed_resource = copy.deepcopy(TEST_JOB_RESOURCE)
+        changed_resource[api.RESOURCE_PROPERTIES]['max_retries'] = 1
+        stack_api._deploy_resource(changed_resource, status)
+        assert stack_api._deploy_job.call_count == 3
+
+    def test_plan_config(self, stack_api):
+        """
+            stack_api.plan_config should plan to create resources that don't exist, to update
+            resources that changed in the config or on databricks, and to leave the others as is,
+            without making any mutating request.
+        """
+        stack_api.jobs_client = _TestJobsClient()
+        stack_api.workspace_client.client = mock.MagicMock()
+        stack_api.workspace_client.client.get_status.side_effect = HTTPError('Not Found')
+        job_resource = copy.deepcopy(TEST_JOB_RESOURCE)
+        stack_config = {api.STACK_NAME: 'test', api.STACK_RESOURCES: [
+            job_resource, TEST_WORKSPACE_NB_RESOURCE]}
+        plan = stack_api.plan_config(stack_config)
+        assert [(p[api.RESOURCE_ID], p[api.PLAN_ACTION]) for p in plan] == [
+            (TEST_RESOURCE_ID, api.PLAN_CREATE), (TEST_RESOURCE_WORKSPACE_NB_ID, api.PLAN_CREATE)]
+
+        job_status = stack_api._deploy_resource(job_resource)
+        stack_api._fetch_deploy_outputs([job_status])
+        job_id = job_status[api.RESOURCE_PHYSICAL_ID]['job_id']
+        stack_config = {api.STACK_NAME: 'test', api.STACK_RESOURCES: [job_resource]}
+        stack_status = dict(copy.deepcopy(stack_config), **{api.STACK_DEPLOYED: [job_status]})
+        jobs_client = stack_api.jobs_client
+        stack_api.jobs_client = mock.Mock(wraps=jobs_client)
+
+        # A job with the same name exists but isn't in the status.
+        plan = stack_api.plan_config(stack_config)
+        assert plan[0][api.PLAN_ACTION] == api.PLAN_UPDATE
+        assert plan[0][api.RESOURCE_PHYSICAL_ID] == {'job_id': job_id}
+
+        plan = stack_api.plan_config(stack_config, stack_status)
+        assert plan[0][api.PLAN_ACTION] == api.PLAN_NO_OP
+        assert plan[0][api.PLAN_REASONS] == []
+
+        job_resource[api.RESOURCE_PROPERTIES]['max_retries'] = 1
+        plan = stack_api.plan_config(stack_config, stack_status)
+        assert plan[0][api.PLAN_ACTION] == api.PLAN_UPDATE
+        assert plan[0][api.PLAN_REASONS] == ["properties changed: 'max_retries'"]
+
+        del jobs_client.jobs_in_databricks[job_id]
+        plan = stack_api.plan_config(stack_config, stack_status)
+        assert plan[0][api.PLAN_REASONS] == ["properties changed: 'max_retries'",
+                                             'not found on databricks']
+
+        stack_api.jobs_client.create_job.assert_not_called()
+        stack_api.jobs_client.reset_job.assert_not_called()
+
+    def test_save_json_atomic(self, stack_api, tmpdir):
+        """
+            If writing the JSON fails, stack_api._save_json should leave the existing file as is
+            and not leave a temporary file behind.
+        """
+        path = os.path.join(tmpdir.strpath, 'test.deployed.json')
+        stack_api._save_json(path, TEST_STATUS)
+        with mock.patch('databricks_cli.stack.api.json.dump', side_effect=ValueError):
+            with pytest.raises(ValueError):
+                stack_api._save_json(path, {})
+        assert stack_api._load_json(path) == TEST_STATUS
+        assert os.listdir(tmpdir.strpath) == ['test.deployed.json']
+
+    def test_deploy_checkpoint(self, stack_api, tmpdir):
+        """
+            When a resource fails to deploy, stack_api.deploy should have saved the status of the
+            resources deployed before the failure, and kept the status from the last deployment
+            of the resources not deployed.
+        """
+        config_path = os.path.join(tmpdir.strpath, 'test.json')
+        status_path = stack_api._generate_stack_status_path(config_path)
+        resources = [
+            {api.RESOURCE_ID: 'first', api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+             api.RESOURCE_PROPERTIES: {}},
+            {api.RESOURCE_ID: 'failing', api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+             api.RESOURCE_PROPERTIES: {}, api.RESOURCE_DEPENDS_ON: ['first']},
+            {api.RESOURCE_ID: 'last', api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+             api.RESOURCE_PROPERTIES: {}, api.RESOURCE_DEPENDS_ON: ['failing']},
+        ]
+        stack_config = {api.STACK_NAME: 'test', api.STACK_RESOURCES: resources}
+        with open(config_path, 'w') as f:
+            json.dump(stack_config, f)
+
+        def _status(resource_id, job_id):
+            return {api.RESOURCE_ID: resource_id, api.RESOURCE_SERVICE: api.JOBS_SERVICE,
+                    api.RESOURCE_PHYSICAL_ID: {'job_id': job_id}}
+
+        last_status = dict(stack_config, **{api.STACK_DEPLOYED: [_status('last', 3)]})
+        stack_api._save_json(status_path, last_status)
+
+        def _deploy_resource(resource_config, resource_status=None, **kwargs):
+            if resource_config[api.RESOURCE_ID] == 'failing':
+                raise StackError('failed')
+            return _status(resource_config[api.RESOURCE_ID], 1)
+
+        stack_api._deploy_resource = mock.Mock(wraps=_deploy_resource)
+        cwd = os.getcwd()
+        with pytest.raises(StackError):
+            stack_api.deploy(config_path)
+        assert os.getcwd() == cwd
+        status = stack_api._load_json(status_path)
+        assert status[api.STACK_DEPLOYED] == [_status('first', 1), _status('last', 3)]
+        assert status[api.STACK_RESOURCES] == resources
+
+    def test_deploy_resource_unchanged_without_deploy_output(self, stack_api):
+        """
+            Without a recorded deploy output, stack_api._deploy_resource should skip a resource
+            whose fingerprint hasn't changed as long as it still exists on databricks.
+        """
+        stack_api.jobs_client = _TestJobsClient()
+        status = stack_api._deploy_resource(TEST_JOB_RESOURCE)
+        job_id = status[api.RESOURCE_PHYSICAL_ID]['job_id']
+        stack_api.jobs_client.jobs_in_databricks[job_id]['settings'] = {'name': 'edited'}
+
+        stack_api._deploy_job = mock.MagicMock(return_value=status[api.RESOURCE_PHYSICAL_ID])
+        assert stack_api._deploy_resource(TEST_JOB_RESOURCE, status) == status
+        stack_api._deploy_job.assert_not_called()
+
+        del stack_api.jobs_client.jobs_in_databricks[job_id]
+        stack_api._deploy_resource(TEST_JOB_RESOURCE, status)
+        stack_api._deploy_job.assert_called_once()
+
+    def test_fetch_deploy_outputs(self, stack_api):
+        """
+            stack_api._fetch_deploy_outputs should read the deploy output of all jobs with a single
+            list request and of each workspace asset with get_status, and leave the resources that
+            already have a deploy output as is.
+        """
+        stack_api.jobs_client = mock.MagicMock()
+        stack_api.jobs_client.list_jobs.return_value = {'jobs': [
+            {'job_id': 1, 'settings': {'name': 'a'}}, {'job_id': 2, 'settings': {'name': 'b'}}]}
+        stack_api.workspace_client.client = mock.MagicMock()
+        stack_api.workspace_client.client.get_status.side_effect = \
+            lambda path: {'path': path, 'object_type': 'NOTEBOOK'}
+        resource_statuses = [
+            {api.RESOURCE_SERVICE: api.JOBS_SERVICE, api.RESOURCE_PHYSICAL_ID: {'job_id': 1}},
+            {api.RESOURCE_SERVICE: api.WORKSPACE_SERVICE, api.RESOURCE_PHYSICAL_ID: {'path': '/a'}},
+            {api.RESOURCE_SERVICE: api.JOBS_SERVICE, api.RESOURCE_PHYSICAL_ID: {'job_id': 2}},
+            {api.RESOURCE_SERVICE: api.JOBS_SERVICE, api.RESOURCE_PHYSICAL_ID: {'job_id': 3}},
+            {api.RESOURCE_SERVICE: api.WORKSPACE_SERVICE, api.RESOURCE_PHYSICAL_ID: {'path': '/b'},
+             api.RESOURCE_DEPLOY_OUTPUT: {'unchanged': True}},
+        ]
+        stack_api._fetch_deploy_outputs(resource_statuses)
+        assert [s[api.RESOURCE_DEPLOY_OUTPUT] for s in resource_statuses] == [
+            {'job_id': 1, 'settings': {'name': 'a'}},
+            {'path': '/a', 'object_type': 'NOTEBOOK'},
+            {'job_id': 2, 'settings': {'name': 'b'}},
+            None,
+            {'unchanged': True}]
+        stack_api.jobs_client.list_jobs.assert_called_once()
+        stack_api.jobs_client.get_job.assert_not_called()
+        stack_api.workspace_client.client.get_status.assert_called_once_with('/a')
+
+    def test_deploy_config_skip_deploy_output(self, stack_api):
+        """
+            stack_api.deploy_config should not read deploy outputs with skip_deploy_output.
+        """
+        stack_api.jobs_client = mock.MagicMock()
+        stack_api.jobs_client.get_jobs_by_name.return_value = []
+        stack_api.jobs_client.create_job.return_value = {'job_id': 1}
+        stack_config = {api.STACK_NAME: 'test', api.STACK_RESOURCES: [TEST_JOB_RESOURCE]}
+        status = stack_api.deploy_config(stack_config, skip_deploy_output=True)
+        assert api.RESOURCE_DEPLOY_OUTPUT not in status[api.STACK_DEPLOYED][0]
+        stack_api.jobs_client.list_jobs.assert_not_called()
+        stack_api.jobs_client.get_job.assert_not_called()
+
+        stack_api.jobs_client.list_jobs.return_value = {'jobs': [{'job_id': 1}]}
+        status = stack_api.deploy_config(stack_config)
+        assert status[api.STACK_DEPLOYED][0][api.RESOURCE_DEPLOY_OUTPUT] == {'job_id': 1}
+        stack_api.jobs_client.get_job.assert_not_called()
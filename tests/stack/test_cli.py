@@ -23,6 +23,8 @@
 # TODO(alinxie)Write test which deploys a stack and validates the status json.
 # pylint:disable=redefined-outer-name
 
+import json
+
 import pytest
 import mock
 from click.testing import CliRunner
@@ -69,3 +71,36 @@ def test_deploy_default_kwargs(stack_api_mock, tmpdir):
     assert stack_api_mock.deploy.call_args[0][0] == path
     # Check overwrite_notebooks in kwargs
     assert stack_api_mock.deploy.call_args[1]['overwrite_notebooks'] is False
+
+
+@provide_conf
+def test_deploy_parallelism(stack_api_mock, tmpdir):
+    """
+    Calling the cli.deploy command with --parallelism should pass it to the deploy function
+    """
+    path = tmpdir.strpath
+    stack_api_mock.deploy = mock.MagicMock()
+    runner = CliRunner()
+    runner.invoke(cli.deploy, ['--parallelism', '3', path])
+    assert stack_api_mock.deploy.call_args[1]['parallelism'] == 3
+
+
+@provide_conf
+def test_deploy_plan(stack_api_mock, tmpdir):
+    """
+    Calling the cli.deploy command with --plan should print the plan of the stack API and not
+    deploy the stack.
+    """
+    path = tmpdir.strpath
+    planned_resources = [{'id': 'job', 'service': 'jobs', 'physical_id': None,
+                          'action': 'create', 'reasons': ['not deployed yet']}]
+    stack_api_mock.plan = mock.MagicMock(return_value=planned_resources)
+    runner = CliRunner()
+    res = runner.invoke(cli.deploy, ['--plan', path])
+    stack_api_mock.deploy.assert_not_called()
+    assert stack_api_mock.plan.call_args[0][0] == path
+    assert 'not deployed yet' in res.output
+    assert '1 to create, 0 to update, 0 unchanged.' in res.output
+
+    res = runner.invoke(cli.deploy, ['--plan', '--output', 'json', path])
+    assert json.loads(res.output) == planned_resources
@@ -21,6 +21,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+
 import pytest
 import mock
 from requests import Response
@@ -68,3 +70,40 @@ def test_json_cli_base_no_args():
 def test_truncate_string():
     assert utils.truncate_string('apple', 3) == 'app...'
     assert utils.truncate_string('apple') == 'apple'
+
+
+def test_walk_concurrently():
+    tree = {'/': ['/a', '/b'], '/a': ['/a/c', '/a/d'], '/a/d': ['/a/d/e']}
+    entries = list(utils.walk_concurrently('/', lambda path: tree[path],
+                                           lambda entry: entry in tree, lambda entry: entry, 2))
+    assert sorted(entries) == ['/a', '/a/c', '/a/d', '/a/d/e', '/b']
+    # A directory is yielded before its contents.
+    assert entries.index('/a') < entries.index('/a/d') < entries.index('/a/d/e')
+
+
+def test_walk_concurrently_early_stop():
+    list_fn = mock.Mock(side_effect=lambda path: [path + '/a', path + '/b'])
+    entries = utils.walk_concurrently('', list_fn, lambda entry: True, lambda entry: entry, 1)
+    assert next(entries) in ('/a', '/b')
+    entries.close()
+    assert list_fn.call_count <= 3
+
+
+def test_make_local_dir(tmpdir):
+    path = tmpdir.join('a', 'b').strpath
+    assert utils.make_local_dir(path, '/remote/b')
+    assert tmpdir.join('a', 'b').isdir()
+    tmpdir.join('file').write('')
+    with mock.patch('databricks_cli.utils.click.echo'):
+        assert not utils.make_local_dir(tmpdir.join('file').strpath, '/remote/file')
+
+
+def test_sha256_file(tmpdir):
+    contents = b'x' * (utils.HASH_BLOCK_SIZE_BYTES + 1)
+    tmpdir.join('file').write_binary(contents)
+    path = tmpdir.join('file').strpath
+    assert utils.sha256_file(path).hexdigest() == hashlib.sha256(contents).hexdigest()
+
+    sha256 = hashlib.sha256(b'prefix')
+    assert utils.sha256_file(path, sha256) is sha256
+    assert sha256.hexdigest() == hashlib.sha256(b'prefix' + contents).hexdigest()
@@ -20,15 +20,20 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import io
+import json
 import os
+import zipfile
 import mock
-from base64 import b64encode
+from base64 import b64encode, b64decode
 
 import pytest
+import requests
 
 import databricks_cli.workspace.api as api
 from databricks_cli.workspace.api import WorkspaceFileInfo
-from databricks_cli.workspace.types import WorkspaceLanguage
+from databricks_cli.workspace.manifest import ImportManifest
+from databricks_cli.workspace.types import WorkspaceLanguage, WorkspaceFormat
 
 TEST_WORKSPACE_PATH = '/test/workspace/path'
 TEST_JSON_RESPONSE = {
@@ -69,6 +74,32 @@ class TestWorkspaceFileInfo(object):
         assert file_info.path == TEST_WORKSPACE_PATH
 
 
+def _mock_exports(workspace_api, exports):
+    """
+    Makes the direct downloads of the workspace paths in exports return their contents, or raise
+    them if they are exceptions.
+    """
+    def perform_download(path, data, f):
+        assert path == '/workspace/export' and data['direct_download'] is True
+        export = exports[data['path']]
+        if isinstance(export, Exception):
+            raise export
+        f.write(export)
+    workspace_api.client.client.perform_download.side_effect = perform_download
+
+
+def _write(root, relpath, contents='x'):
+    """
+    Writes contents to the file at the /-separated relpath below the local directory root.
+    """
+    path = os.path.join(root, *relpath.split('/'))
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'wt') as f:
+        f.write(contents)
+    return path
+
+
 @pytest.fixture()
 def workspace_api():
     with mock.patch('databricks_cli.workspace.api.WorkspaceService') as WorkspaceServiceMock:
@@ -115,12 +146,33 @@ class TestWorkspaceApi(object):
 
     def test_export_workspace(self, workspace_api, tmpdir):
         test_file_path = os.path.join(tmpdir.strpath, 'test')
-        workspace_api.client.export_workspace.return_value = {'content': b64encode(b'test')}
+        _mock_exports(workspace_api, {TEST_WORKSPACE_PATH: b'test'})
         workspace_api.export_workspace(TEST_WORKSPACE_PATH, test_file_path, TEST_FMT,
                                        is_overwrite=False)
         with open(test_file_path, 'r') as f:
             contents = f.read()
             assert contents == 'test'
+        assert workspace_api.client.client.perform_download.call_args[0][1]['format'] == TEST_FMT
+
+    def test_export_workspace_failure(self, workspace_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        _mock_exports(workspace_api, {TEST_WORKSPACE_PATH: RuntimeError('export failed')})
+        with pytest.raises(RuntimeError):
+            workspace_api.export_workspace(TEST_WORKSPACE_PATH, test_file_path, TEST_FMT,
+                                           is_overwrite=False)
+        assert not os.path.exists(test_file_path)
+
+    def test_export_workspace_failure_keeps_target(self, workspace_api, tmpdir):
+        test_file_path = os.path.join(tmpdir.strpath, 'test')
+        with open(test_file_path, 'w') as f:
+            f.write('existing')
+        _mock_exports(workspace_api, {TEST_WORKSPACE_PATH: RuntimeError('export failed')})
+        with pytest.raises(RuntimeError):
+            workspace_api.export_workspace(TEST_WORKSPACE_PATH, test_file_path, TEST_FMT,
+                                           is_overwrite=True)
+        with open(test_file_path, 'r') as f:
+            assert f.read() == 'existing'
+        assert os.listdir(tmpdir.strpath) == ['test']
 
     def test_delete(self, workspace_api):
         workspace_api.delete(TEST_WORKSPACE_PATH, is_recursive=True)
@@ -171,18 +223,14 @@ class TestWorkspaceApi(object):
         assert os.path.isdir(os.path.join(tmpdir.strpath, 'f', 'g'))
         # Verify we exported files b, c, d, e with the correct names
         assert workspace_api.export_workspace.call_count == 4
-        assert workspace_api.export_workspace.call_args_list[0][0][0] == '/a/b'
-        assert workspace_api.export_workspace.call_args_list[0][0][1] == os.path.join(
-            tmpdir.strpath, 'a', 'b.scala')
-        assert workspace_api.export_workspace.call_args_list[1][0][0] == '/a/c'
-        assert workspace_api.export_workspace.call_args_list[1][0][1] == os.path.join(
-            tmpdir.strpath, 'a', 'c.py')
-        assert workspace_api.export_workspace.call_args_list[2][0][0] == '/a/d'
-        assert workspace_api.export_workspace.call_args_list[2][0][1] == os.path.join(
-            tmpdir.strpath, 'a', 'd.r')
-        assert workspace_api.export_workspace.call_args_list[3][0][0] == '/a/e'
-        assert workspace_api.export_workspace.call_args_list[3][0][1] == os.path.join(
-            tmpdir.strpath, 'a', 'e.sql')
+        # The notebooks are exported concurrently, in any order.
+        exports = sorted(ca[0][:2] for ca in workspace_api.export_workspace.call_args_list)
+        assert exports == [
+            ('/a/b', os.path.join(tmpdir.strpath, 'a', 'b.scala')),
+            ('/a/c', os.path.join(tmpdir.strpath, 'a', 'c.py')),
+            ('/a/d', os.path.join(tmpdir.strpath, 'a', 'd.r')),
+            ('/a/e', os.path.join(tmpdir.strpath, 'a', 'e.sql')),
+        ]
         # Verify that we only called list 4 times.
         assert workspace_api.list_objects.call_count == 4
 
@@ -293,3 +341,281 @@ class TestWorkspaceApi(object):
                     for ca in workspace_api.import_workspace.call_args_list])
         assert any([ca[0][1] == '/a/test-py'
                     for ca in workspace_api.import_workspace.call_args_list])
+
+    def test_import_dir_failures(self, workspace_api, tmpdir):
+        """
+        Copy from directory ``tmpdir`` with structure as follows
+        - a (directory)
+          - ok.py (python)
+          - fail.py (python)
+        - b (directory, fails to be created)
+          - skipped.py (python)
+        """
+        def import_workspace(source_path, target_path, *args):
+            if target_path == '/a/fail':
+                raise RuntimeError('import failed')
+
+        def mkdirs(workspace_path):
+            if workspace_path == '/b':
+                response = requests.Response()
+                response._content = b'{"error_code": "RESOURCE_ALREADY_EXISTS"}'
+                raise requests.exceptions.HTTPError(response=response)
+
+        workspace_api.import_workspace = mock.MagicMock(side_effect=import_workspace)
+        workspace_api.mkdirs = mock.MagicMock(side_effect=mkdirs)
+        for path in ['a/ok.py', 'a/fail.py', 'b/skipped.py']:
+            _write(tmpdir.strpath, path, '')
+
+        failures = workspace_api.import_workspace_dir(tmpdir.strpath, '/', False, False,
+                                                      parallelism=4)
+
+        assert [(f.src, f.dst) for f in failures] == \
+            [(os.path.join(tmpdir.strpath, 'a', 'fail.py'), '/a/fail')]
+        assert sorted(ca[0][1] for ca in workspace_api.import_workspace.call_args_list) == \
+            ['/a/fail', '/a/ok']
+
+    def test_export_workspace_dir_failures(self, workspace_api, tmpdir):
+        def list_objects(path):
+            return {
+                '/src': [WorkspaceFileInfo('/src/a', api.DIRECTORY),
+                         WorkspaceFileInfo('/src/ok', api.NOTEBOOK, WorkspaceLanguage.PYTHON)],
+                '/src/a': [WorkspaceFileInfo('/src/a/fail', api.NOTEBOOK, WorkspaceLanguage.SQL),
+                           WorkspaceFileInfo('/src/a/lib', api.LIBRARY)],
+            }[path]
+
+        workspace_api.list_objects = mock.Mock(wraps=list_objects)
+        _mock_exports(workspace_api, {'/src/ok': b'/src/ok',
+                                      '/src/a/fail': RuntimeError('export failed')})
+
+        failures = workspace_api.export_workspace_dir('/src', tmpdir.strpath, False,
+                                                      parallelism=4)
+
+        assert [(f.src, f.dst) for f in failures] == \
+            [('/src/a/fail', os.path.join(tmpdir.strpath, 'a', 'fail.sql'))]
+        with open(os.path.join(tmpdir.strpath, 'ok.py')) as f:
+            assert f.read() == '/src/ok'
+        assert os.listdir(os.path.join(tmpdir.strpath, 'a')) == []
+
+    def test_export_workspace_archive_source(self, workspace_api, tmpdir):
+        content = io.BytesIO()
+        with zipfile.ZipFile(content, 'w') as archive:
+            archive.writestr('src/a.py', 'a')
+            archive.writestr('src/b/c.scala', 'c')
+            archive.writestr('src/../evil.py', 'evil')
+            archive.writestr('src/existing.sql', 'new')
+        _mock_exports(workspace_api, {'/src': content.getvalue()})
+        _write(tmpdir.strpath, 'existing.sql', 'old')
+
+        workspace_api.export_workspace_archive('/src', tmpdir.strpath, 'SOURCE', False)
+
+        assert workspace_api.client.client.perform_download.call_args[0][1]['format'] == 'SOURCE'
+        with open(os.path.join(tmpdir.strpath, 'a.py')) as f:
+            assert f.read() == 'a'
+        with open(os.path.join(tmpdir.strpath, 'b', 'c.scala')) as f:
+            assert f.read() == 'c'
+        with open(os.path.join(tmpdir.strpath, 'existing.sql')) as f:
+            assert f.read() == 'old'
+        assert not os.path.exists(os.path.join(os.path.dirname(tmpdir.strpath), 'evil.py'))
+
+    def test_export_workspace_archive_dbc(self, workspace_api, tmpdir):
+        _mock_exports(workspace_api, {'/src': b'dbc'})
+        target_path = os.path.join(tmpdir.strpath, 'src.dbc')
+
+        workspace_api.export_workspace_archive('/src', target_path, 'DBC', False)
+
+        assert workspace_api.client.client.perform_download.call_args[0][1]['format'] == 'DBC'
+        with open(target_path, 'rb') as f:
+            assert f.read() == b'dbc'
+
+    def test_import_workspace_archive_source(self, workspace_api, tmpdir, capsys):
+        for path in ['a.py', 'b/c.scala', 'b/d.ipynb', '.hidden/e.py']:
+            _write(tmpdir.strpath, path)
+
+        workspace_api.import_workspace_archive(tmpdir.strpath, '/dst', 'SOURCE', True, True)
+
+        path, fmt, language, content, overwrite = \
+            workspace_api.client.import_workspace.call_args[0]
+        assert (path, fmt, language, overwrite) == ('/dst', 'SOURCE', None, True)
+        archive = zipfile.ZipFile(io.BytesIO(b64decode(content)))
+        assert sorted(archive.namelist()) == ['a.py', 'b/c.scala']
+        assert '{} is a Jupyter notebook'.format(os.path.join(tmpdir.strpath, 'b', 'd.ipynb')) \
+            in capsys.readouterr()[0]
+
+    def test_import_workspace_archive_source_empty(self, workspace_api, tmpdir):
+        _write(tmpdir.strpath, 'a.ipynb', '{}')
+
+        workspace_api.import_workspace_archive(tmpdir.strpath, '/dst', 'SOURCE', True, False)
+
+        assert not workspace_api.client.import_workspace.called
+
+    def test_import_workspace_dir_manifest(self, workspace_api, tmpdir):
+        workspace_api.import_workspace = mock.MagicMock()
+        workspace_api.mkdirs = mock.MagicMock()
+        source_path = os.path.join(tmpdir.strpath, 'src')
+        for path in ['a.py', 'b/c.scala', 'b/d.sql']:
+            _write(source_path, path, '1')
+        manifest = ImportManifest(os.path.join(tmpdir.strpath, 'manifest.json'), None)
+
+        workspace_api.import_workspace_dir(source_path, '/dst', True, False, manifest=manifest)
+        assert workspace_api.import_workspace.call_count == 3
+        assert workspace_api.mkdirs.call_count == 2
+
+        # Nothing changed.
+        workspace_api.import_workspace.reset_mock()
+        workspace_api.mkdirs.reset_mock()
+        manifest = ImportManifest(os.path.join(tmpdir.strpath, 'manifest.json'), None)
+        workspace_api.import_workspace_dir(source_path, '/dst', True, False, manifest=manifest)
+        assert workspace_api.import_workspace.call_count == 0
+        assert workspace_api.mkdirs.call_count == 0
+
+        # One notebook changed and fails to import, so it is still imported by the next run.
+        _write(source_path, 'b/c.scala', '2')
+        workspace_api.import_workspace.side_effect = RuntimeError('import failed')
+        failures = workspace_api.import_workspace_dir(source_path, '/dst', True, False,
+                                                      manifest=manifest)
+        assert [f.dst for f in failures] == ['/dst/b/c']
+
+        workspace_api.import_workspace.reset_mock()
+        workspace_api.import_workspace.side_effect = None
+        workspace_api.import_workspace_dir(source_path, '/dst', True, False, manifest=manifest)
+        assert [ca[0][1] for ca in workspace_api.import_workspace.call_args_list] == ['/dst/b/c']
+
+    def _mock_tree(self, workspace_api):
+        tree = {
+            '/': [WorkspaceFileInfo('/a', api.DIRECTORY),
+                  WorkspaceFileInfo('/etl.py', api.NOTEBOOK, WorkspaceLanguage.PYTHON)],
+            '/a': [WorkspaceFileInfo('/a/b', api.DIRECTORY),
+                   WorkspaceFileInfo('/a/etl', api.NOTEBOOK, WorkspaceLanguage.SCALA),
+                   WorkspaceFileInfo('/a/lib', api.LIBRARY)],
+            '/a/b': [WorkspaceFileInfo('/a/b/etl_job', api.NOTEBOOK, WorkspaceLanguage.PYTHON)],
+        }
+        workspace_api.list_objects = mock.Mock(side_effect=lambda path: tree[path])
+
+    def test_walk(self, workspace_api):
+        self._mock_tree(workspace_api)
+
+        paths = [obj.path for obj in workspace_api.walk('/', parallelism=2)]
+
+        assert sorted(paths) == ['/a', '/a/b', '/a/b/etl_job', '/a/etl', '/a/lib', '/etl.py']
+        assert paths.index('/a') < paths.index('/a/b') < paths.index('/a/b/etl_job')
+
+    def test_find(self, workspace_api):
+        self._mock_tree(workspace_api)
+
+        def find(**kwargs):
+            return sorted(obj.path for obj in workspace_api.find('/', **kwargs))
+
+        assert find(name='etl*') == ['/a/b/etl_job', '/a/etl', '/etl.py']
+        assert find(language=WorkspaceLanguage.PYTHON) == ['/a/b/etl_job', '/etl.py']
+        assert find(name='etl', language=WorkspaceLanguage.SCALA) == ['/a/etl']
+
+    def test_count_objects(self, workspace_api):
+        self._mock_tree(workspace_api)
+
+        counts = workspace_api.count_objects('/')
+
+        assert counts == {
+            '': {api.DIRECTORY: 2, api.NOTEBOOK: 3, api.LIBRARY: 1},
+            'a': {api.DIRECTORY: 1, api.NOTEBOOK: 2, api.LIBRARY: 1},
+            'a/b': {api.DIRECTORY: 0, api.NOTEBOOK: 1, api.LIBRARY: 0},
+        }
+
+    def test_to_row_relative_to(self):
+        file_info = WorkspaceFileInfo('/a/b/c', api.NOTEBOOK, WorkspaceLanguage.PYTHON)
+        assert file_info.to_row(is_long_form=False, is_absolute=False, relative_to='/a') == ['b/c']
+        assert file_info.to_row(is_long_form=False, is_absolute=False, relative_to='/') == \
+            ['a/b/c']
+
+    def test_diff(self, workspace_api, tmpdir):
+        for path, contents in [('same.py', 'print(1)\n'), ('edited.py', 'print(2)'),
+                               ('language.scala', '1'), ('b/added.sql', 'select 1')]:
+            _write(tmpdir.strpath, path, contents)
+        tree = {
+            '/dst': [WorkspaceFileInfo('/dst/same', api.NOTEBOOK, WorkspaceLanguage.PYTHON),
+                     WorkspaceFileInfo('/dst/edited', api.NOTEBOOK, WorkspaceLanguage.PYTHON),
+                     WorkspaceFileInfo('/dst/language', api.NOTEBOOK, WorkspaceLanguage.PYTHON),
+                     WorkspaceFileInfo('/dst/b', api.DIRECTORY)],
+            '/dst/b': [WorkspaceFileInfo('/dst/b/removed', api.NOTEBOOK, WorkspaceLanguage.R)],
+        }
+        workspace_api.list_objects = mock.Mock(side_effect=lambda path: tree[path])
+        _mock_exports(workspace_api, {
+            '/dst/same': b'# Databricks notebook source\nprint(1)',
+            '/dst/edited': b'# Databricks notebook source\nprint(1)',
+        })
+
+        diff = list(workspace_api.diff(tmpdir.strpath, '/dst', parallelism=2))
+
+        assert sorted(diff) == sorted([
+            ('changed', '/dst/edited', os.path.join(tmpdir.strpath, 'edited.py')),
+            ('changed', '/dst/language', os.path.join(tmpdir.strpath, 'language.scala')),
+            ('removed', '/dst/b/removed', None),
+            ('added', '/dst/b/added', os.path.join(tmpdir.strpath, 'b', 'added.sql')),
+        ])
+        # Only the notebooks on both sides in the same language were exported.
+        exported = [ca[0][1]['path']
+                    for ca in workspace_api.client.client.perform_download.call_args_list]
+        assert sorted(exported) == ['/dst/edited', '/dst/same']
+
+    def test_diff_jupyter(self, workspace_api, tmpdir):
+        local = {'cells': [{'cell_type': 'code', 'source': ['x = 1\n', 'print(x)']}],
+                 'metadata': {'kernelspec': {'name': 'python3'}}, 'nbformat': 4}
+        for name in ['same', 'edited']:
+            _write(tmpdir.strpath, name + '.ipynb', json.dumps(local))
+        workspace_api.list_objects = mock.Mock(return_value=[
+            WorkspaceFileInfo('/dst/' + name, api.NOTEBOOK, WorkspaceLanguage.PYTHON)
+            for name in ['same', 'edited']])
+        exported = {'cells': [{'cell_type': 'code', 'source': 'x = 1\nprint(x)\n',
+                               'metadata': {}, 'outputs': []}],
+                    'metadata': {'name': 'same'}, 'nbformat': 4, 'nbformat_minor': 0}
+        _mock_exports(workspace_api, {
+            '/dst/same': json.dumps(exported).encode(),
+            '/dst/edited': json.dumps({'cells': [{'source': 'x = 2'}]}).encode(),
+        })
+
+        diff = list(workspace_api.diff(tmpdir.strpath, '/dst'))
+
+        assert diff == [('changed', '/dst/edited', os.path.join(tmpdir.strpath, 'edited.ipynb'))]
+        formats = [ca[0][1]['format']
+                   for ca in workspace_api.client.client.perform_download.call_args_list]
+        assert formats == ['JUPYTER', 'JUPYTER']
+
+    def test_diff_missing_target(self, workspace_api, tmpdir):
+        _write(tmpdir.strpath, 'a.py', 'print(1)')
+        response = requests.Response()
+        response._content = b'{"error_code": "RESOURCE_DOES_NOT_EXIST"}'
+        workspace_api.list_objects = mock.Mock(
+            side_effect=requests.exceptions.HTTPError(response=response))
+
+        diff = list(workspace_api.diff(tmpdir.strpath, '/dst'))
+
+        assert diff == [('added', '/dst/a', os.path.join(tmpdir.strpath, 'a.py'))]
+
+    def test_diff_manifest_and_failures(self, workspace_api, tmpdir):
+        for name in ['imported.py', 'edited.py', 'failing.py']:
+            _write(tmpdir.strpath, name, 'print(1)\n')
+        manifest = ImportManifest(os.path.join(tmpdir.strpath, '.manifest'), None)
+        for name in ['imported', 'edited']:
+            manifest.notebooks['/dst/' + name] = manifest.record(
+                os.path.join(tmpdir.strpath, name + '.py'), WorkspaceLanguage.PYTHON,
+                WorkspaceFormat.SOURCE)
+        manifest.save()
+        _write(tmpdir.strpath, 'edited.py', 'print(2)\n')
+        workspace_api.list_objects = mock.Mock(return_value=[
+            WorkspaceFileInfo('/dst/' + name, api.NOTEBOOK, WorkspaceLanguage.PYTHON)
+            for name in ['imported', 'edited', 'failing']])
+        _mock_exports(workspace_api, {
+            '/dst/edited': b'print(1)\n',
+            '/dst/failing': requests.exceptions.HTTPError('export failed'),
+        })
+
+        diff = list(workspace_api.diff(tmpdir.strpath, '/dst', exclude_hidden_files=True,
+                                       manifest=manifest))
+
+        assert sorted(diff) == [
+            ('changed', '/dst/edited', os.path.join(tmpdir.strpath, 'edited.py')),
+            ('failed', '/dst/failing', os.path.join(tmpdir.strpath, 'failing.py')),
+        ]
+        # The notebook unchanged since the import recorded in the manifest wasn't exported.
+        exported = [ca[0][1]['path']
+                    for ca in workspace_api.client.client.perform_download.call_args_list]
+        assert sorted(exported) == ['/dst/edited', '/dst/failing']
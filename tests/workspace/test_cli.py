@@ -28,6 +28,7 @@ from click.testing import CliRunner
 
 import databricks_cli.workspace.cli as cli
 from databricks_cli.workspace.api import WorkspaceFileInfo, NOTEBOOK
+from databricks_cli.workspace.manifest import ImportManifest
 from databricks_cli.workspace.types import WorkspaceLanguage
 from tests.utils import provide_conf
 
@@ -49,3 +50,39 @@ def test_export_workspace_cli(workspace_api_mock, tmpdir):
     runner.invoke(cli.export_workspace_cli, ['--format', 'SOURCE', '/notebook-name', path])
     assert workspace_api_mock.export_workspace.call_args[0][1] == os.path.join(
         path, 'notebook-name.scala')
+
+
+@provide_conf
+def test_import_dir_cli_dbc_overwrite(workspace_api_mock, tmpdir):
+    source_path = os.path.join(tmpdir.strpath, 'src.dbc')
+    with open(source_path, 'wb') as f:
+        f.write(b'dbc')
+    runner = CliRunner()
+    res = runner.invoke(cli.import_dir_cli,
+                        ['--archive', 'DBC', '--overwrite', source_path, '/dst'])
+    assert res.exit_code != 0
+    assert not workspace_api_mock.import_workspace_archive.called
+
+
+
+@provide_conf
+def test_sync_cli_default_manifest(workspace_api_mock, tmpdir):
+    source_path = tmpdir.mkdir('src').strpath
+    workspace_api_mock.import_workspace_dir.return_value = []
+    manifest = ImportManifest(os.path.join(tmpdir.strpath, 'manifest.json'), None)
+    manifest.notebooks['/dst/a'] = {'sha256': 'a'}
+    manifest.save()
+    runner = CliRunner()
+    with mock.patch('databricks_cli.workspace.cli.ImportManifest.for_sync',
+                    return_value=manifest) as for_sync:
+        res = runner.invoke(cli.sync_cli, [source_path, '/dst'])
+        assert res.exit_code == 0
+        assert for_sync.call_args[0][:2] == (source_path, '/dst')
+        assert workspace_api_mock.import_workspace_dir.call_args[0][5] is manifest
+        manifest.load()
+        assert manifest.notebooks == {'/dst/a': {'sha256': 'a'}}
+
+        res = runner.invoke(cli.sync_cli, ['--full', source_path, '/dst'])
+        assert res.exit_code == 0
+        manifest.load()
+        assert manifest.notebooks == {}
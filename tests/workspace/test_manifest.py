@@ -0,0 +1,90 @@
+# Databricks CLI
+# Copyright 2017 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import mock
+
+from databricks_cli.dbfs.dbfs_path import DbfsPath
+from databricks_cli.workspace.manifest import ImportManifest
+
+
+def test_load_missing_manifest(tmpdir):
+    manifest = ImportManifest(os.path.join(tmpdir.strpath, 'manifest.json'), None)
+    manifest.load()
+    assert manifest.notebooks == {}
+    assert manifest.dirs == set()
+
+
+def test_save_and_load(tmpdir):
+    notebook = os.path.join(tmpdir.strpath, 'a.py')
+    with open(notebook, 'w') as f:
+        f.write('print(1)')
+    manifest = ImportManifest(os.path.join(tmpdir.strpath, 'manifest.json'), None)
+    manifest.notebooks['/a'] = ImportManifest.record(notebook, 'PYTHON', 'SOURCE')
+    manifest.dirs.add('/')
+    manifest.save()
+
+    loaded = ImportManifest(manifest.path, None)
+    loaded.load()
+    assert loaded.notebooks == manifest.notebooks
+    assert loaded.dirs == {'/'}
+
+
+def test_dbfs_manifest():
+    with mock.patch('databricks_cli.workspace.manifest.DbfsApi') as DbfsApiMock:
+        dbfs_api = DbfsApiMock.return_value
+        dbfs_api.file_exists.return_value = True
+
+        def get_file(dbfs_path, dst, overwrite):
+            with open(dst, 'w') as f:
+                json.dump({'notebooks': {'/a': {'sha256': '0'}}, 'dirs': ['/']}, f)
+
+        def put_file(src, dbfs_path, overwrite):
+            with open(src) as f:
+                put_file.contents = json.load(f)
+
+        dbfs_api.get_file.side_effect = get_file
+        dbfs_api.put_file.side_effect = put_file
+        manifest = ImportManifest('dbfs:/manifest.json', None)
+        manifest.load()
+        assert manifest.notebooks == {'/a': {'sha256': '0'}}
+        assert dbfs_api.get_file.call_args[0][0].absolute_path == 'dbfs:/manifest.json'
+
+        manifest.save()
+        assert put_file.contents == {'notebooks': {'/a': {'sha256': '0'}}, 'dirs': ['/']}
+        assert isinstance(dbfs_api.put_file.call_args[0][1], DbfsPath)
+
+
+def test_for_sync(tmpdir):
+    api_client = mock.MagicMock(url='https://host/api/2.0')
+    other_api_client = mock.MagicMock(url='https://other/api/2.0')
+    with mock.patch('databricks_cli.workspace.manifest.provider._home', tmpdir.strpath):
+        manifest = ImportManifest.for_sync('src', '/dst', api_client)
+        assert os.path.dirname(manifest.path) == \
+            os.path.join(tmpdir.strpath, '.databricks_sync_manifests')
+        assert ImportManifest.for_sync(os.path.abspath('src'), '/dst', api_client).path == \
+            manifest.path
+        assert ImportManifest.for_sync('src', '/other', api_client).path != manifest.path
+        assert ImportManifest.for_sync('src', '/dst', other_api_client).path != manifest.path
@@ -0,0 +1,132 @@
+# Databricks CLI
+# Copyright 2017 Databricks, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"), except
+# that the use of services to which certain application programming
+# interfaces (each, an "API") connect requires that the user first obtain
+# a license for the use of the APIs from Databricks, Inc. ("Databricks"),
+# by creating an account at www.databricks.com and agreeing to either (a)
+# the Community Edition Terms of Service, (b) the Databricks Terms of
+# Service, or (c) another written agreement between Licensee and Databricks
+# for the use of the APIs.
+#
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+import time
+
+import mock
+import pytest
+
+from databricks_cli.workspace import watch
+from databricks_cli.workspace.watch import Debouncer, PollingWatcher, WorkspaceWatch
+
+
+def _write(path, contents='x'):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(contents)
+
+
+def test_debouncer():
+    debouncer = Debouncer(1)
+    debouncer.touch('a', now=10)
+    debouncer.touch('b', now=10.5)
+    debouncer.touch('a', now=10.6)
+
+    assert debouncer.pop_ready(now=11.2) == []
+    assert debouncer.pop_ready(now=11.5) == ['b']
+    assert debouncer.pop_ready(now=11.6) == ['a']
+    assert debouncer.pop_ready(now=20) == []
+
+
+def test_polling_watcher(tmpdir):
+    modified = os.path.join(tmpdir.strpath, 'a.py')
+    removed = os.path.join(tmpdir.strpath, 'b', 'c.py')
+    unchanged = os.path.join(tmpdir.strpath, 'd.py')
+    added = os.path.join(tmpdir.strpath, 'b', 'e.scala')
+    for path in [modified, removed, unchanged]:
+        _write(path)
+    changes = []
+    watcher = PollingWatcher(tmpdir.strpath, changes.append, poll_interval=1)
+
+    _write(modified, 'xx')
+    os.remove(removed)
+    _write(added)
+    watcher.poll(now=time.time() + 0.5)
+    assert changes == []
+    watcher.poll(now=time.time() + 1)
+
+    assert sorted(changes) == sorted([modified, removed, added])
+
+
+@pytest.fixture()
+def workspace_api():
+    return mock.MagicMock()
+
+
+def test_push(workspace_api, tmpdir):
+    local_watch = WorkspaceWatch(workspace_api, tmpdir.strpath, '/dst', delete=True)
+    notebook = os.path.join(tmpdir.strpath, 'a', 'b.py')
+    _write(notebook)
+
+    local_watch.push(notebook)
+    local_watch.push(notebook)
+
+    workspace_api.mkdirs.assert_called_once_with('/dst/a')
+    assert workspace_api.import_workspace.call_args[0] == \
+        (notebook, '/dst/a/b', 'PYTHON', 'SOURCE', True)
+
+    os.remove(notebook)
+    local_watch.push(notebook)
+    workspace_api.delete.assert_called_once_with('/dst/a/b', False)
+
+
+def test_on_change_filters(workspace_api, tmpdir):
+    local_watch = WorkspaceWatch(workspace_api, tmpdir.strpath, '/dst',
+                                 exclude_hidden_files=True, debounce=0)
+    local_watch.on_change(os.path.join(tmpdir.strpath, 'a.py'))
+    local_watch.on_change(os.path.join(tmpdir.strpath, 'notes.txt'))
+    local_watch.on_change(os.path.join(tmpdir.strpath, '.hidden', 'b.py'))
+    local_watch.on_change(os.path.join(os.path.dirname(tmpdir.strpath), 'outside.py'))
+
+    assert local_watch.debouncer.pop_ready() == [os.path.join(tmpdir.strpath, 'a.py')]
+
+
+@pytest.mark.parametrize('use_polling', [True, False])
+def test_run(workspace_api, tmpdir, use_polling):
+    if not use_polling and watch.Observer is None:
+        pytest.skip('watchdog is not installed')
+    local_watch = WorkspaceWatch(workspace_api, tmpdir.strpath, '/dst', debounce=0.1,
+                                 use_polling=use_polling, poll_interval=0.1)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=local_watch.run, args=(stop_event,))
+    thread.start()
+    try:
+        # Give the watcher time to take its first snapshot.
+        time.sleep(0.3)
+        notebook = os.path.join(tmpdir.strpath, 'a.py')
+        for i in range(5):
+            _write(notebook, str(i))
+        deadline = time.time() + 5
+        while not workspace_api.import_workspace.called and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+    finally:
+        stop_event.set()
+        thread.join()
+
+    # The burst of saves was pushed once.
+    workspace_api.import_workspace.assert_called_once_with(notebook, '/dst/a', 'PYTHON',
+                                                           'SOURCE', True)